@@ -0,0 +1,196 @@
+"""
+Harness running benchmarks and comparing them with stored baselines.
+
+A benchmark is a function taking the parameters of a case and returning a
+``(setup, run)`` pair: ``setup()`` builds the state to measure, outside of the
+timing, and ``run(state)`` performs the measured work and returns the number
+of operations it did. Results are reported in nanoseconds per operation, the
+best of the repetitions being the figure compared with the baselines, as it is
+the least disturbed by the rest of the machine.
+
+Memory benchmarks return a single ``measure()`` function instead, returning
+a number of bytes.
+
+Only the Python Standard Library is used, so the suite runs offline.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+
+class Suite:
+    """
+    Collection of benchmarks and of the parameters of their cases.
+
+    :param name: name of the suite, stored in the baselines.
+    """
+
+    def __init__(self, name):
+        """Initialize an empty suite."""
+        self.name = name
+        self._cases = list()
+
+    def timing(self, benchmark, full, quick=()):
+        """
+        Add a timing benchmark.
+
+        :param full: list of the parameter dictionaries of the cases.
+        :param quick: list of the cases run in quick mode.
+        """
+        self._cases.append(('timing', benchmark, full, quick))
+        return benchmark
+
+    def memory(self, benchmark, full, quick=()):
+        """Add a memory benchmark, see :meth:`timing`."""
+        self._cases.append(('memory', benchmark, full, quick))
+        return benchmark
+
+    def run(self, quick=False, repeat=5, select=None, out=sys.stdout):
+        """
+        Run the cases of the suite.
+
+        :param quick: run only the quick cases, with less repetitions.
+        :param select: run only the cases whose name contains this string.
+        :return: dictionary mapping the name of each case to its results.
+        """
+        results = dict()
+        for kind, benchmark, full, quick_cases in self._cases:
+            for parameters in (quick_cases if quick else full):
+                name = case_name(benchmark, parameters)
+                if select is not None and select not in name:
+                    continue
+                if kind == 'timing':
+                    result = _time(*benchmark(**parameters), repeat=repeat)
+                else:
+                    result = {'bytes': benchmark(**parameters)()}
+                results[name] = result
+                print('{:<60} {}'.format(name, _format(result)), file=out)
+        return results
+
+
+def case_name(benchmark, parameters):
+    """Return the name of a case, like ``notify[observers=10]``."""
+    arguments = ','.join('{}={}'.format(key, value)
+                         for key, value in parameters.items())
+    return '{}[{}]'.format(benchmark.__name__, arguments)
+
+
+def _time(setup, run, repeat):
+    """Measure the nanoseconds per operation of run, best and median."""
+    samples = list()
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            operations = run(state)
+            elapsed = time.perf_counter_ns() - start
+        finally:
+            gc.enable()
+        samples.append(elapsed / operations)
+        del state
+    return {'ns_per_op': min(samples), 'median_ns': statistics.median(samples)}
+
+
+def _format(result):
+    """Format the results of a case."""
+    if 'bytes' in result:
+        return '{:>14,} B'.format(result['bytes'])
+    return '{:>14,.1f} ns/op (median {:,.1f})'.format(result['ns_per_op'],
+                                                     result['median_ns'])
+
+
+def _value(result):
+    """Return the figure of the results compared with the baselines."""
+    return result['bytes'] if 'bytes' in result else result['ns_per_op']
+
+
+def environment():
+    """Describe the interpreter and the machine running the suite."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+
+
+def save(path, suite, results):
+    """Store the results as the baselines of the suite."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as baseline_file:
+        json.dump({'suite': suite.name, 'environment': environment(),
+                   'results': results}, baseline_file, indent=2,
+                  sort_keys=True)
+        baseline_file.write('\n')
+
+
+def compare(path, results, tolerance, out=sys.stdout):
+    """
+    Compare results with the baselines stored in a file.
+
+    :param tolerance: relative increase of a figure above which the case is
+                      reported as a regression.
+    :return: the names of the regressed cases.
+    """
+    with open(path) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline['environment'] != environment():
+        print('warning: baselines recorded on {}, comparison may not be '
+              'meaningful'.format(baseline['environment']), file=out)
+
+    regressions = list()
+    print('{:<60} {:>9}'.format('case', 'change'), file=out)
+    for name, result in sorted(results.items()):
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print('{:<60} {:>9}'.format(name, 'new'), file=out)
+            continue
+        change = _value(result) / _value(reference) - 1
+        flag = ''
+        if change > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print('{:<60} {:>+8.1%}{}'.format(name, change, flag), file=out)
+    return regressions
+
+
+def main(suite, baseline, argv=None):
+    """
+    Command line interface of a suite.
+
+    :param baseline: default path of the baselines of the suite.
+    :return: the exit status, 1 if some case regressed.
+    """
+    parser = argparse.ArgumentParser(description='Run the {} benchmarks.'
+                                     .format(suite.name))
+    parser.add_argument('--quick', action='store_true',
+                        help='run only the small cases, with less repetitions')
+    parser.add_argument('--repeat', type=int, default=None,
+                        help='repetitions of each timing case')
+    parser.add_argument('--select', default=None,
+                        help='run only the cases whose name contains this')
+    parser.add_argument('--save', nargs='?', const=baseline, default=None,
+                        metavar='PATH', help='store the results as baselines')
+    parser.add_argument('--compare', nargs='?', const=baseline, default=None,
+                        metavar='PATH', help='compare with stored baselines')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slowdown reported as a regression')
+    arguments = parser.parse_args(argv)
+
+    repeat = arguments.repeat or (3 if arguments.quick else 5)
+    results = suite.run(arguments.quick, repeat, arguments.select)
+    status = 0
+    if arguments.compare:
+        if compare(arguments.compare, results, arguments.tolerance):
+            status = 1
+    if arguments.save:
+        save(arguments.save, suite, results)
+    return status
@@ -0,0 +1,262 @@
+"""
+Benchmarks of :mod:`matils.patterns.observer`.
+
+Run them from the root of the repository::
+
+    python benchmarks/observer.py             # every case
+    python benchmarks/observer.py --quick     # small cases, a few seconds
+    python benchmarks/observer.py --compare   # against the stored baselines
+    python benchmarks/observer.py --save      # replace the stored baselines
+
+The baselines are kept in ``benchmarks/baselines/observer.json``, figures are
+only comparable with baselines recorded on the same machine and interpreter,
+record new ones before judging a change. ``--compare`` exits with status 1
+when a case is slower, or bigger, than its baseline by more than the
+tolerance.
+
+The registries are built with ``observers`` observers spread evenly over
+``events`` event names, each observer registered to one event, or to
+``subscriptions`` of them for the churn case.
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from harness import Suite, main  # noqa: E402
+from matils.patterns.compact import CompactObservable  # noqa: E402
+from matils.patterns.observer import Observable, Observer  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baselines', 'observer.json')
+
+NOTIFICATIONS = 10 ** 4
+"""Notifications per repetition of the notify cases."""
+
+OPERATIONS = 10 ** 3
+"""Minimum registry operations per repetition, small registries are copied."""
+
+
+class NullObserver(Observer):
+    """Observer doing nothing, so that only the dispatch is measured."""
+
+    def update(self, data, event='all'):
+        """Ignore the notification."""
+        pass
+
+
+def _populate(observable, observers, events, subscriptions=1):
+    """Register new observers spread over the events, return them."""
+    registered = [NullObserver() for _ in range(observers)]
+    for index, observer in enumerate(registered):
+        for subscription in range(subscriptions):
+            event = 'event{}'.format((index + subscription) % events)
+            observable.register(observer, event)
+    return registered
+
+
+def _copies(observers):
+    """Return how many registries to build to reach OPERATIONS."""
+    return max(1, OPERATIONS // observers)
+
+
+def register(observers, events):
+    """Register every observer to one event of an empty Observable."""
+    def setup():
+        return [(Observable(), [(NullObserver(),
+                                 'event{}'.format(index % events))
+                                for index in range(observers)])
+                for _ in range(_copies(observers))]
+
+    def run(state):
+        for observable, pairs in state:
+            for observer, event in pairs:
+                observable.register(observer, event)
+        return len(state) * observers
+    return setup, run
+
+
+def unregister_event(observers, events):
+    """Unregister every observer from the event it is registered to."""
+    def setup():
+        state = list()
+        for _ in range(_copies(observers)):
+            observable = Observable()
+            registered = _populate(observable, observers, events)
+            state.append((observable, [
+                (observer, 'event{}'.format(index % events))
+                for index, observer in enumerate(registered)]))
+        return state
+
+    def run(state):
+        for observable, pairs in state:
+            for observer, event in pairs:
+                observable.unregister(observer, event)
+        return len(state) * observers
+    return setup, run
+
+
+def unregister_all(observers, events, subscriptions):
+    """Unregister every observer from all its events, newest first."""
+    def setup():
+        observable = Observable()
+        registered = _populate(observable, observers, events, subscriptions)
+        registered.reverse()
+        return observable, registered
+
+    def run(state):
+        observable, registered = state
+        for observer in registered:
+            observable.unregister(observer)
+        return len(registered)
+    return setup, run
+
+
+def reset(observers, events):
+    """Reset a populated Observable."""
+    def setup():
+        state = list()
+        for _ in range(_copies(observers)):
+            observable = Observable()
+            _populate(observable, observers, events)
+            state.append(observable)
+        return state
+
+    def run(state):
+        for observable in state:
+            observable.reset()
+        return len(state)
+    return setup, run
+
+
+def notify_hot(observers):
+    """Notify an event every observer is registered to."""
+    def setup():
+        observable = Observable()
+        _populate(observable, observers, 1)
+        observable.notify(None, 'event0')  # builds the dispatch entry
+        return observable
+
+    def run(observable):
+        notify = observable.notify
+        for _ in range(NOTIFICATIONS):
+            notify(None, 'event0')
+        return NOTIFICATIONS
+    return setup, run
+
+
+def notify_cold(observers, events):
+    """Notify events nobody is registered to, in a populated Observable."""
+    def setup():
+        observable = Observable()
+        _populate(observable, observers, events)
+        return observable
+
+    def run(observable):
+        notify = observable.notify
+        for _ in range(NOTIFICATIONS):
+            notify(None, 'cold')
+        return NOTIFICATIONS
+    return setup, run
+
+
+def notify_many(observers, batch):
+    """Notify batches of items of an event every observer is registered to."""
+    def setup():
+        observable = Observable()
+        _populate(observable, observers, 1)
+        return observable, [(value, 'event0') for value in range(batch)]
+
+    def run(state):
+        observable, items = state
+        repetitions = max(1, NOTIFICATIONS // len(items))
+        for _ in range(repetitions):
+            observable.notify_many(items)
+        return repetitions * len(items)
+    return setup, run
+
+
+def _memory_per_instance(cls):
+    """Return a function measuring the bytes allocated per instance."""
+    def measure():
+        count = 10 ** 4
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            observables = [cls() for _ in range(count)]
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del observables
+        return (after - before) // count
+    return measure
+
+
+def memory_empty():
+    """Bytes allocated per Observable without observers."""
+    return _memory_per_instance(Observable)
+
+
+def memory_empty_compact():
+    """Bytes allocated per CompactObservable without observers."""
+    return _memory_per_instance(CompactObservable)
+
+
+def memory_populated(observers, events):
+    """Bytes allocated by the registry of a populated Observable."""
+    def measure():
+        pairs = [(NullObserver(), 'event{}'.format(index % events))
+                 for index in range(observers)]
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            observable = Observable()
+            for observer, event in pairs:
+                observable.register(observer, event)
+            observable.notify(None, 'event0')
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del observable
+        return after - before
+    return measure
+
+
+def _grid(observers, events):
+    """Return the cases of every combination of sizes."""
+    return [{'observers': count, 'events': names}
+            for count in observers for names in events]
+
+
+suite = Suite('observer')
+suite.timing(register, _grid((1, 10 ** 3, 10 ** 5), (1, 10 ** 2, 10 ** 4)),
+             _grid((1, 10 ** 3), (1, 10 ** 2)))
+suite.timing(unregister_event,
+             _grid((1, 10 ** 3, 10 ** 5), (1, 10 ** 2, 10 ** 4)),
+             _grid((1, 10 ** 3), (1, 10 ** 2)))
+suite.timing(unregister_all,
+             [{'observers': count, 'events': names, 'subscriptions': 4}
+              for count in (10 ** 3, 10 ** 5) for names in (10, 10 ** 4)],
+             [{'observers': 10 ** 3, 'events': 10, 'subscriptions': 4}])
+suite.timing(reset, _grid((1, 10 ** 3, 10 ** 5), (1, 10 ** 4)),
+             _grid((1, 10 ** 3), (1,)))
+suite.timing(notify_hot,
+             [{'observers': count} for count in (1, 10, 10 ** 2, 10 ** 3)],
+             [{'observers': count} for count in (1, 10 ** 2)])
+suite.timing(notify_cold, _grid((1, 10 ** 3, 10 ** 5), (1, 10 ** 4)),
+             _grid((1, 10 ** 3), (1,)))
+suite.timing(notify_many,
+             [{'observers': count, 'batch': batch}
+              for count in (1, 10, 10 ** 2) for batch in (1, 100)],
+             [{'observers': 10, 'batch': 100}])
+suite.memory(memory_empty, [{}], [{}])
+suite.memory(memory_empty_compact, [{}], [{}])
+suite.memory(memory_populated, _grid((10 ** 3, 10 ** 5), (1, 10 ** 4)),
+             _grid((10 ** 3,), (1,)))
+
+
+if __name__ == '__main__':
+    sys.exit(main(suite, BASELINE))
@@ -0,0 +1,180 @@
+"""
+Implementation of the Observer Pattern for :mod:`asyncio` applications.
+
+The :class:`AsyncObservable` works like the
+:class:`~matils.patterns.observer.Observable`, but its :meth:`notify` is a
+coroutine that runs the update of every interested observer concurrently in
+the running event loop. Observers doing network or disk I/O, implemented
+extending :class:`AsyncObserver`, do not block the producer nor each other.
+Synchronous :class:`~matils.patterns.observer.Observer` subclasses can be
+registered as well, their update is called directly in the event loop.
+
+.. code-block:: python
+
+    import asyncio
+    from matils.patterns.async_observer import AsyncObservable, AsyncObserver
+
+    class SensorDataUploader(AsyncObserver):
+        async def update(self, sensor_data, event_name):
+            await upload(event_name, sensor_data)
+
+    async def main():
+        sensors_reader = AsyncObservable(concurrency=10, timeout=5)
+        sensors_reader.register(SensorDataUploader(), 'temperature')
+        await sensors_reader.notify({'value': 22.5}, 'temperature')
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import inspect
+from abc import abstractmethod
+
+from matils.patterns.observer import (Observable, Observer, _evaluate,
+                                      _evaluate_batch)
+
+
+class AsyncObserver(Observer):
+    """
+    Observer whose update is a coroutine.
+
+    Intended to be registered in an :class:`AsyncObservable`, that awaits the
+    updates of all its observers concurrently.
+    """
+
+    @abstractmethod
+    async def update(self, data, event="all"):
+        """To be awaited by an AsyncObservable if object is registered."""
+        pass
+
+    async def update_batch(self, items):
+        """
+        To be awaited by an AsyncObservable notifying many items at once.
+
+        The default implementation awaits :meth:`update` for each item, in
+        order.
+        """
+        for data, event in items:
+            await self.update(data, event)
+
+
+class AsyncObservable(Observable):
+    """
+    Observable notifying its observers concurrently in an event loop.
+
+    Registration works exactly as in
+    :class:`~matils.patterns.observer.Observable`. When notified, the updates
+    of all the interested observers are started together and
+    :meth:`notify` returns after all of them have finished.
+
+    If one or more updates raise an exception, the remaining updates still run
+    to completion and the first exception, in notification order, is raised
+    by :meth:`notify` afterwards.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param concurrency: maximum number of updates running at the same time
+                        for a single notification, None for no limit.
+    :param timeout: seconds each coroutine update has to finish, None to wait
+                    forever. An update taking longer is cancelled and counts
+                    as failed with :class:`asyncio.TimeoutError`.
+    """
+
+    def __init__(self, unique=False, concurrency=None, timeout=None):
+        """Initialize the Observers list and the dispatch limits."""
+        super().__init__(unique)
+        if concurrency is not None and concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._concurrency = concurrency
+        self._timeout = timeout
+
+    async def notify(self, data, event):
+        """
+        Notify observers registered to be update about the event.
+
+        Coroutine that awaits the updates of all the interested observers,
+        see :meth:`matils.patterns.observer.Observable.notify`.
+        """
+        recipients = self._recipients(event)
+        if recipients:
+            data = _evaluate(data)
+            await self._gather([(observer.update, (data, event))
+                                for observer in recipients])
+
+    async def notify_many(self, items):
+        """
+        Notify observers about many ``(data, event)`` items at once.
+
+        Coroutine version of
+        :meth:`matils.patterns.observer.Observable.notify_many`, the batches
+        of the different observers are delivered concurrently.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        calls = list()
+        for event, batch in batches.items():
+            recipients = self._recipients(event)
+            if recipients:
+                batch = _evaluate_batch(batch)
+            for observer in recipients:
+                update_batch = getattr(observer, 'update_batch', None)
+                if update_batch is None:
+                    calls.append((self._update_each, (observer, batch)))
+                else:
+                    calls.append((update_batch, (batch,)))
+        if calls:
+            await self._gather(calls)
+
+    async def poll(self):
+        """
+        Deliver the notifications held back by the registration policies.
+
+        Coroutine version of :meth:`matils.patterns.observer.Observable.poll`,
+        the registrations are polled concurrently.
+        """
+        calls = [(gate.poll, ()) for gate in tuple(self._gates.values())
+                 if gate.policy is not None]
+        if calls:
+            await self._gather(calls)
+
+    async def _gather(self, calls):
+        """Run the calls concurrently, raising the first failure if any."""
+        if self._concurrency is None:
+            semaphore = None
+        else:
+            semaphore = asyncio.Semaphore(self._concurrency)
+
+        results = await asyncio.gather(
+            *[self._call(function, args, semaphore)
+              for function, args in calls],
+            return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _call(self, function, args, semaphore):
+        """Call an update, awaiting it if it is a coroutine."""
+        if semaphore is None:
+            return await self._await(function(*args))
+        async with semaphore:
+            return await self._await(function(*args))
+
+    async def _await(self, result):
+        """Await the result of an update, within the timeout."""
+        if not inspect.isawaitable(result):
+            return result
+        if self._timeout is None:
+            return await result
+        return await asyncio.wait_for(result, self._timeout)
+
+    @staticmethod
+    async def _update_each(observer, batch):
+        """Deliver a batch item by item, to observers without update_batch."""
+        for data, event in batch:
+            result = observer.update(data, event)
+            if inspect.isawaitable(result):
+                await result
@@ -0,0 +1,127 @@
+"""
+Observable attributes, notifying their changes on assignment.
+
+An :class:`ObservableAttribute` declared on an
+:class:`~matils.patterns.observer.Observable` subclass notifies the new value
+whenever it is assigned a different one, the event being the name of the
+attribute:
+
+.. code-block:: python
+
+    from matils.patterns.attributes import ObservableAttribute, tolerance
+    from matils.patterns.observer import Observable
+
+    class Thermostat(Observable):
+        temperature = ObservableAttribute(equal=tolerance(abs_tol=0.1))
+        mode = ObservableAttribute(default='off')
+
+    thermostat = Thermostat()
+    thermostat.register(display, 'temperature')
+    thermostat.temperature = 21.5  # display.update(21.5, 'temperature')
+    thermostat.temperature = 21.52  # within 0.1, not notified
+    thermostat.mode = 'heat'  # nobody observes 'mode', nothing else done
+
+The new values are compared with the last notified one, so that small
+changes can not add up unnoticed. Assigning an attribute nobody observes only
+stores the value, the old one is not even read, see
+:meth:`~matils.patterns.observer.Observable.has_listeners`, and the stored
+value is the one compared once observed.
+
+The values are kept in the instance dictionary, under the attribute name,
+and the last notified value, while the stored one was not notified, under
+``'<name>:notified'``.
+
+The notifications go through
+:meth:`~matils.patterns.observer.Observable.notify`, they can be coalesced
+with :meth:`~matils.patterns.observer.Observable.deferred`. Observables
+notifying asynchronously are not supported.
+"""
+
+import math
+import operator
+
+_UNSET = object()
+"""Value of an attribute never assigned and without default."""
+
+
+class ObservableAttribute:
+    """
+    Descriptor notifying the changes of an attribute of an Observable.
+
+    :param default: value of the attribute until it is first assigned, if not
+                    given reading it before raises AttributeError.
+    :param equal: function telling whether the last notified and the new
+                  values are the same, in which case nothing is notified, by
+                  default ``==``.
+                  The first assignment of an attribute without default is
+                  always notified.
+    :param event: the event notified, by default the attribute name.
+    """
+
+    __slots__ = ('name', 'event', 'default', 'equal', '_notified')
+
+    def __init__(self, default=_UNSET, equal=operator.eq, event=None):
+        """Keep the options, the name is given when the class is created."""
+        self.name = None
+        self._notified = None
+        self.event = event
+        self.default = default
+        self.equal = equal
+
+    def __set_name__(self, owner, name):
+        """Take the attribute name, and the event if none was given."""
+        self.name = name
+        self._notified = '{}:notified'.format(name)
+        if self.event is None:
+            self.event = name
+
+    def __get__(self, instance, owner=None):
+        """Return the value of the attribute, the descriptor on the class."""
+        if instance is None:
+            return self
+        value = instance.__dict__.get(self.name, self.default)
+        if value is _UNSET:
+            raise AttributeError("'{}' object has no attribute '{}'".format(
+                type(instance).__name__, self.name))
+        return value
+
+    def __set__(self, instance, value):
+        """Store the value, notifying it if observed and changed."""
+        values = instance.__dict__
+        if not instance.has_listeners(self.event):
+            values[self.name] = value
+            values.pop(self._notified, None)
+            return
+        old = values.get(self._notified, _UNSET)
+        if old is _UNSET:
+            old = values.get(self.name, self.default)
+        values[self.name] = value
+        if old is _UNSET or not self.equal(old, value):
+            values.pop(self._notified, None)  # the stored value, again
+            instance.notify(value, self.event)
+        else:
+            values[self._notified] = old
+
+    def __delete__(self, instance):
+        """Forget the value, the attribute goes back to its default."""
+        values = instance.__dict__
+        try:
+            del values[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        values.pop(self._notified, None)
+
+
+def tolerance(abs_tol=0.0, rel_tol=0.0):
+    """
+    Return an ``equal`` function for numbers, comparing with a tolerance.
+
+    See :func:`math.isclose` for the meaning of the tolerances, values that
+    are not numbers, like a None default, are compared with ``==``.
+    """
+    def equal(old, new):
+        try:
+            return math.isclose(old, new, rel_tol=rel_tol, abs_tol=abs_tol)
+        except TypeError:
+            return old == new
+    return equal
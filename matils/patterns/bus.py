@@ -0,0 +1,344 @@
+"""
+Implementation of the Observer Pattern with a registry shared by many sources.
+
+The :class:`EventBus` is a single registry for any number of notification
+sources: observers subscribe to an event of one source, or of every source,
+and the sources publish through the bus instead of keeping registries of
+their own:
+
+.. code-block:: python
+
+    from matils.patterns.bus import BusObservable, EventBus
+
+    sensors_bus = EventBus()
+
+    class Sensor(BusObservable):
+        __slots__ = ('name',)
+        bus = sensors_bus
+        ...
+            self.notify(reading, 'temperature')
+
+    sensors = [Sensor(name) for name in names]  # thousands of them
+    # one subscription for the temperatures of every sensor
+    sensors_bus.subscribe(SensorDataAnalizer(), 'temperature')
+    # and one for every event of the kitchen sensor
+    sensors[0].register(KitchenDisplay())
+
+The subscriptions are indexed by ``(source, event)`` keys, None standing for
+any source and 'all' for any event. A publication is routed in constant time,
+however many sources and subscriptions the bus holds: the observers of each
+route are cached in a dispatch table, like in
+:class:`~matils.patterns.observer.Observable`, and the sources nobody
+subscribed to specifically share the routes of the wildcard subscriptions.
+
+Observers are updated as ``update(data, event)``, those subscribed to many
+sources find the source of the notification being delivered in
+:attr:`EventBus.source`.
+
+The sources are kept as keys of the index while they have subscriptions, they
+must be hashable and are not garbage collected before their observers are
+unsubscribed.
+"""
+
+from matils.patterns.observer import (_BROADCAST, Observable, _Deferral,
+                                      _dereference, _evaluate,
+                                      _evaluate_batch, _weak_reference)
+
+
+class EventBus(Observable):
+    """
+    Registry routing the notifications of many sources to their observers.
+
+    The :class:`~matils.patterns.observer.Observable` API is available too,
+    :meth:`register`, :meth:`unregister` and :meth:`notify` work on
+    subscriptions to any source and publications without source. The
+    delivery policies, filters, weak references and instrumentation work as
+    in the Observable. :meth:`deferred` holds back the publications of every
+    source, coalesced per source and event.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param weak: see :class:`~matils.patterns.observer.Observable`.
+    """
+
+    def __init__(self, unique=False, weak=False):
+        """Initialize the index of the subscriptions."""
+        super().__init__(unique, weak)
+        self._sources = dict()
+        """
+        Maps each source with subscriptions of its own to an insertion
+        ordered dictionary (used as a set) of their events.
+        """
+        self.source = None
+        """The source of the notification being delivered, if any."""
+
+    def subscribe(self, observer, event='all', source=None, policy=None,
+                  where=None):
+        """
+        Subscribe an observer to an event of a source.
+
+        See :meth:`matils.patterns.observer.Observable.register` for the
+        ``policy`` and ``where`` parameters.
+
+        :param event: the event to observe, 'all' for every event.
+        :param source: the source to observe, None for every source.
+        """
+        super().register(observer, (source, event), policy, where)
+        if source is not None:
+            try:
+                self._sources[source][event] = None
+            except KeyError:
+                self._sources[source] = {event: None}
+
+    def unsubscribe(self, observer, event='all', source=None):
+        """
+        Unsubscribe an observer from the events of the sources.
+
+        Every subscription of the observer matching the arguments is removed,
+        'all' matching any event and None any source.
+
+        :return: True if a subscription was removed, False otherwise.
+        """
+        key = observer
+        if self._weak:
+            key = self._references.get(_weak_reference(observer))
+        removed = [subscription
+                   for subscription in self._subscriptions.get(key, ())
+                   if (source is None or subscription[0] == source) and
+                   (event == 'all' or subscription[1] == event)]
+        for subscription in removed:
+            super().unregister(observer, subscription)
+            self._prune(subscription)
+        return bool(removed)
+
+    def register(self, observer, event='all', policy=None, where=None):
+        """Subscribe an observer to an event of every source."""
+        self.subscribe(observer, event, None, policy, where)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unsubscribe an observer from an event of every source.
+
+        Only the subscription to the event of every source is removed, the
+        subscriptions to that event of specific sources stay. Without event,
+        every subscription of the observer is removed, like
+        :meth:`unsubscribe` does.
+        """
+        if event == 'all':
+            return self.unsubscribe(observer)
+        key = (None, event)
+        removed = super().unregister(observer, key)
+        if removed:
+            self._prune(key)
+        return removed
+
+    def reset(self):
+        """Remove all the subscriptions."""
+        super().reset()
+        self._sources.clear()
+
+    def publish(self, source, data, event):
+        """
+        Notify the observers of the event of the source.
+
+        The observers subscribed to every source are updated first, in
+        subscription order, then those of the source.
+        """
+        recipients = self._recipients(self._route(source, event))
+        if not recipients:
+            return
+        data = _evaluate(data)
+        previous, self.source = self.source, source
+        try:
+            for observer in recipients:
+                observer.update(data, event)
+        finally:
+            self.source = previous
+
+    def publish_many(self, source, items):
+        """
+        Notify the observers about many ``(data, event)`` items of a source.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        previous, self.source = self.source, source
+        try:
+            for event, batch in batches.items():
+                recipients = self._recipients(self._route(source, event))
+                if recipients:
+                    batch = _evaluate_batch(batch)
+                for observer in recipients:
+                    update_batch = getattr(observer, 'update_batch', None)
+                    if update_batch is None:
+                        for data, event in batch:
+                            observer.update(data, event)
+                    else:
+                        update_batch(batch)
+        finally:
+            self.source = previous
+
+    def notify(self, data, event):
+        """Publish a notification without source."""
+        self.publish(None, data, event)
+
+    def notify_many(self, items):
+        """Publish many ``(data, event)`` items without source."""
+        self.publish_many(None, items)
+
+    def has_listeners(self, event, source=None):
+        """Tell whether publishing the event of the source reaches anyone."""
+        return bool(self._recipients(self._route(source, event)))
+
+    def _route(self, source, event):
+        """
+        Return the dispatch table key of an event of a source.
+
+        Sources without subscriptions of their own, and their events without
+        subscriptions, share the routes of the wildcard subscriptions.
+        """
+        events = self._sources.get(source)
+        if events is None:
+            if (None, event) in self._observers:
+                return (None, event)
+            return _BROADCAST
+        if event in events or (None, event) in self._observers:
+            return (source, event)
+        return (source, 'all')
+
+    def _recipients(self, route):
+        """Return the observers of a route, see :meth:`_route`."""
+        # Routes are keys of their own, even without observers of their own.
+        recipients = self._dispatch_table.get(route)
+        if recipients is None:
+            recipients = self._build_dispatch_entry(route)
+        if self._weak:
+            return tuple(_dereference(recipients))
+        return recipients
+
+    def _build_dispatch_entry(self, route):
+        """Compute and cache the dispatch table entry of a route."""
+        if route is _BROADCAST:
+            keys = ((None, 'all'),)
+        else:
+            source, event = route
+            keys = dict.fromkeys(((None, 'all'), (None, event),
+                                  (source, 'all'), (source, event)))
+        entries = list()
+        for key in keys:
+            if key in self._observers:
+                entries.extend(self._entries(key))
+        recipients = self._dispatch_table[route] = self._freeze(entries)
+        return recipients
+
+    def _start_deferral(self):
+        """Start holding the publications back, return the deferral."""
+        deferral = self._deferral = _Deferral()
+        # notify and notify_many publish, they are deferred too.
+        self.publish = self._defer
+        self.publish_many = self._defer_many
+        return deferral
+
+    def _stop_deferral(self):
+        """Stop holding the publications back."""
+        del self._deferral, self.publish, self.publish_many
+
+    def _defer(self, source, data, event):
+        """Merge a publication into the pending one of its source and event."""
+        self._deferral.notify(data, (source, event))
+
+    def _defer_many(self, source, items):
+        """Merge many ``(data, event)`` publications of a source."""
+        notify = self._deferral.notify
+        for data, event in items:
+            notify(data, (source, event))
+
+    def _notify_pending(self, pending):
+        """Publish the ``{(source, event): data}`` publications held back."""
+        for (source, event), data in pending.items():
+            self.publish(source, data, event)
+
+    def _prune(self, key):
+        """Drop an index key left without observers."""
+        if self._observers.get(key, True):
+            return
+        del self._observers[key]
+        source, event = key
+        if source is not None:
+            events = self._sources[source]
+            del events[event]
+            if not events:
+                del self._sources[source]
+                self._drop_routes(source)
+
+    def _forget(self, reference):
+        """Remove the subscriptions of a garbage collected observer."""
+        keys = tuple(self._subscriptions.get(reference, ()))
+        super()._forget(reference)
+        for key in keys:
+            self._prune(key)
+
+    def _registry_changed(self, key):
+        """
+        Invalidate the routes depending on a subscription key.
+
+        The keys of every source may change the routes of any source, they
+        invalidate the whole dispatch table. The key of a source invalidates
+        the route of its event only, or every route of the source for 'all'.
+        """
+        self._observers_view_stale = True
+        if not isinstance(key, tuple) or key[0] is None:
+            self._dispatch_table.clear()
+        elif key[1] == 'all':
+            self._drop_routes(key[0])
+        else:
+            self._dispatch_table.pop(key, None)
+
+    def _drop_routes(self, source):
+        """Remove the routes of a source from the dispatch table."""
+        table = self._dispatch_table
+        for route in [route for route in table
+                      if route is not _BROADCAST and route[0] == source]:
+            del table[route]
+
+
+class BusObservable:
+    """
+    Source publishing its notifications through an :class:`EventBus`.
+
+    Offers the registration and notification API of the
+    :class:`~matils.patterns.observer.Observable`, working on the
+    subscriptions to this source in the :attr:`bus`. Instances hold no
+    registry at all, subclasses declaring ``__slots__`` have no instance
+    dictionary either.
+    """
+
+    __slots__ = ()
+
+    bus = None
+    """The EventBus of the instances, set it in the subclasses."""
+
+    def register(self, observer, event='all', policy=None, where=None):
+        """Subscribe an observer to an event of this source."""
+        self.bus.subscribe(observer, event, self, policy, where)
+
+    def unregister(self, observer, event="all"):
+        """Unsubscribe an observer from an event of this source."""
+        return self.bus.unsubscribe(observer, event, self)
+
+    def notify(self, data, event):
+        """Publish a notification of this source."""
+        self.bus.publish(self, data, event)
+
+    def notify_many(self, items):
+        """Publish many ``(data, event)`` items of this source."""
+        self.bus.publish_many(self, items)
+
+    def has_listeners(self, event):
+        """Tell whether notifying the event reaches any observer."""
+        return self.bus.has_listeners(event, self)
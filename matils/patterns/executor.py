@@ -0,0 +1,449 @@
+"""
+Implementation of the Observer Pattern with dispatch to an executor.
+
+The :class:`ExecutorObservable` works like the
+:class:`~matils.patterns.observer.Observable`, but instead of calling the
+update of each observer inline, :meth:`ExecutorObservable.notify` submits the
+calls to a :class:`concurrent.futures.Executor` and returns immediately. A
+slow observer, doing I/O or any work that releases the GIL, no longer delays
+the producer nor the other observers.
+
+Each observer has its own serial lane: its updates never run at the same time
+and they are always delivered in the order the notifications were made, while
+different observers are updated in parallel.
+
+The :class:`QueuedObservable` bounds the lanes, choosing what happens when a
+slow observer falls behind: the producer waits, the oldest or the newest
+notification is dropped, or notifications are conflated, keeping only the
+latest data of each event.
+
+.. code-block:: python
+
+    from matils.patterns.executor import ExecutorObservable
+
+    class SensorsReader(ExecutorObservable):
+        ...
+
+    with SensorsReader(max_workers=4) as sensors_reader:
+        sensors_reader.register(SensorDataAnalizer(), 'temperature')
+        futures = sensors_reader.notify({'value': 22.5}, 'temperature')
+        sensors_reader.flush()  # waits for every pending update
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from matils.patterns.observer import Observable, _evaluate, _evaluate_batch
+
+_POLL = object()
+"""Lane key of the calls polling a registration policy."""
+
+
+class _Lane:
+    """Pending updates of a single observer, delivered one at a time."""
+
+    __slots__ = ('pending', 'scheduled')
+
+    def __init__(self):
+        self.pending = deque()
+        self.scheduled = False
+
+    def __len__(self):
+        return len(self.pending)
+
+    def append(self, key, call):
+        """Queue a call, return the call it replaced, if any."""
+        self.pending.append(call)
+
+    def popleft(self):
+        """Remove and return the oldest call."""
+        return self.pending.popleft()
+
+
+class _ConflatingLane(_Lane):
+    """Lane keeping only the latest call of each event."""
+
+    __slots__ = ()
+
+    def __init__(self):
+        self.pending = dict()
+        self.scheduled = False
+
+    def __contains__(self, key):
+        return key in self.pending
+
+    def append(self, key, call):
+        """Queue a call, return the call of the same event it replaced."""
+        replaced = self.pending.get(key)
+        self.pending[key] = call
+        return replaced
+
+    def popleft(self):
+        """Remove and return the oldest call."""
+        return self.pending.pop(next(iter(self.pending)))
+
+
+class ExecutorObservable(Observable):
+    """
+    Observable delivering its notifications through an executor.
+
+    :meth:`notify` returns a set with one :class:`concurrent.futures.Future`
+    per delivered update, holding the value returned or the exception raised
+    by the update. Exceptions raised by observers are only available through
+    these futures.
+
+    Use :meth:`flush` to wait until every pending update is delivered and
+    :meth:`shutdown` (or the Observable as a context manager) to stop
+    accepting notifications and release the executor.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param executor: the executor running the updates, by default a
+                     :class:`~concurrent.futures.ThreadPoolExecutor` owned by
+                     the Observable is created.
+    :param max_workers: number of threads of the default executor.
+    :param quota: maximum number of updates delivered to an observer before
+                  its lane goes back to the end of the executor queue, so that
+                  busy observers do not starve the others.
+    """
+
+    def __init__(self, unique=False, executor=None, max_workers=None,
+                 quota=32):
+        """Initialize the Observers list and the lanes."""
+        super().__init__(unique)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers,
+                                          thread_name_prefix='matils')
+            self._owns_executor = True
+        else:
+            self._owns_executor = False
+        self._executor = executor
+        self._quota = quota
+        self._lanes = dict()
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def __enter__(self):
+        """Use the Observable as a context manager that shuts it down."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Shut down the Observable, waiting for the pending updates."""
+        self.shutdown()
+
+    @property
+    def pending(self):
+        """Number of updates submitted and not yet finished."""
+        return self._pending
+
+    def notify(self, data, event):
+        """
+        Submit the updates of the observers registered to the event.
+
+        See :meth:`matils.patterns.observer.Observable.notify`.
+
+        :return: set of futures, one per update.
+        :raises RuntimeError: if the Observable was shut down.
+        """
+        recipients = self._recipients(event)
+        if recipients:
+            data = _evaluate(data)
+        with self._lock:
+            self._check_open()
+            return {self._submit(observer, observer.update, (data, event),
+                                 event)
+                    for observer in recipients}
+
+    def notify_many(self, items):
+        """
+        Submit the updates of many ``(data, event)`` items at once.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`.
+
+        :return: set of futures, one per delivered batch.
+        :raises RuntimeError: if the Observable was shut down.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        futures = set()
+        with self._lock:
+            self._check_open()
+            for event, batch in batches.items():
+                recipients = self._recipients(event)
+                if recipients:
+                    batch = _evaluate_batch(batch)
+                for observer in recipients:
+                    update_batch = getattr(observer, 'update_batch', None)
+                    if update_batch is None:
+                        futures.add(self._submit(observer, _update_each,
+                                                 (observer, batch), event))
+                    else:
+                        futures.add(self._submit(observer, update_batch,
+                                                 (batch,), event))
+        return futures
+
+    def poll(self):
+        """
+        Submit the delivery of the notifications held back by the policies.
+
+        See :meth:`matils.patterns.observer.Observable.poll`, each policy is
+        polled in the lane of its observer, after the updates already queued,
+        like a notification.
+
+        :return: set of futures, one per polled registration.
+        :raises RuntimeError: if the Observable was shut down.
+        """
+        with self._lock:
+            self._check_open()
+            return {self._submit(gate, gate.poll, (), _POLL)
+                    for gate in tuple(self._gates.values())
+                    if gate.policy is not None}
+
+    def flush(self, timeout=None):
+        """
+        Wait until every submitted update has finished.
+
+        Must not be called from inside an update of this Observable.
+
+        :param timeout: maximum seconds to wait, None to wait forever.
+        :return: True if every update finished, False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting notifications and release the executor.
+
+        Pending updates are still delivered. If the executor was given to the
+        Observable it is not shut down, only the pending updates are waited
+        for.
+
+        :param wait: if True, return only after the pending updates finished.
+        """
+        with self._lock:
+            self._closed = True
+        if wait:
+            self.flush()
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+    def _check_open(self):
+        """Raise RuntimeError if the Observable was shut down."""
+        if self._closed:
+            raise RuntimeError('cannot notify after shutdown')
+
+    def _submit(self, observer, function, args, event):
+        """Queue a call in the observer lane, must hold the lock."""
+        future = Future()
+        lane = self._enqueue(observer, (function, args, future), event)
+        if lane is not None and not lane.scheduled:
+            lane.scheduled = True
+            self._executor.submit(self._drain, observer, lane)
+        return future
+
+    def _enqueue(self, observer, call, event):
+        """
+        Append a call to the observer lane, must hold the lock.
+
+        :return: the lane holding the call, None if the call was discarded.
+        """
+        lane = self._lanes.get(observer)
+        if lane is None:
+            lane = self._lanes[observer] = _Lane()
+        lane.append(event, call)
+        self._pending += 1
+        return lane
+
+    def _dequeue(self, observer, lane):
+        """
+        Pop the next call of a lane, must hold the lock.
+
+        :return: the call, None if the lane is empty and was released.
+        """
+        if not lane:
+            lane.scheduled = False
+            del self._lanes[observer]
+            return None
+        return lane.popleft()
+
+    def _finished(self, count=1):
+        """Account for finished or discarded calls, must hold the lock."""
+        self._pending -= count
+        if not self._pending:
+            self._idle.notify_all()
+
+    def _drain(self, observer, lane):
+        """Deliver the pending calls of a lane, runs in the executor."""
+        delivered = 0
+        while True:
+            if delivered == self._quota:
+                try:
+                    # Quota used, give the other lanes a chance to run.
+                    self._executor.submit(self._drain, observer, lane)
+                    return
+                except RuntimeError:
+                    pass  # executor shut down, keep draining here...
+            delivered += 1
+
+            with self._lock:
+                call = self._dequeue(observer, lane)
+            if call is None:
+                return
+            function, args, future = call
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = function(*args)
+                except BaseException as exception:
+                    future.set_exception(exception)
+                else:
+                    future.set_result(result)
+
+            with self._lock:
+                self._finished()
+
+
+class QueuedObservable(ExecutorObservable):
+    """
+    ExecutorObservable with a bounded buffer per observer.
+
+    Each observer lane holds at most ``maxsize`` pending updates, when it is
+    full the ``overflow`` policy decides what to do with a new notification:
+
+    * :attr:`BLOCK`: :meth:`notify` waits until the observer catches up. An
+      observer must not notify this Observable from its update in this mode.
+    * :attr:`DROP_OLDEST`: the oldest pending update is dropped.
+    * :attr:`DROP_NEWEST`: the new notification is dropped for the observer.
+    * :attr:`CONFLATE`: a pending update of the same event is replaced by the
+      new one, keeping its place in the lane, ideal for readings where only
+      the latest value matters. When the lane is full of other events the
+      oldest pending update is dropped.
+
+    The futures of dropped updates are cancelled. :meth:`depth`,
+    :meth:`dropped` and :meth:`stats` tell how the buffers are doing.
+
+    :param maxsize: maximum number of pending updates per observer.
+    :param overflow: one of the overflow policies above.
+
+    See :class:`ExecutorObservable` for the other parameters.
+    """
+
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+    CONFLATE = 'conflate'
+
+    def __init__(self, unique=False, executor=None, max_workers=None,
+                 quota=32, maxsize=1024, overflow=BLOCK):
+        """Initialize the Observers list, the lanes and the counters."""
+        if overflow not in (self.BLOCK, self.DROP_OLDEST, self.DROP_NEWEST,
+                            self.CONFLATE):
+            raise ValueError('unknown overflow policy {!r}'.format(overflow))
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        super().__init__(unique, executor, max_workers, quota)
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._dropped = dict()
+        self._space = threading.Condition(self._lock)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unregister an observer, to all or specifc events.
+
+        See :meth:`matils.patterns.observer.Observable.unregister`, the
+        counters of the observer are discarded with its last event.
+        """
+        result = super().unregister(observer, event)
+        if observer not in self._subscriptions:
+            with self._lock:
+                self._dropped.pop(observer, None)
+        return result
+
+    def depth(self, observer):
+        """Return the number of pending updates of the observer."""
+        with self._lock:
+            lane = self._lanes.get(observer)
+            return 0 if lane is None else len(lane)
+
+    def dropped(self, observer):
+        """Return the number of updates dropped for the observer."""
+        with self._lock:
+            return self._dropped.get(observer, 0)
+
+    def stats(self):
+        """
+        Return the buffer statistics of every registered observer.
+
+        :return: dictionary mapping each observer to a dictionary with its
+                 current 'depth' and its 'dropped' updates count.
+        """
+        with self._lock:
+            stats = dict()
+            for observer in self._subscriptions:
+                lane = self._lanes.get(observer)
+                stats[observer] = {
+                    'depth': 0 if lane is None else len(lane),
+                    'dropped': self._dropped.get(observer, 0)
+                }
+            return stats
+
+    def _enqueue(self, observer, call, event):
+        """Append a call to the bounded lane, applying the overflow policy."""
+        lane = self._lane(observer)
+        conflating = self._overflow == self.CONFLATE
+        if len(lane) >= self._maxsize and not (conflating and event in lane):
+            if self._overflow == self.BLOCK:
+                while len(lane) >= self._maxsize:
+                    self._space.wait()
+                    # the lane is released by the drain when it empties...
+                    lane = self._lane(observer)
+            elif self._overflow == self.DROP_NEWEST:
+                self._drop(observer, call)
+                return None
+            else:
+                self._drop(observer, lane.popleft())
+                self._finished()
+
+        replaced = lane.append(event, call)
+        if replaced is None:
+            self._pending += 1
+        else:
+            self._drop(observer, replaced)
+        return lane
+
+    def _dequeue(self, observer, lane):
+        """Pop the next call of a lane, waking up blocked producers."""
+        call = super()._dequeue(observer, lane)
+        if self._overflow == self.BLOCK:
+            self._space.notify_all()
+        return call
+
+    def _lane(self, observer):
+        """Return the lane of the observer, creating it if needed."""
+        lane = self._lanes.get(observer)
+        if lane is None:
+            if self._overflow == self.CONFLATE:
+                lane = self._lanes[observer] = _ConflatingLane()
+            else:
+                lane = self._lanes[observer] = _Lane()
+        return lane
+
+    def _drop(self, observer, call):
+        """Cancel a dropped call and count it."""
+        call[2].cancel()
+        self._dropped[observer] = self._dropped.get(observer, 0) + 1
+
+
+def _update_each(observer, batch):
+    """Deliver a batch item by item, to observers without update_batch."""
+    for data, event in batch:
+        observer.update(data, event)
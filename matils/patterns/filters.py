@@ -0,0 +1,299 @@
+"""
+Content based filters for the subscriptions of an Observable.
+
+A filter given to :meth:`~matils.patterns.observer.Observable.register`, as
+its ``where`` argument, is evaluated by the Observable before dispatching, so
+observers only receive the payloads they are interested in, without paying for
+a call to reject the others.
+
+Filters are built declaratively from :class:`Field` comparisons and combined
+with ``&`` (and), ``|`` (or) and ``~`` (not):
+
+.. code-block:: python
+
+    from matils.patterns.filters import Field
+
+    sensors_reader.register(alarm, 'temperature',
+                            where=Field('value') > 35)
+    sensors_reader.register(comfort, 'temperature',
+                            where=Field('value').between(18, 24))
+    sensors_reader.register(logger, 'all',
+                            where=(Field('value') < 0) | Field('error'))
+
+Fields are read from the payload by key, for mappings, or by attribute, a
+``Field()`` without name refers to the whole payload. Payloads missing the
+field never match its comparisons.
+
+When payloads are delivered in batches, with
+:meth:`~matils.patterns.observer.Observable.notify_many`, numeric fields are
+gathered in a NumPy array and the comparisons are evaluated over the whole
+batch at once. Without NumPy, or for non numeric fields, the comparisons are
+evaluated payload by payload.
+"""
+
+import operator
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+_MISSING = object()
+
+
+def _get(data, name):
+    """Return the field of the payload, _MISSING if it does not exist."""
+    if name is None:
+        return data
+    try:
+        return data[name]
+    except (KeyError, IndexError, TypeError):
+        return getattr(data, name, _MISSING)
+
+
+class Filter:
+    """
+    Base class of the filters.
+
+    :meth:`test` evaluates a single payload and :meth:`mask` a sequence of
+    payloads. :attr:`rejected` counts the payloads that did not match, as
+    evaluated by the Observable.
+    """
+
+    def __init__(self):
+        """Initialize the counter."""
+        self.rejected = 0
+        """Number of payloads filtered out by the Observable."""
+
+    def __and__(self, other):
+        return _And(self, _to_filter(other))
+
+    def __or__(self, other):
+        return _Or(self, _to_filter(other))
+
+    def __invert__(self):
+        return _Not(self)
+
+    def test(self, data):
+        """Tell whether the payload matches the filter."""
+        raise NotImplementedError
+
+    def mask(self, datas, columns=None):
+        """
+        Evaluate the filter over a sequence of payloads.
+
+        :param columns: cache of the fields already gathered from ``datas``.
+        :return: sequence of booleans, a NumPy array when NumPy is available.
+        """
+        result = [self.test(data) for data in datas]
+        if numpy is not None:
+            return numpy.array(result, dtype=bool)
+        return result
+
+    def select(self, items):
+        """
+        Return the ``(data, event)`` items whose payload matches the filter.
+
+        The rejected items are counted in :attr:`rejected`.
+        """
+        if len(items) == 1:
+            selected = items if self.test(items[0][0]) else []
+        else:
+            mask = self.mask([data for data, _ in items], dict())
+            selected = [item for item, match in zip(items, mask) if match]
+        self.rejected += len(items) - len(selected)
+        return selected
+
+
+class Field:
+    """
+    Field of the payloads, used to build filters by comparison.
+
+    :param name: key or attribute of the payloads, None for the payload
+                 itself.
+    """
+
+    __hash__ = None
+
+    def __init__(self, name=None):
+        """Keep the name of the field."""
+        self.name = name
+
+    def __eq__(self, value):
+        return _Comparison(self.name, operator.eq, value)
+
+    def __ne__(self, value):
+        return _Comparison(self.name, operator.ne, value)
+
+    def __lt__(self, value):
+        return _Comparison(self.name, operator.lt, value)
+
+    def __le__(self, value):
+        return _Comparison(self.name, operator.le, value)
+
+    def __gt__(self, value):
+        return _Comparison(self.name, operator.gt, value)
+
+    def __ge__(self, value):
+        return _Comparison(self.name, operator.ge, value)
+
+    def __and__(self, other):
+        return _Truth(self.name) & other
+
+    def __or__(self, other):
+        return _Truth(self.name) | other
+
+    def __invert__(self):
+        return ~_Truth(self.name)
+
+    def between(self, low, high):
+        """Filter matching values from low to high, both included."""
+        return (self >= low) & (self <= high)
+
+    def isin(self, values):
+        """Filter matching values in the given collection."""
+        return _Membership(self.name, frozenset(values))
+
+
+class _Comparison(Filter):
+    """Comparison of a field with a value."""
+
+    def __init__(self, name, compare, value):
+        super().__init__()
+        self.name = name
+        self.compare = compare
+        self.value = value
+
+    def test(self, data):
+        value = _get(data, self.name)
+        if value is _MISSING:
+            return False
+        try:
+            return bool(self.compare(value, self.value))
+        except TypeError:
+            return False
+
+    def mask(self, datas, columns=None):
+        column = _column(datas, self.name, columns)
+        if column is None or not isinstance(self.value, (int, float)):
+            return super().mask(datas, columns)
+        return self.compare(column, self.value)
+
+
+class _Membership(Filter):
+    """Membership of a field in a set of values."""
+
+    def __init__(self, name, values):
+        super().__init__()
+        self.name = name
+        self.values = values
+
+    def test(self, data):
+        try:
+            return _get(data, self.name) in self.values
+        except TypeError:  # unhashable value
+            return False
+
+
+class _And(Filter):
+    """Conjunction of two filters."""
+
+    def __init__(self, left, right):
+        super().__init__()
+        self.left = left
+        self.right = right
+
+    def test(self, data):
+        return self.left.test(data) and self.right.test(data)
+
+    def mask(self, datas, columns=None):
+        left = self.left.mask(datas, columns)
+        right = self.right.mask(datas, columns)
+        if numpy is not None:
+            return numpy.logical_and(left, right)
+        return [a and b for a, b in zip(left, right)]
+
+
+class _Or(Filter):
+    """Disjunction of two filters."""
+
+    def __init__(self, left, right):
+        super().__init__()
+        self.left = left
+        self.right = right
+
+    def test(self, data):
+        return self.left.test(data) or self.right.test(data)
+
+    def mask(self, datas, columns=None):
+        left = self.left.mask(datas, columns)
+        right = self.right.mask(datas, columns)
+        if numpy is not None:
+            return numpy.logical_or(left, right)
+        return [a or b for a, b in zip(left, right)]
+
+
+class _Not(Filter):
+    """Negation of a filter."""
+
+    def __init__(self, operand):
+        super().__init__()
+        self.operand = operand
+
+    def test(self, data):
+        return not self.operand.test(data)
+
+    def mask(self, datas, columns=None):
+        mask = self.operand.mask(datas, columns)
+        if numpy is not None:
+            return numpy.logical_not(mask)
+        return [not match for match in mask]
+
+
+class _Truth(Filter):
+    """Filter matching payloads whose field is true."""
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def test(self, data):
+        value = _get(data, self.name)
+        return value is not _MISSING and bool(value)
+
+
+def _to_filter(value):
+    """Turn a bare Field into a filter on its truth value."""
+    if isinstance(value, Field):
+        return _Truth(value.name)
+    return value
+
+
+def _number(value):
+    """Return the value if it is a number, raise TypeError otherwise."""
+    if isinstance(value, (int, float)):
+        return value
+    if numpy is not None and isinstance(value, numpy.number):
+        return value
+    raise TypeError('not a number')
+
+
+def _column(datas, name, columns):
+    """
+    Gather a numeric field of the payloads in a NumPy array.
+
+    :return: the array, None without NumPy or if some payload misses the
+             field or has a non numeric value in it.
+    """
+    if numpy is None:
+        return None
+    if columns is not None and name in columns:
+        return columns[name]
+    try:
+        column = numpy.fromiter((_number(_get(data, name)) for data in datas),
+                                dtype=float, count=len(datas))
+    except TypeError:
+        column = None
+    if columns is not None:
+        columns[name] = column
+    return column
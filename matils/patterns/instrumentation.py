@@ -0,0 +1,161 @@
+"""
+Measures of the dispatch of notifications to the observers.
+
+A :class:`DispatchStats` given to
+:meth:`~matils.patterns.observer.Observable.instrument` records, for each
+observer and for each event, the number of updates, the time they took, with
+a histogram of their latencies, and the exceptions they raised. Observers
+slower than a threshold are reported to a callback as they happen.
+
+.. code-block:: python
+
+    from matils.patterns.instrumentation import DispatchStats
+
+    def report(observer, event, seconds):
+        logger.warning('%s took %.3fs to handle %s', observer, seconds, event)
+
+    stats = DispatchStats(slow_threshold=0.05, on_slow=report)
+    sensors_reader.instrument(stats)
+    ...
+    metrics.publish(stats.snapshot())
+
+Observables are not instrumented by default and then pay nothing for it. The
+measures are recorded where the updates run, in the worker threads of an
+:class:`~matils.patterns.executor.ExecutorObservable` for instance, the
+statistics can be shared by many Observables.
+"""
+
+import inspect
+import threading
+
+
+class _Counters:
+    """Measures of the updates of an observer or of an event."""
+
+    __slots__ = ('calls', 'items', 'failures', 'slow', 'total_ns', 'max_ns',
+                 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.failures = 0
+        self.slow = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * 65
+        """Count of updates taking less than ``2 ** index`` nanoseconds."""
+
+    def add(self, elapsed, items, failed, slow):
+        self.calls += 1
+        self.items += items
+        self.failures += failed
+        self.slow += slow
+        self.total_ns += elapsed
+        if elapsed > self.max_ns:
+            self.max_ns = elapsed
+        self.histogram[min(elapsed.bit_length(), 64)] += 1
+
+    def snapshot(self):
+        return {
+            'calls': self.calls,
+            'items': self.items,
+            'failures': self.failures,
+            'slow': self.slow,
+            'total_ns': self.total_ns,
+            'max_ns': self.max_ns,
+            'mean_ns': self.total_ns // self.calls if self.calls else 0,
+            'histogram': {2 ** index: count
+                          for index, count in enumerate(self.histogram)
+                          if count},
+        }
+
+
+class DispatchStats:
+    """
+    Statistics of the updates of the observers of instrumented Observables.
+
+    Observers are identified by a label, by default made of their class name
+    and their id, so that the statistics do not keep the observers alive.
+    Give a ``label`` function to aggregate them differently, for instance by
+    class.
+
+    :param slow_threshold: duration in seconds from which an update is slow,
+                           None to not look for slow updates.
+    :param on_slow: function called as ``on_slow(observer, event, seconds)``
+                    after each slow update, in the thread that ran it.
+    :param label: function returning the label of an observer.
+    """
+
+    def __init__(self, slow_threshold=None, on_slow=None, label=None):
+        """Initialize empty statistics."""
+        self.slow_threshold = slow_threshold
+        self.on_slow = on_slow
+        self._slow_ns = None
+        if slow_threshold is not None:
+            self._slow_ns = int(slow_threshold * 1e9)
+        self._label = label or _label
+        self._lock = threading.Lock()
+        self._observers = dict()
+        self._events = dict()
+
+    def record(self, observer, event, elapsed, items=1, failed=False):
+        """
+        Record an update of an observer.
+
+        Called by the instrumented Observables, from any thread.
+
+        :param elapsed: duration of the update, in nanoseconds.
+        :param items: number of notifications delivered by the update.
+        :param failed: whether the update raised an exception.
+        """
+        slow = self._slow_ns is not None and elapsed >= self._slow_ns
+        label = self._label(observer)
+        with self._lock:
+            counters = self._observers.get(label)
+            if counters is None:
+                counters = self._observers[label] = _Counters()
+            counters.add(elapsed, items, failed, slow)
+            counters = self._events.get(event)
+            if counters is None:
+                counters = self._events[event] = _Counters()
+            counters.add(elapsed, items, failed, slow)
+        if slow and self.on_slow is not None:
+            self.on_slow(observer, event, elapsed / 1e9)
+
+    def snapshot(self):
+        """
+        Return the statistics as plain dictionaries.
+
+        The result maps 'observers' to the statistics of each observer label
+        and 'events' to those of each event. The statistics are dictionaries
+        with the counts of 'calls', notified 'items', 'failures' and 'slow'
+        updates, the 'total_ns', 'max_ns' and 'mean_ns' durations and a
+        'histogram' mapping powers of two, in nanoseconds, to the number of
+        updates taking less than them (and at least the previous power).
+        """
+        with self._lock:
+            return {
+                'observers': {label: counters.snapshot()
+                              for label, counters in self._observers.items()},
+                'events': {event: counters.snapshot()
+                           for event, counters in self._events.items()},
+            }
+
+    def reset(self):
+        """Discard every statistic recorded so far."""
+        with self._lock:
+            self._observers.clear()
+            self._events.clear()
+
+
+def _label(observer):
+    """Return the default label of an observer, or of a bound method."""
+    if inspect.ismethod(observer):
+        module = observer.__module__
+        name = observer.__qualname__
+        owner = observer.__self__
+    else:
+        module = type(observer).__module__
+        name = type(observer).__qualname__
+        owner = observer
+    return '{}.{}@{:#x}'.format(module, name, id(owner))
@@ -0,0 +1,309 @@
+"""
+Implementation of the Observer Pattern with a journal of the notifications.
+
+The :class:`JournaledObservable` works like the
+:class:`~matils.patterns.observer.Observable`, but every notification is
+appended to a :class:`Journal` before being delivered. Observers registering
+late, or after a restart of their process, can be replayed the notifications
+they missed, from an offset or from a point in time, before receiving the
+live ones.
+
+.. code-block:: python
+
+    from matils.patterns.journal import Journal, JournaledObservable
+
+    class SensorsReader(JournaledObservable):
+        ...
+
+    sensors_reader = SensorsReader(Journal('/var/lib/sensors'))
+    ...
+    # replays the temperatures of the last hour, then keeps receiving them
+    sensors_reader.register(SensorDataAnalizer(), 'temperature',
+                            since_time=time.time() - 3600)
+
+The journal is a directory of segment files, each one holding the records
+from the offset in its name. The active segment is preallocated and memory
+mapped, appending a record copies it into the mapping, without a system call.
+Once full, the segment is sealed and a new one is started, whole segments can
+then be discarded. Reads map the segments too and decode the records straight
+from the mapping, only the payloads of the events being replayed are decoded.
+
+Offsets number the notifications from zero, in the order they were appended,
+and are kept across restarts.
+"""
+
+import bisect
+import collections
+import inspect
+import mmap
+import os
+import pickle
+import struct
+import time
+
+from matils.patterns.observer import Observable, _evaluate, _evaluate_batch
+
+_HEADER = struct.Struct('!IdI')
+"""Header of the records: record size, time and size of the event."""
+
+Record = collections.namedtuple('Record', 'offset time event data')
+"""A notification read from the journal."""
+
+
+def _segment_name(base):
+    """Return the file name of the segment starting at the base offset."""
+    return '{:020d}.log'.format(base)
+
+
+class Journal:
+    """
+    Append-only log of notifications, rotated in memory mapped segments.
+
+    :param directory: directory of the segment files, created if needed.
+    :param segment_size: bytes preallocated for each segment. Records bigger
+                         than that get a segment of their own.
+    :param serializer: object serializing the events and payloads, with
+                       ``dumps`` and ``loads`` functions.
+    :param clock: function returning the time recorded with each record.
+    """
+
+    def __init__(self, directory, segment_size=64 << 20, serializer=pickle,
+                 clock=time.time):
+        """Open the journal, recovering the records already appended."""
+        self.directory = directory
+        self._segment_size = segment_size
+        self._serializer = serializer
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._bases = sorted(int(name[:-4]) for name in os.listdir(directory)
+                             if name.endswith('.log'))
+        if not self._bases:
+            self._bases.append(0)
+            self._open(0, segment_size)
+        else:
+            self._open(self._bases[-1], segment_size)
+            self._recover()
+
+    def __enter__(self):
+        """Use the journal as a context manager that closes it."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the journal."""
+        self.close()
+
+    @property
+    def first_offset(self):
+        """Offset of the oldest record kept."""
+        return self._bases[0]
+
+    def append(self, event, data):
+        """
+        Append a notification to the journal.
+
+        :return: the offset of the record.
+        """
+        event = self._serializer.dumps(event)
+        data = self._serializer.dumps(data)
+        size = _HEADER.size + len(event) + len(data)
+        position = self._position
+        if position + size > len(self._map):
+            self._rotate(size)
+            position = 0
+        start = position + _HEADER.size
+        self._map[start:start + len(event)] = event
+        self._map[start + len(event):position + size] = data
+        # The header goes last, a record is complete once its size is set.
+        _HEADER.pack_into(self._map, position, size, self._clock(),
+                          len(event))
+        self._position = position + size
+        offset = self.next_offset
+        self.next_offset += 1
+        return offset
+
+    def records(self, start=0, since_time=None, event=None):
+        """
+        Iterate over the records, oldest first.
+
+        Records appended while iterating are included.
+
+        :param start: offset of the first record, records discarded from the
+                      journal are skipped.
+        :param since_time: skip the records older than this time.
+        :param event: only read the records of this event, the others are not
+                      decoded.
+        """
+        index = max(bisect.bisect_right(self._bases, start) - 1, 0)
+        if since_time is not None:
+            while index + 1 < len(self._bases) and \
+                    self._first_time(index + 1) < since_time:
+                index += 1
+        loads = self._serializer.loads
+        offset, position = self._bases[index], 0
+        while index < len(self._bases):
+            with open(self._path(self._bases[index]), 'rb') as segment_file, \
+                    mmap.mmap(segment_file.fileno(), 0,
+                              access=mmap.ACCESS_READ) as segment, \
+                    memoryview(segment) as view:
+                while offset < self._limit(index):
+                    if position + _HEADER.size > len(view):
+                        break  # the segment grew since it was mapped
+                    size, time_, event_size = _HEADER.unpack_from(view,
+                                                                  position)
+                    if offset >= start and \
+                            (since_time is None or time_ >= since_time):
+                        start_ = position + _HEADER.size
+                        record_event = loads(view[start_:start_ + event_size])
+                        if event is None or record_event == event:
+                            yield Record(offset, time_, record_event, loads(
+                                view[start_ + event_size:position + size]))
+                    offset += 1
+                    position += size
+            if offset == self._limit(index):
+                index += 1
+                position = 0
+
+    def discard(self, before):
+        """
+        Remove the sealed segments holding only records before an offset.
+
+        :return: the offset of the oldest record kept.
+        """
+        while len(self._bases) > 1 and self._bases[1] <= before:
+            os.remove(self._path(self._bases.pop(0)))
+        return self._bases[0]
+
+    def flush(self):
+        """Write the records appended so far to the disk."""
+        self._map.flush()
+
+    def close(self):
+        """Flush and close the journal, trimming the active segment."""
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._position)
+        self._file.close()
+        self._map = None
+
+    def _path(self, base):
+        """Return the path of a segment file."""
+        return os.path.join(self.directory, _segment_name(base))
+
+    def _limit(self, index):
+        """Return the offset after the last record of a segment."""
+        if index + 1 < len(self._bases):
+            return self._bases[index + 1]
+        return self.next_offset
+
+    def _first_time(self, index):
+        """Return the time of the first record of a segment."""
+        with open(self._path(self._bases[index]), 'rb') as segment_file:
+            return _HEADER.unpack(segment_file.read(_HEADER.size))[1]
+
+    def _open(self, base, size):
+        """Open, creating it if needed, the active segment."""
+        self._file = open(self._path(base), 'a+b')
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() < size:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._position = 0
+        self.next_offset = base
+
+    def _recover(self):
+        """Find the end of the records of the active segment."""
+        while self._position + _HEADER.size <= len(self._map):
+            size = _HEADER.unpack_from(self._map, self._position)[0]
+            if size == 0 or self._position + size > len(self._map):
+                break  # preallocated space, or an incomplete record...
+            self._position += size
+            self.next_offset += 1
+
+    def _rotate(self, size):
+        """Seal the active segment and start a new one."""
+        base = self.next_offset
+        self.close()
+        if self._bases[-1] != base:
+            self._bases.append(base)
+        # else the segment is empty and only grows for a big record...
+        self._open(base, max(self._segment_size, size))
+
+
+class JournaledObservable(Observable):
+    """
+    Observable keeping a journal of its notifications.
+
+    Every notification is appended to the journal before being delivered.
+    Observers can be registered with the notifications they missed replayed
+    first, from an offset or from a point in time.
+
+    :param journal: the :class:`Journal` of the notifications.
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param weak: see :class:`~matils.patterns.observer.Observable`.
+    """
+
+    def __init__(self, journal, unique=False, weak=False):
+        """Initialize the Observers list."""
+        super().__init__(unique, weak)
+        self.journal = journal
+
+    def register(self, observer, event='all', policy=None, where=None,
+                 since=None, since_time=None):
+        """
+        Register an observer, replaying the notifications it missed first.
+
+        See :meth:`matils.patterns.observer.Observable.register`.
+
+        :param since: offset of the first notification to replay.
+        :param since_time: time of the oldest notification to replay.
+        """
+        if since is not None or since_time is not None:
+            self.replay(observer, event, since or 0, since_time, where)
+        super().register(observer, event, policy, where)
+
+    def replay(self, observer, event='all', since=0, since_time=None,
+               where=None):
+        """
+        Deliver to an observer the notifications kept in the journal.
+
+        The filter of the registration applies to the notifications replayed,
+        its delivery policy does not.
+
+        :param event: event to replay, 'all' for every notification.
+        :param since: offset of the first notification to replay.
+        :param since_time: time of the oldest notification to replay.
+        :param where: a :class:`~matils.patterns.filters.Filter` the payloads
+                      must match.
+        :return: the offset following the last notification replayed.
+        """
+        update = observer if inspect.ismethod(observer) else observer.update
+        for record in self.journal.records(
+                since, since_time, None if event == 'all' else event):
+            if where is None or where.test(record.data):
+                update(record.data, record.event)
+        return self.journal.next_offset
+
+    def notify(self, data, event):
+        """
+        Append the notification to the journal and deliver it.
+
+        See :meth:`matils.patterns.observer.Observable.notify`. A
+        :class:`~matils.patterns.observer.Lazy` payload is always evaluated,
+        to be kept in the journal.
+        """
+        data = _evaluate(data)
+        self.journal.append(event, data)
+        super().notify(data, event)
+
+    def notify_many(self, items):
+        """
+        Append the notifications to the journal and deliver them.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`.
+        """
+        items = _evaluate_batch(list(items))
+        for data, event in items:
+            self.journal.append(event, data)
+        super().notify_many(items)
@@ -66,8 +66,18 @@ After you implement your observer you can register it in Observables, let's
 take the following :class:`Observable`
 """
 
+import contextlib
+import inspect
+import time
+import weakref
 from abc import ABC, abstractmethod
 
+_BROADCAST = object()
+"""Dispatch table key for events without specific observers."""
+
+_UNSET = object()
+"""Value of a Lazy payload not computed yet."""
+
 
 class Observer(ABC):
     """
@@ -92,6 +102,52 @@ class Observer(ABC):
         """To be called by an Observable if object is registered."""
         pass
 
+    def update_batch(self, items):
+        """
+        To be called by an Observable notifying many items at once.
+
+        The items are given as a list of ``(data, event)`` tuples, all of them
+        with the same event, in the order they were notified. The default
+        implementation calls :meth:`update` for each item, override it to
+        process the whole batch in one go.
+        """
+        for data, event in items:
+            self.update(data, event)
+
+
+class Lazy:
+    """
+    Payload computed only if there is an observer to notify.
+
+    Producers wrap expensive payloads in a Lazy to skip computing them when
+    nobody observes the event:
+
+    .. code-block:: python
+
+        self.notify(Lazy(self.get_temperature), 'temperature')
+
+    The function is called at most once, when the first observer is about to
+    be notified, and its result is given to every observer in place of the
+    Lazy.
+
+    :param function: function without arguments returning the payload.
+    """
+
+    __slots__ = ('_function', '_value')
+
+    def __init__(self, function):
+        """Keep the function, it is called later, if ever."""
+        self._function = function
+        self._value = _UNSET
+
+    @property
+    def value(self):
+        """The payload, computed on first access."""
+        if self._value is _UNSET:
+            self._value = self._function()
+            self._function = None
+        return self._value
+
 
 class Observable:
     """
@@ -109,9 +165,46 @@ class Observable:
     If an observer registers to observer a message unknown by the Observable no
     error will be generated, the observer will simply not receive
     notifications.
+
+    Internally the registry is kept in insertion ordered dictionaries, one per
+    event, plus a reverse index from each observer to the events it is
+    registered to. This makes :meth:`register` and :meth:`unregister` cost
+    constant time (or proportional to the subscriptions of the observer when
+    unregistering from all events), no matter how many observers or events the
+    Observable holds. Observers, therefore, must be hashable.
+
+    The observers to be notified about each event are kept in a dispatch table
+    of tuples, computed when the event is first notified and discarded only
+    when the registry changes. Observers can register or unregister while a
+    notification is being delivered, the change takes effect on the next
+    :meth:`notify`.
+
+    By default the Observable keeps strong references to its observers, they
+    live as long as they are registered. Created with ``weak=True`` it keeps
+    only weak references instead, an observer that is garbage collected is
+    removed from every event automatically. In this mode bound methods can be
+    registered as observers too, they are called as ``method(data, event)``
+    and are removed when the object they are bound to is collected.
+
+    Each registration can be given a delivery policy, from
+    :mod:`matils.patterns.policies`, to throttle, debounce or sample the
+    notifications that reach the observer through that registration, and a
+    filter, from :mod:`matils.patterns.filters`, on the content of the
+    payloads.
+
+    The time spent in each observer can be measured, see :meth:`instrument`.
+
+    Producers can skip the work of notifying events nobody observes, by
+    checking :meth:`has_listeners` or by notifying :class:`Lazy` payloads.
+    During bulk changes they can hold the notifications back and deliver
+    them coalesced, one per event, see :meth:`deferred`.
+
+    :param unique: if True an observer registered both to 'all' and to a
+                   specific event is notified only once about that event.
+    :param weak: if True keep only weak references to the observers.
     """
 
-    def __init__(self):
+    def __init__(self, unique=False, weak=False):
         """Initialize the Observers list."""
         self._observers = dict()
         """
@@ -119,24 +212,86 @@ class Observable:
         assciated callbacks. Observers registered without specifying a
         event name are associated to the key "all" in the dictionary.
 
-        As an example, in a given point in time the self.observers property
+        Each event maps to an insertion ordered dictionary, the keys are the
+        observers and the values the gates applying the filter and the
+        delivery policy of the registration, None if it has none of them. As
+        an example, in a given point in time the self._observers attribute
         can be like the following:
 
         .. code-block:: python
-            self.observers = {
-                "all": [observer1, observer2],
-                "state": [observer3]
+            self._observers = {
+                "all": {observer1: None, observer2: None},
+                "state": {observer3: <gate of observer3 to state>}
             }
         """
 
-        self._observers['all'] = list()  # initializes the global event list
+        self._observers['all'] = dict()  # initializes the global event list
+
+        self._subscriptions = dict()
+        """
+        Reverse index of :attr:`Observable._observers`, maps each registered
+        observer to an insertion ordered dictionary (used as a set) of the
+        events it is registered to.
+        """
+
+        self._observers_view = dict()
+        """
+        Dictionary returned by :attr:`Observable.observers`, rebuilt lazily
+        from the registry whenever it is stale.
+        """
+        self._observers_view_stale = True
+
+        self._gates = dict()
+        """Maps (observer, event) registrations to their gates."""
+
+        self._unique = unique
+        self._dispatch_table = dict()
+        """
+        Cache mapping events to the tuple of observers to be notified, the
+        'all' observers first followed by the event ones.
+        """
+
+        self._stats = None
+        """The :meth:`instrument` statistics, None when not measuring."""
+
+        self._weak = weak
+        if weak:
+            # In weak mode the registry is keyed by weak references, a single
+            # reference per observer, shared by every event it is registered
+            # to, so that its finalizer callback finds all its entries.
+            self._references = dict()
+            self._forget_callback = _forget_callback(weakref.ref(self))
 
     @property
     def observers(self):
-        """:attr:Observable._observers getter."""
-        return self._observers
+        """
+        :attr:Observable._observers getter.
+
+        Returns a dictionary mapping each event to the list of its observers,
+        in registration order. The same dictionary object is returned during
+        the whole life of the Observable, it is refreshed in place after the
+        registry changes. Changing it does not affect the registry.
 
-    def register(self, observer, event='all'):
+        When the Observable keeps weak references a new dictionary is built on
+        each access instead, so that it does not keep the observers alive.
+        """
+        if self._weak:
+            view = dict()
+            for event, observers in self._observers.items():
+                observers = [reference() for reference in observers]
+                view[event] = [observer for observer in observers
+                               if observer is not None]
+            return view
+
+        if self._observers_view_stale:
+            view = self._observers_view
+            view.clear()
+            for event, observers in self._observers.items():
+                view[event] = list(observers)
+            self._observers_view_stale = False
+        return self._observers_view
+
+    def register(self, observer, event='all', policy=None, where=None):
         """
         Register an observer to listen to events from this Observable.
 
@@ -145,17 +300,44 @@ class Observable:
         the event of interest. If 'all' is given to the parameter 'event', than
         the observer MUST be inserted in the 'all' entry of self.observers.
 
-        If an observer is already registered to observe to all events, if a
-        request to observe an specific event arrive, the request will be
-        ignored and the request will be considered successful.
+        Registering an observer twice to the same event only replaces the
+        policy and the filter of the registration, the observer keeps its
+        original position in the notification order.
+
+        :param policy: a :class:`~matils.patterns.policies.Policy` deciding
+                       which notifications of this registration reach the
+                       observer, None to deliver all of them.
+        :param where: a :class:`~matils.patterns.filters.Filter` the payloads
+                      must match to reach the observer, None to deliver all of
+                      them. The filter is evaluated before the policy.
         """
+        if self._weak:
+            observer = self._reference(observer)
         try:
-            if observer not in self._observers[event] or \
-               observer not in self._observers['all']:
-                self._observers[event].append(observer)
+            observers = self._observers[event]
         except KeyError:
-            observers = [observer]
-            self._observers[event] = observers
+            observers = self._observers[event] = dict()
+
+        gate = observers.get(observer)
+        if observer in observers:
+            if gate is None:
+                if policy is None and where is None:
+                    return
+            elif gate.policy is policy and gate.where is where:
+                return
+
+        if policy is None and where is None:
+            gate = None
+            self._gates.pop((observer, event), None)
+        else:
+            gate = self._gates[observer, event] = _Gate(observer, policy,
+                                                        where)
+        observers[observer] = gate
+        try:
+            self._subscriptions[observer][event] = None
+        except KeyError:
+            self._subscriptions[observer] = {event: None}
+        self._registry_changed(event)
 
     def unregister(self, observer, event="all"):
         """
@@ -173,26 +355,36 @@ class Observable:
                  unregistration failed, or no action was taken (maybe observer
                  not registered).
         """
+        if self._weak:
+            observer = self._references.get(_weak_reference(observer))
+            if observer is None:
+                return False
+            events = self._subscriptions[observer]
+            if event == 'all' or (event in events and len(events) == 1):
+                del self._references[observer]
+
         if event == 'all':
-            # Now we need to find every reference to the observer
-            found = False
-            for event, observers in self._observers.items():
-                if observer in observers:
-                    observers.remove(observer)
-                    found = True
-            if found:
-                return True
-            else:
+            # The reverse index tells exactly where the observer is...
+            events = self._subscriptions.pop(observer, None)
+            if not events:
                 return False
+            for event in events:
+                del self._observers[event][observer]
+                self._gates.pop((observer, event), None)
+                self._registry_changed(event)
         else:
             try:
-                if observer in self._observers[event]:
-                    self._observers[event].remove(observer)
-                    return True
-                else:
-                    return False  # Element Not Found...
+                events = self._subscriptions[observer]
+                del events[event]
             except KeyError:
-                return False  # Event not found...
+                return False  # Observer or event not found...
+            del self._observers[event][observer]
+            self._gates.pop((observer, event), None)
+            if not events:
+                del self._subscriptions[observer]
+            self._registry_changed(event)
+
+        return True
 
     def reset(self):
         """
@@ -205,7 +397,12 @@ class Observable:
         entry are kept...
         """
         self._observers.clear()
-        self._observers['all'] = list()
+        self._observers['all'] = dict()
+        self._subscriptions.clear()
+        self._gates.clear()
+        if self._weak:
+            self._references.clear()
+        self._registry_changed('all')
 
     def notify(self, data, event):
         """
@@ -220,15 +417,538 @@ class Observable:
             any kind of object.
 
         .. CAUTION::
-            This method do not check if an observer is registered at all and
-            other event in the same :class:=`Observable`, if you do so in your
-            code you will get notified more than once!
+            Unless the Observable was created with ``unique=True``, this method
+            do not check if an observer is registered at all and other event in
+            the same :class:=`Observable`, if you do so in your code you will
+            get notified more than once!
         """
-        for observer in self._observers['all']:
+        recipients = self._recipients(event)
+        if not recipients:
+            return
+        if isinstance(data, Lazy):
+            data = data.value
+        for observer in recipients:
             observer.update(data, event)
 
-        if event in self._observers.keys():
-            for observer in self._observers[event]:
-                observer.update(data, event)
+    def notify_many(self, items):
+        """
+        Notify observers about many ``(data, event)`` items at once.
+
+        The items are grouped by event and each observer receives every group
+        it is interested in through a single call to
+        :meth:`Observer.update_batch`. Observers not implementing it have
+        :meth:`Observer.update` called once per item.
+
+        The items of an event are delivered in the order they were given,
+        however the groups are delivered in the order their events first
+        appear in ``items``, so items of different events may be delivered in
+        a different order than given.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        for event, batch in batches.items():
+            recipients = self._recipients(event)
+            if recipients:
+                batch = _evaluate_batch(batch)
+            for observer in recipients:
+                update_batch = getattr(observer, 'update_batch', None)
+                if update_batch is None:
+                    for data, event in batch:
+                        observer.update(data, event)
+                else:
+                    update_batch(batch)
+
+    def has_listeners(self, event):
+        """
+        Tell whether notifying the event would reach any observer.
+
+        Observers registered to 'all' count, so do registrations whose filter
+        or policy may suppress the notification. The answer comes from the
+        dispatch table, it costs about as much as a notification without
+        observers.
+        """
+        return bool(self._recipients(event))
+
+    @contextlib.contextmanager
+    def deferred(self, reducer=None):
+        """
+        Hold the notifications back and deliver them coalesced on exit.
+
+        Context manager for bulk changes, the observers are notified once per
+        event at the end of the block instead of after every change:
+
+        .. code-block:: python
+
+            with sensors_reader.deferred():
+                for sensor in sensors:
+                    sensors_reader.notify(sensor.read(), 'temperature')
+
+        The notifications of an event made in the block are merged with
+        ``reducer(previous, data)``, the last one wins by default, and the
+        result is notified when the outermost block exits, in the order the
+        events were first notified, even if the block raised. Each observer
+        receives it once, even if registered both to 'all' and to the event
+        without ``unique``. Blocks can be nested, an inner block joins the
+        batch of the outer one and its reducer applies to the notifications
+        made inside it.
+
+        While deferring, :meth:`notify` and :meth:`notify_many` are replaced
+        on the instance by the ones buffering, so that notifying outside a
+        block costs nothing more. Observables notifying asynchronously can
+        not defer.
+
+        :param reducer: function merging two payloads of the same event into
+                        one, None to keep the last payload.
+        """
+        deferral = self._current_deferral()
+        outermost = deferral is None
+        if outermost:
+            if inspect.iscoroutinefunction(self.notify):
+                raise TypeError('asynchronous notifications can not be '
+                                'deferred')
+            deferral = self._start_deferral()
+        deferral.reducers.append(reducer)
+        try:
+            yield
+        finally:
+            deferral.reducers.pop()
+            if outermost:
+                self._stop_deferral()
+                self._flush_deferral(deferral.pending)
+
+    def poll(self):
+        """
+        Deliver the notifications held back by the registration policies.
+
+        Policies like :class:`~matils.patterns.policies.Debounce` hold
+        notifications back, they are delivered when a later notification
+        arrives or when this method is called. Producers call it periodically,
+        for instance in their reading loop.
+        """
+        for gate in tuple(self._gates.values()):
+            if gate.policy is not None:
+                gate.poll()
+
+    def instrument(self, stats):
+        """
+        Measure the dispatch of the notifications to each observer.
+
+        While instrumented, the dispatch entries of the observers are wrapped
+        in probes timing every update with :func:`time.perf_counter_ns` and
+        recording it in ``stats``. The wrapping is done when the dispatch table
+        is built, an Observable that is not instrumented runs exactly the same
+        code as before.
+
+        The measured time of a registration with a filter or a policy includes
+        their evaluation, suppressed notifications are counted as calls too.
+
+        :param stats: a :class:`~matils.patterns.instrumentation.DispatchStats`
+                      recording the measures, None to stop measuring.
+        :return: the statistics previously in use, None if there were none.
+        """
+        previous = self._stats
+        self._stats = stats
+        self._dispatch_table.clear()
+        return previous
+
+    def _recipients(self, event):
+        """Return the tuple of observers to be notified about the event."""
+        table = self._dispatch_table
+        recipients = table.get(event)
+        if recipients is None and event not in self._observers:
+            recipients = table.get(_BROADCAST)
+        if recipients is None:
+            recipients = self._build_dispatch_entry(event)
+        if self._weak:
+            return tuple(_dereference(recipients))
+        return recipients
+
+    def _build_dispatch_entry(self, event):
+        """Compute and cache the dispatch table entry of the event."""
+        if event in self._observers:
+            key = event
+            recipients = self._build_recipients(event)
+        else:
+            # Nobody registered to the event, only 'all' is notified. A
+            # single entry serves every such event, so that notifying unknown
+            # events does not grow the table.
+            key = _BROADCAST
+            recipients = self._dispatch_table.get(key)
+            if recipients is None:
+                recipients = self._freeze(self._entries('all'))
+        self._dispatch_table[key] = recipients
+        return recipients
+
+    def _build_recipients(self, event):
+        """Compute the observers of an event in notification order."""
+        entries = self._entries('all')
+        entries.extend(self._entries(event))
+        return self._freeze(entries)
+
+    def _entries(self, event):
+        """
+        Return the dispatch entries of the observers registered to the event.
+
+        The entry of an observer is the observer itself, or the gate applying
+        the filter and the policy of its registration.
+        """
+        return [observer if gate is None else gate
+                for observer, gate in self._observers[event].items()]
+
+    def _freeze(self, entries):
+        """Turn dispatch entries into a dispatch table tuple."""
+        if self._unique:
+            # gates compare equal to their observer, the first entry wins.
+            entries = dict.fromkeys(entries)
+        if self._stats is not None:
+            return tuple(_Probe(entry, self._stats) for entry in entries)
+        return tuple(entries)
+
+    def _current_deferral(self):
+        """Return the deferral of the running :meth:`deferred`, if any."""
+        return self.__dict__.get('_deferral')
+
+    def _start_deferral(self):
+        """Start holding the notifications back, return the deferral."""
+        deferral = self._deferral = _Deferral()
+        self.notify = deferral.notify
+        self.notify_many = deferral.notify_many
+        return deferral
+
+    def _stop_deferral(self):
+        """Stop holding the notifications back."""
+        del self._deferral, self.notify, self.notify_many
+
+    def _flush_deferral(self, pending):
+        """
+        Notify the coalesced notifications, once to each observer.
+
+        While flushing, :meth:`_recipients` is replaced on the instance by
+        one dropping the observers registered both to 'all' and to the event.
+        """
+        deduplicate = not self._unique and '_recipients' not in self.__dict__
+        if deduplicate:
+            self._recipients = self._unique_recipients
+        try:
+            self._notify_pending(pending)
+        finally:
+            if deduplicate:
+                del self._recipients
+
+    def _notify_pending(self, pending):
+        """Notify the ``{event: data}`` notifications held back."""
+        for event, data in pending.items():
+            self.notify(data, event)
+
+    def _unique_recipients(self, event):
+        """Return the observers of the event, each one once."""
+        return tuple(dict.fromkeys(type(self)._recipients(self, event)))
+
+    def _reference(self, observer):
+        """Return the weak reference used as registry key for an observer."""
+        reference = _weak_reference(observer)
+        try:
+            return self._references[reference]
+        except KeyError:
+            reference = _weak_reference(observer, self._forget_callback)
+            self._references[reference] = reference
+            return reference
+
+    def _forget(self, reference):
+        """Remove the entries of a garbage collected observer."""
+        self._references.pop(reference, None)
+        for event in self._subscriptions.pop(reference, ()):
+            del self._observers[event][reference]
+            self._gates.pop((reference, event), None)
+            self._registry_changed(event)
+
+    def _registry_changed(self, event):
+        """Invalidate the data derived from the registry for the event."""
+        self._observers_view_stale = True
+        if event == 'all':
+            self._dispatch_table.clear()
         else:
-            pass  # nobody registered...
+            self._dispatch_table.pop(event, None)
+
+
+class _MethodObserver:
+    """Adapts a bound method registered as observer to the Observer API."""
+
+    __slots__ = ('update',)
+
+    def __init__(self, method):
+        self.update = method
+
+    def __eq__(self, other):
+        if isinstance(other, _MethodObserver):
+            return self.update == other.update
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.update)
+
+
+class _Gate:
+    """
+    Dispatch entry applying the filter and policy of a registration.
+
+    Gates compare equal to their observer, so that dispatch entries can be
+    de-duplicated and used as keys for the observer.
+    """
+
+    __slots__ = ('observer', 'policy', 'where')
+
+    def __init__(self, observer, policy, where):
+        self.observer = observer
+        self.policy = policy
+        self.where = where
+
+    def __eq__(self, other):
+        if isinstance(other, _Gate):
+            other = other.observer
+        return self.observer == other
+
+    def __hash__(self):
+        return hash(self.observer)
+
+    def update(self, data, event="all"):
+        """Deliver the notification if the filter and the policy admit it."""
+        where = self.where
+        if where is not None and not where.test(data):
+            where.rejected += 1
+            return None
+        if self.policy is None:
+            return self._deliver(((data, event),))
+        items = self.policy.offer(data, event)
+        if items:
+            return self._deliver(items)
+
+    def update_batch(self, items):
+        """Deliver the notifications of a batch the gate admits."""
+        admitted = self.admit(items)
+        if admitted:
+            observer = _resolve(self.observer)
+            if observer is None:
+                return None
+            update_batch = getattr(observer, 'update_batch', None)
+            if update_batch is not None:
+                return update_batch(admitted)
+            return self._deliver(admitted)
+
+    def admit(self, items):
+        """Return the ``(data, event)`` items the filter and policy admit."""
+        if self.where is not None:
+            items = self.where.select(items)
+        if self.policy is None:
+            return items
+        admitted = list()
+        for data, event in items:
+            admitted.extend(self.policy.offer(data, event))
+        return admitted
+
+    def poll(self):
+        """Deliver the notifications the policy held back, if due."""
+        items = self.policy.poll()
+        if items:
+            return self._deliver(items)
+
+    def _deliver(self, items):
+        """Call the observer update for each item."""
+        observer = _resolve(self.observer)
+        if observer is None:
+            return None
+        results = [observer.update(data, event) for data, event in items]
+        if len(results) == 1:
+            return results[0]
+        if any(inspect.isawaitable(result) for result in results):
+            return _await_all(results)
+        return None
+
+
+class _Probe:
+    """
+    Dispatch entry measuring the updates of another entry.
+
+    Probes compare equal to the entry they measure, and therefore to its
+    observer, like gates do.
+    """
+
+    __slots__ = ('target', 'stats')
+
+    def __init__(self, target, stats):
+        self.target = target
+        self.stats = stats
+
+    def __eq__(self, other):
+        if isinstance(other, _Probe):
+            other = other.target
+        return self.target == other
+
+    def __hash__(self):
+        return hash(self.target)
+
+    def update(self, data, event="all"):
+        """Call the update of the entry, recording its duration."""
+        target = _resolve(self.target)
+        if target is None:
+            return None
+        start = time.perf_counter_ns()
+        try:
+            result = target.update(data, event)
+        except Exception:
+            self._record(event, start, 1, True)
+            raise
+        if inspect.isawaitable(result):
+            return self._measure(result, event, start, 1)
+        self._record(event, start, 1, False)
+        return result
+
+    def update_batch(self, items):
+        """Deliver a batch to the entry, recording its duration."""
+        target = _resolve(self.target)
+        if target is None:
+            return None
+        event = items[0][1]
+        start = time.perf_counter_ns()
+        try:
+            update_batch = getattr(target, 'update_batch', None)
+            if update_batch is not None:
+                result = update_batch(items)
+            else:
+                result = None
+                for data, event in items:
+                    target.update(data, event)
+        except Exception:
+            self._record(event, start, len(items), True)
+            raise
+        if inspect.isawaitable(result):
+            return self._measure(result, event, start, len(items))
+        self._record(event, start, len(items), False)
+        return result
+
+    async def _measure(self, result, event, start, items):
+        """Await an asynchronous update, recording its duration."""
+        try:
+            result = await result
+        except Exception:
+            self._record(event, start, items, True)
+            raise
+        self._record(event, start, items, False)
+        return result
+
+    def _record(self, event, start, items, failed):
+        """Record an update that started at ``start`` nanoseconds."""
+        elapsed = time.perf_counter_ns() - start
+        observer = self.target
+        if isinstance(observer, _Gate):
+            observer = observer.observer
+        observer = _resolve(observer)
+        if isinstance(observer, _MethodObserver):
+            observer = observer.update
+        self.stats.record(observer, event, elapsed, items, failed)
+
+
+class _Deferral:
+    """Notifications held back by :meth:`Observable.deferred`."""
+
+    __slots__ = ('pending', 'reducers')
+
+    def __init__(self):
+        self.pending = dict()
+        """Maps the events, in notification order, to their payloads."""
+        self.reducers = list()
+        """The reducers of the nested blocks, the innermost last."""
+
+    def notify(self, data, event):
+        """Merge the payload into the pending one of its event."""
+        pending = self.pending
+        reducer = self.reducers[-1]
+        if reducer is not None and event in pending:
+            data = reducer(_evaluate(pending[event]), _evaluate(data))
+        pending[event] = data
+
+    def notify_many(self, items):
+        """Merge many ``(data, event)`` items."""
+        for data, event in items:
+            self.notify(data, event)
+
+
+async def _await_all(results):
+    """Await, in order, the awaitable results of asynchronous updates."""
+    for result in results:
+        if inspect.isawaitable(result):
+            await result
+
+
+def _evaluate(data):
+    """Return the value of a Lazy payload, the payload itself otherwise."""
+    if isinstance(data, Lazy):
+        return data.value
+    return data
+
+
+def _evaluate_batch(batch):
+    """Return the ``(data, event)`` batch with its Lazy payloads evaluated."""
+    if any(isinstance(data, Lazy) for data, _ in batch):
+        return [(_evaluate(data), event) for data, event in batch]
+    return batch
+
+
+def _observer_of(entry):
+    """Return the registry key of the observer behind a dispatch entry."""
+    if isinstance(entry, _Probe):
+        entry = entry.target
+    if isinstance(entry, _Gate):
+        entry = entry.observer
+    return entry
+
+
+def _weak_reference(observer, callback=None):
+    """Return a weak reference to an observer or to a bound method."""
+    if inspect.ismethod(observer):
+        return weakref.WeakMethod(observer, callback)
+    return weakref.ref(observer, callback)
+
+
+def _resolve(target):
+    """
+    Return the observer behind a registry key.
+
+    Weak references are resolved, None is returned if the observer was
+    garbage collected. Any other key is the observer itself.
+    """
+    if not isinstance(target, weakref.ref):
+        return target
+    observer = target()
+    if observer is not None and isinstance(target, weakref.WeakMethod):
+        observer = _MethodObserver(observer)
+    return observer
+
+
+def _dereference(entries):
+    """Yield the dispatch entries whose observers are still alive."""
+    for entry in entries:
+        if isinstance(entry, weakref.ref):
+            entry = _resolve(entry)
+            if entry is None:
+                continue
+        yield entry
+
+
+def _forget_callback(observable_reference):
+    """
+    Return the finalizer callback of the weak references of an Observable.
+
+    The callback holds only a weak reference to the Observable, so that the
+    registry does not keep it alive.
+    """
+    def forget(reference):
+        observable = observable_reference()
+        if observable is not None:
+            observable._forget(reference)
+    return forget
@@ -0,0 +1,166 @@
+"""
+Delivery policies for the subscriptions of an Observable.
+
+A policy given to :meth:`~matils.patterns.observer.Observable.register`
+decides, inside the Observable, which notifications of that subscription
+reach the observer. The surplus notifications are suppressed before any
+observer code runs, and counted in the policy :attr:`Policy.suppressed`.
+
+.. code-block:: python
+
+    from matils.patterns.policies import Debounce, Sample, Throttle
+
+    sensors_reader = SensorsReader()
+    throttle = Throttle(rate=1)  # at most one reading per second
+    sensors_reader.register(dashboard, 'temperature', policy=throttle)
+    sensors_reader.register(logger, 'humidity', policy=Sample(10))
+    sensors_reader.register(alarm, 'temperature', policy=Debounce(5))
+    ...
+    print(throttle.suppressed, 'readings were not sent to the dashboard')
+
+The state of the policies is kept per event, an observer registered to 'all'
+with a :class:`Throttle` receives at most the given rate of each event. The
+policies use the monotonic clock and no timer threads, notice that
+:class:`Debounce` only delivers a settled notification when the Observable is
+notified again or :meth:`~matils.patterns.observer.Observable.poll` is called.
+
+A policy instance holds the state of a subscription, use a new instance for
+each subscription.
+"""
+
+import time
+
+
+class Policy:
+    """
+    Base class of the delivery policies.
+
+    Subclasses implement :meth:`offer`, and :meth:`poll` if they hold
+    notifications back to deliver them later.
+
+    :param clock: function returning the current time in seconds, by default
+                  :func:`time.monotonic`.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """Initialize the counters."""
+        self._clock = clock
+        self.delivered = 0
+        """Number of notifications delivered to the observer."""
+        self.suppressed = 0
+        """Number of notifications suppressed by the policy."""
+
+    def offer(self, data, event):
+        """
+        Decide about a new notification.
+
+        :return: sequence of the ``(data, event)`` items to deliver now.
+        """
+        raise NotImplementedError
+
+    def poll(self):
+        """
+        Return the items held back that are due to be delivered.
+
+        :return: sequence of ``(data, event)`` items.
+        """
+        return ()
+
+
+class Throttle(Policy):
+    """
+    Deliver at most ``rate`` notifications per second of each event.
+
+    The first notification is delivered right away, the following ones are
+    suppressed until ``1 / rate`` seconds have passed since the last delivery.
+
+    :param rate: maximum notifications per second.
+    """
+
+    def __init__(self, rate, clock=time.monotonic):
+        """Initialize the interval between deliveries."""
+        super().__init__(clock)
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.interval = 1 / rate
+        self._last = dict()
+
+    def offer(self, data, event):
+        """Deliver the notification if the interval has passed."""
+        now = self._clock()
+        last = self._last.get(event)
+        if last is not None and now - last < self.interval:
+            self.suppressed += 1
+            return ()
+        self._last[event] = now
+        self.delivered += 1
+        return ((data, event),)
+
+
+class Debounce(Policy):
+    """
+    Deliver a notification only after the event is quiet for ``window``.
+
+    Each notification replaces the one held back for the event, a burst of
+    notifications results in the delivery of its last one once no other
+    notification of the event arrived for ``window`` seconds.
+
+    :param window: quiet period, in seconds.
+    """
+
+    def __init__(self, window, clock=time.monotonic):
+        """Initialize the held back notifications."""
+        super().__init__(clock)
+        self.window = window
+        self._held = dict()
+        """Maps events to the time and item of the notification held."""
+
+    def offer(self, data, event):
+        """Hold the notification, deliver the previous one if settled."""
+        now = self._clock()
+        held = self._held.get(event)
+        self._held[event] = (now, (data, event))
+        if held is None:
+            return ()
+        if now - held[0] >= self.window:
+            self.delivered += 1
+            return (held[1],)
+        self.suppressed += 1
+        return ()
+
+    def poll(self):
+        """Deliver the notifications held for longer than the window."""
+        now = self._clock()
+        settled = [event for event, (time_, _) in self._held.items()
+                   if now - time_ >= self.window]
+        self.delivered += len(settled)
+        return [self._held.pop(event)[1] for event in settled]
+
+
+class Sample(Policy):
+    """
+    Deliver one in every ``every`` notifications of each event.
+
+    The first notification is delivered, then the following ``every - 1`` are
+    suppressed, and so on.
+
+    :param every: sampling period, in notifications.
+    """
+
+    def __init__(self, every, clock=time.monotonic):
+        """Initialize the counters of each event."""
+        super().__init__(clock)
+        if every < 1:
+            raise ValueError('every must be at least 1')
+        self.every = every
+        self._seen = dict()
+
+    def offer(self, data, event):
+        """Deliver the notification if it is the one to sample."""
+        seen = self._seen.get(event, 0)
+        self._seen[event] = (seen + 1) % self.every
+        if seen:
+            self.suppressed += 1
+            return ()
+        self.delivered += 1
+        return ((data, event),)
@@ -0,0 +1,281 @@
+"""
+Implementation of the Observer Pattern isolating the producer from bad
+observers.
+
+In an :class:`~matils.patterns.observer.Observable` a slow observer delays
+every observer after it, and one raising an exception aborts the delivery to
+them, the exception reaching the producer. The :class:`PriorityObservable`
+bounds the damage:
+
+* Each registration has a priority, the observers with the highest ones are
+  updated first, so that latency critical observers are not delayed by the
+  others.
+* Each notification has a time budget, once spent the remaining observers
+  are skipped for that notification.
+* Each observer has a circuit breaker, after ``threshold`` consecutive
+  failures, exceptions or updates longer than ``timeout``, the observer is
+  skipped for ``backoff`` seconds, then tried once again. A successful try
+  closes the breaker, a failed one opens it again for twice as long, up to
+  ``max_backoff``.
+
+Failures and skipped deliveries never reach the producer, they are reported
+to the ``on_failure`` callback and counted in
+:attr:`PriorityObservable.counts`:
+
+.. code-block:: python
+
+    from matils.patterns.priority import PriorityObservable
+
+    def report(observer, event, reason, exception):
+        print('{} not updated about {}: {}'.format(observer, event, reason))
+
+    sensors_reader = PriorityObservable(budget=0.01, timeout=0.005,
+                                        on_failure=report)
+    sensors_reader.register(alarm, 'temperature', priority=10)
+    sensors_reader.register(SensorDataAnalizer(), 'temperature')
+
+Updates are not interrupted, an observer exceeding the ``timeout`` or the
+budget runs to completion, the following observers are skipped instead.
+"""
+
+import time
+
+from matils.patterns.observer import (Observable, _evaluate, _evaluate_batch,
+                                      _observer_of)
+
+
+class _Breaker:
+    """Circuit breaker of an observer that failed."""
+
+    __slots__ = ('failures', 'retry_at', 'backoff')
+
+    def __init__(self, backoff):
+        self.failures = 0
+        """Consecutive failures of the observer."""
+        self.retry_at = None
+        """Time from which the observer is tried again, while open."""
+        self.backoff = backoff
+        """Seconds the breaker stays open the next time it opens."""
+
+
+class PriorityObservable(Observable):
+    """
+    Observable updating its observers by priority, within a time budget.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param budget: seconds a notification has to update its observers, None
+                   for no limit.
+    :param timeout: seconds after which an update counts as failed, None for
+                    no limit.
+    :param threshold: consecutive failures opening the breaker of an
+                      observer.
+    :param backoff: seconds the breaker stays open the first time.
+    :param max_backoff: maximum seconds the breaker stays open.
+    :param on_failure: function called as
+                       ``on_failure(observer, event, reason, exception)`` for
+                       each failed or skipped delivery, ``reason`` being one
+                       of :attr:`ERROR`, :attr:`TIMEOUT`, :attr:`OPEN` or
+                       :attr:`BUDGET`, ``exception`` the exception raised,
+                       None for the others.
+    :param clock: function returning the current time in seconds.
+    """
+
+    ERROR = 'error'
+    """The update raised an exception."""
+    TIMEOUT = 'timeout'
+    """The update took longer than the timeout."""
+    OPEN = 'open'
+    """The update was skipped, the breaker of the observer is open."""
+    BUDGET = 'budget'
+    """The update was skipped, the budget of the notification was spent."""
+
+    def __init__(self, unique=False, budget=None, timeout=None, threshold=3,
+                 backoff=1.0, max_backoff=60.0, on_failure=None,
+                 clock=time.perf_counter):
+        """Initialize the Observers list, the priorities and the breakers."""
+        if threshold < 1:
+            raise ValueError('threshold must be at least 1')
+        super().__init__(unique)
+        self._budget = budget
+        self._timeout = timeout
+        self._threshold = threshold
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._clock = clock
+        self.on_failure = on_failure
+        self._priorities = dict()
+        """Maps the (observer, event) registrations with a priority to it."""
+        self._breakers = dict()
+        """Maps the observers whose last update failed to their breaker."""
+        self.counts = dict.fromkeys((self.ERROR, self.TIMEOUT, self.OPEN,
+                                     self.BUDGET), 0)
+        """Number of failed or skipped deliveries, by reason."""
+
+    def register(self, observer, event='all', policy=None, where=None,
+                 priority=0):
+        """
+        Register an observer, see :meth:`Observable.register`.
+
+        :param priority: the observers of the registrations with the highest
+                         priorities are updated first, those with the same
+                         priority in registration order.
+        """
+        key = (observer, event)
+        if priority != self._priorities.get(key, 0):
+            if priority:
+                self._priorities[key] = priority
+            else:
+                del self._priorities[key]
+            self._registry_changed(event)
+        super().register(observer, event, policy, where)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unregister an observer, see :meth:`Observable.unregister`.
+
+        The breaker of the observer is discarded with its last event.
+        """
+        events = tuple(self._subscriptions.get(observer, ()))
+        result = super().unregister(observer, event)
+        remaining = self._subscriptions.get(observer, ())
+        for event in events:
+            if event not in remaining:
+                self._priorities.pop((observer, event), None)
+        if not remaining:
+            self._breakers.pop(observer, None)
+        return result
+
+    def reset(self):
+        """Remove all registered observers, their priorities and breakers."""
+        super().reset()
+        self._priorities.clear()
+        self._breakers.clear()
+
+    def state(self, observer):
+        """
+        Return the state of the breaker of an observer.
+
+        :return: 'closed' while the observer is updated, 'open' while it is
+                 skipped, 'half-open' when its next update is a try.
+        """
+        breaker = self._breakers.get(observer)
+        if breaker is None or breaker.retry_at is None:
+            return 'closed'
+        if self._clock() < breaker.retry_at:
+            return 'open'
+        return 'half-open'
+
+    def notify(self, data, event):
+        """
+        Update the observers about the event, by priority, within budget.
+
+        See :meth:`matils.patterns.observer.Observable.notify`, the failures
+        of the observers are reported instead of raised.
+        """
+        recipients = self._recipients(event)
+        if recipients:
+            self._deliver(recipients, event, _evaluate(data), None)
+
+    def notify_many(self, items):
+        """
+        Update the observers about many ``(data, event)`` items at once.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`, each
+        event has its own budget.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        for event, batch in batches.items():
+            recipients = self._recipients(event)
+            if recipients:
+                self._deliver(recipients, event, None,
+                              _evaluate_batch(batch))
+
+    def _deliver(self, recipients, event, data, batch):
+        """Update the recipients with the data, or the batch if any."""
+        clock, breakers = self._clock, self._breakers
+        now = clock()
+        deadline = None if self._budget is None else now + self._budget
+        for index, (observer, entry) in enumerate(recipients):
+            if deadline is not None and now > deadline:
+                for observer, _ in recipients[index:]:
+                    self._report(observer, event, self.BUDGET, None)
+                return
+
+            breaker = breakers.get(observer)
+            if breaker is not None and breaker.retry_at is not None and \
+                    now < breaker.retry_at:
+                self._report(observer, event, self.OPEN, None)
+                now = clock()
+                continue
+
+            # on_failure may have run since, it is not the observer's time
+            start = clock()
+            try:
+                if batch is None:
+                    entry.update(data, event)
+                else:
+                    update_batch = getattr(entry, 'update_batch', None)
+                    if update_batch is None:
+                        for item in batch:
+                            entry.update(*item)
+                    else:
+                        update_batch(batch)
+            except Exception as exception:
+                self._failed(observer, event, self.ERROR, exception, clock())
+                now = clock()
+                continue
+            now = clock()
+            if self._timeout is not None and now - start > self._timeout:
+                self._failed(observer, event, self.TIMEOUT, None, now)
+                now = clock()
+            elif breaker is not None:
+                # the update may have unregistered the observer, or reset
+                breakers.pop(observer, None)
+
+    def _failed(self, observer, event, reason, exception, now):
+        """Count a failure of the observer, opening its breaker if due."""
+        breaker = self._breakers.get(observer)
+        if breaker is None:
+            breaker = self._breakers[observer] = _Breaker(self._backoff)
+        breaker.failures += 1
+        if breaker.failures >= self._threshold:
+            breaker.retry_at = now + breaker.backoff
+            breaker.backoff = min(2 * breaker.backoff, self._max_backoff)
+        self._report(observer, event, reason, exception)
+
+    def _report(self, observer, event, reason, exception):
+        """Count a failed or skipped delivery and pass it to on_failure."""
+        self.counts[reason] += 1
+        if self.on_failure is not None:
+            self.on_failure(observer, event, reason, exception)
+
+    def _entries(self, event):
+        """Return the dispatch entries of the event, by priority."""
+        return self._ranked(event)
+
+    def _build_recipients(self, event):
+        """Compute the observers of an event, by priority."""
+        return self._freeze(self._ranked('all', event))
+
+    def _ranked(self, *events):
+        """Return the dispatch entries of the events sorted by priority."""
+        priorities = self._priorities
+        ranked = list()
+        for event in dict.fromkeys(events):
+            for observer, gate in self._observers[event].items():
+                ranked.append((priorities.get((observer, event), 0),
+                               observer if gate is None else gate))
+        # stable, equal priorities keep the registration order
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [entry for _, entry in ranked]
+
+    def _freeze(self, entries):
+        """Turn dispatch entries into (observer, entry) pairs."""
+        return tuple((_observer_of(entry), entry)
+                     for entry in super()._freeze(entries))
@@ -0,0 +1,460 @@
+"""
+Implementation of the Observer Pattern with observers in worker processes.
+
+The :class:`ProcessObservable` works like the
+:class:`~matils.patterns.observer.Observable`, but its observers live and run
+in a pool of worker processes. CPU bound observers written in pure Python, like
+the ``SensorDataAnalizer`` of :mod:`matils.patterns.observer`, are no longer
+limited by the GIL to a single core.
+
+Each observer is routed to a fixed worker when it is registered, the worker
+receives a pickled copy of it and keeps it for as long as it is registered, so
+the observer state stays local to that worker. The copy in the producer
+process is not updated.
+
+Payloads are pickled once per worker involved in a notification, not once per
+observer. Large payloads (``bytes``, ``bytearray``, ``memoryview`` and NumPy
+arrays of at least ``threshold`` bytes) are copied once into a
+:class:`multiprocessing.shared_memory.SharedMemory` segment instead, and the
+observers receive a read-only ``memoryview`` or NumPy array backed by it. The
+segment is released as soon as every worker is done with it, observers must
+copy the data they want to keep after the update returns.
+
+.. code-block:: python
+
+    from matils.patterns.process import ProcessObservable
+
+    if __name__ == '__main__':
+        with ProcessObservable(workers=4) as sensors_reader:
+            sensors_reader.register(SensorDataAnalizer(), 'temperature')
+            sensors_reader.notify(large_readings_array, 'temperature')
+            sensors_reader.flush()
+"""
+
+import itertools
+import multiprocessing
+import queue
+import time
+import traceback
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+from matils.patterns.observer import (Observable, _Gate, _Probe, _evaluate,
+                                      _evaluate_batch)
+from matils.patterns.policies import Policy
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+
+class ProcessObservable(Observable):
+    """
+    Observable delivering its notifications to observers in other processes.
+
+    The worker processes are started with the first registration. Observers
+    must be picklable and their updates run in the worker they are routed to,
+    by default the one with less observers, or the one given to
+    :meth:`register`.
+
+    Notifications are asynchronous, use :meth:`flush` to wait until the workers
+    delivered them. Exceptions raised by the observers do not reach the
+    producer, their formatted tracebacks are kept in :attr:`failures`.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param workers: number of worker processes, by default the number of CPUs.
+    :param threshold: minimum size in bytes of the payloads passed through
+                      shared memory.
+    :param context: the :mod:`multiprocessing` context used to start workers.
+    """
+
+    def __init__(self, unique=False, workers=None, threshold=64 * 1024,
+                 context=None):
+        """Initialize the Observers list, the workers are started lazily."""
+        super().__init__(unique)
+        self._workers_count = workers or multiprocessing.cpu_count()
+        self._threshold = threshold
+        self._context = context or multiprocessing.get_context()
+        self._workers = list()
+        self._commands = list()
+        self._acks = None
+        self._load = [0] * self._workers_count
+        self._placement = dict()
+        """Maps each registered observer to its (token, worker) pair."""
+        self._tokens = itertools.count()
+        self._segments = dict()
+        """Maps the shared memory segments in use to their reference count."""
+        self._pending = 0
+        self._closed = False
+        self.failures = list()
+        """Formatted tracebacks of the exceptions raised by observers."""
+
+    def __enter__(self):
+        """Use the Observable as a context manager that shuts it down."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Shut down the Observable, waiting for the pending updates."""
+        self.shutdown()
+
+    @property
+    def pending(self):
+        """Number of messages sent to workers and not yet acknowledged."""
+        return self._pending
+
+    def register(self, observer, event='all', policy=None, where=None, *,
+                 worker=None):
+        """
+        Register an observer, routing it to a worker process.
+
+        See :meth:`matils.patterns.observer.Observable.register`.
+
+        The registration filter and policy, if any, are applied in this
+        process, the notifications they suppress are not sent to the worker.
+
+        :param worker: index of the worker to run the observer, by default the
+                       one with less observers. Ignored if the observer is
+                       already registered to other events.
+        """
+        if self._closed:
+            raise RuntimeError('cannot register after shutdown')
+        if policy is not None and not isinstance(policy, Policy):
+            raise TypeError('policy must be a Policy, give the worker as '
+                            'keyword argument')
+        if worker is not None and not 0 <= worker < self._workers_count:
+            raise ValueError('worker must be in [0, {})'.format(
+                self._workers_count))
+
+        if observer not in self._placement:
+            self._start()
+            if worker is None:
+                worker = self._load.index(min(self._load))
+            token = next(self._tokens)
+            self._commands[worker].put(('add', token, observer))
+            self._placement[observer] = (token, worker)
+            self._load[worker] += 1
+        super().register(observer, event, policy, where)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unregister an observer, to all or specifc events.
+
+        See :meth:`matils.patterns.observer.Observable.unregister`, the worker
+        drops the observer once it is unregistered from every event.
+        """
+        result = super().unregister(observer, event)
+        if result and observer not in self._subscriptions:
+            self._discard(observer)
+        return result
+
+    def reset(self):
+        """Remove all registered observers, also from the workers."""
+        super().reset()
+        for observer in list(self._placement):
+            self._discard(observer)
+
+    def notify(self, data, event):
+        """
+        Send the notification to the workers of the interested observers.
+
+        See :meth:`matils.patterns.observer.Observable.notify`.
+        """
+        recipients = self._recipients(event)
+        if recipients:
+            self._send(self._route(recipients, [(_evaluate(data), event)]),
+                       False)
+        self._collect()
+
+    def notify_many(self, items):
+        """
+        Send many ``(data, event)`` items at once to the workers.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        for event, batch in batches.items():
+            recipients = self._recipients(event)
+            if recipients:
+                self._send(self._route(recipients, _evaluate_batch(batch)),
+                           True)
+        self._collect()
+
+    def poll(self):
+        """
+        Send the notifications held back by the registration policies.
+
+        See :meth:`matils.patterns.observer.Observable.poll`, the policies
+        run in this process.
+        """
+        routes = list()
+        for gate in tuple(self._gates.values()):
+            if gate.policy is not None:
+                items = gate.policy.poll()
+                if items:
+                    token, worker = self._placement[gate.observer]
+                    routes.append((worker, [token], list(items)))
+        self._send(routes, False)
+        self._collect()
+
+    def flush(self, timeout=None):
+        """
+        Wait until the workers delivered every notification sent.
+
+        :param timeout: maximum seconds to wait, None to wait forever.
+        :return: True if everything was delivered, False on timeout.
+        :raises RuntimeError: if a worker process died.
+        """
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        while self._pending:
+            wait = 0.1
+            if timeout is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+            try:
+                self._collect(True, wait)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError('a worker process died')
+        return True
+
+    def shutdown(self):
+        """
+        Deliver the pending notifications and stop the workers.
+
+        Shared memory segments still in use are released.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._workers:
+            self.flush()
+            self._finalizer()
+
+    def _start(self):
+        """Start the worker processes, if not started yet."""
+        if self._workers:
+            return
+        # Workers must share the resource tracker of this process, otherwise
+        # the segments they attach are reported as leaked by their own.
+        resource_tracker.ensure_running()
+        self._acks = self._context.Queue()
+        for _ in range(self._workers_count):
+            commands = self._context.SimpleQueue()
+            worker = self._context.Process(target=_work,
+                                           args=(commands, self._acks),
+                                           daemon=True)
+            worker.start()
+            self._commands.append(commands)
+            self._workers.append(worker)
+        self._finalizer = weakref.finalize(self, _stop, self._workers,
+                                           self._commands, self._segments)
+
+    def _discard(self, observer):
+        """Drop an observer from its worker."""
+        token, worker = self._placement.pop(observer)
+        self._commands[worker].put(('remove', token))
+        self._load[worker] -= 1
+
+    def _route(self, recipients, items):
+        """
+        Return the messages sending the items to the recipients.
+
+        The registration filters and policies run here, each observer with
+        one of them gets a message of its own with the items it admits, the
+        others share one message per worker.
+
+        :return: list of ``(worker, tokens, items)`` messages.
+        """
+        shared = dict()
+        routes = list()
+        for entry in recipients:
+            token, worker = self._placement[entry]
+            gate = entry.target if isinstance(entry, _Probe) else entry
+            if isinstance(gate, _Gate):
+                admitted = gate.admit(items)
+                if admitted:
+                    routes.append((worker, [token], admitted))
+            elif worker in shared:
+                shared[worker].append(token)
+            else:
+                shared[worker] = [token]
+                routes.append((worker, shared[worker], items))
+        return routes
+
+    def _send(self, routes, batched):
+        """Send the routed messages, sharing large payloads once."""
+        # the id of each payload -> the payload, what is sent, its segment
+        shared = dict()
+        references = dict()
+        for worker, tokens, items in routes:
+            sent, names = list(), dict()
+            for data, event in items:
+                payload = shared.get(id(data))
+                if payload is None:
+                    segments = list()
+                    payload = shared[id(data)] = (
+                        data, self._share(data, segments),
+                        segments[0].name if segments else None)
+                sent.append((payload[1], event))
+                if payload[2] is not None:
+                    names[payload[2]] = None
+            for name in names:
+                references[name] = references.get(name, 0) + 1
+            self._commands[worker].put(('update', tokens, sent, batched,
+                                        list(names)))
+            self._pending += 1
+        for name, count in references.items():
+            self._segments[name] = (self._segments[name][0], count)
+
+    def _share(self, data, segments):
+        """Copy large payloads to shared memory, return what to send."""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            view = memoryview(data).cast('B')
+            if view.nbytes < self._threshold:
+                return data
+            segment = shared_memory.SharedMemory(create=True,
+                                                 size=max(view.nbytes, 1))
+            segment.buf[:view.nbytes] = view
+            payload = _SharedPayload(segment.name, view.nbytes)
+        elif numpy is not None and isinstance(data, numpy.ndarray):
+            if data.nbytes < self._threshold or data.dtype.hasobject:
+                return data
+            segment = shared_memory.SharedMemory(create=True,
+                                                 size=max(data.nbytes, 1))
+            numpy.ndarray(data.shape, data.dtype, segment.buf)[...] = data
+            payload = _SharedPayload(segment.name, data.nbytes,
+                                     data.shape, data.dtype.str)
+        else:
+            return data
+        self._segments[segment.name] = (segment, 0)
+        segments.append(segment)
+        return payload
+
+    def _collect(self, block=False, timeout=None):
+        """Process the acknowledgements sent by the workers."""
+        if self._acks is None:
+            return
+        while self._pending:
+            if block:
+                segment_names, failures = self._acks.get(True, timeout)
+                block = False
+            else:
+                try:
+                    segment_names, failures = self._acks.get_nowait()
+                except queue.Empty:
+                    return
+            self._pending -= 1
+            self.failures.extend(failures)
+            for name in segment_names:
+                segment, references = self._segments[name]
+                if references > 1:
+                    self._segments[name] = (segment, references - 1)
+                else:
+                    del self._segments[name]
+                    segment.close()
+                    segment.unlink()
+
+
+class _SharedPayload:
+    """Description of a payload placed in shared memory."""
+
+    __slots__ = ('name', 'size', 'shape', 'dtype')
+
+    def __init__(self, name, size, shape=None, dtype=None):
+        self.name = name
+        self.size = size
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return (self.name, self.size, self.shape, self.dtype)
+
+    def __setstate__(self, state):
+        self.name, self.size, self.shape, self.dtype = state
+
+    def attach(self):
+        """Return the segment and the read-only data it holds."""
+        try:
+            segment = shared_memory.SharedMemory(self.name, track=False)
+        except TypeError:  # Python < 3.13
+            segment = shared_memory.SharedMemory(self.name)
+        if self.dtype is None:
+            data = segment.buf[:self.size].toreadonly()
+        else:
+            data = numpy.ndarray(self.shape, self.dtype, segment.buf)
+            data.flags.writeable = False
+        return segment, data
+
+
+def _work(commands, acks):
+    """Main loop of the worker processes."""
+    observers = dict()
+    while True:
+        message = commands.get()
+        kind = message[0]
+        if kind == 'update':
+            _, tokens, items, batched, segment_names = message
+            acks.put((segment_names,
+                      _deliver(observers, tokens, items, batched)))
+        elif kind == 'add':
+            observers[message[1]] = message[2]
+        elif kind == 'remove':
+            observers.pop(message[1], None)
+        elif kind == 'stop':
+            return
+
+
+def _deliver(observers, tokens, items, batched):
+    """Deliver the items to the observers, return the failures."""
+    segments = list()
+    resolved = list()
+    for data, event in items:
+        if isinstance(data, _SharedPayload):
+            segment, data = data.attach()
+            segments.append(segment)
+        resolved.append((data, event))
+
+    failures = list()
+    for token in tokens:
+        observer = observers.get(token)
+        if observer is None:
+            continue
+        try:
+            if batched and hasattr(observer, 'update_batch'):
+                observer.update_batch(resolved)
+            else:
+                for data, event in resolved:
+                    observer.update(data, event)
+        except Exception:
+            failures.append(traceback.format_exc())
+
+    data = resolved = None  # release the views before closing segments
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            pass  # an observer kept a view, released with the process...
+    return failures
+
+
+def _stop(workers, commands, segments):
+    """Stop the workers and release the shared memory segments."""
+    for queue_ in commands:
+        queue_.put(('stop',))
+    for worker in workers:
+        worker.join(5)
+        if worker.is_alive():
+            worker.terminate()
+    for segment, _ in segments.values():
+        segment.close()
+        segment.unlink()
+    segments.clear()
@@ -0,0 +1,361 @@
+"""
+Implementation of the Observer Pattern with observers spread over threads.
+
+The :class:`ShardedObservable` works like the
+:class:`~matils.patterns.threadsafe.ThreadSafeObservable`, but its observers
+are partitioned across a fixed number of shards, each one a worker thread
+with its own queue. :meth:`ShardedObservable.notify` only queues the
+notification to the shards holding interested observers and returns, the
+shards then update their observers in parallel:
+
+.. code-block:: python
+
+    from matils.patterns.sharded import ShardedObservable
+
+    class SensorsReader(ShardedObservable):
+        ...
+
+    with SensorsReader(shards=4) as sensors_reader:
+        for analyzer in analyzers:
+            sensors_reader.register(analyzer, 'temperature')
+        sensors_reader.notify({'value': 22.5}, 'temperature')
+        sensors_reader.flush()  # waits for every queued update
+
+An observer lives in a single shard, whatever the events it is registered
+to, so that it is updated by one thread at a time and in the order the
+notifications were made. It is placed by a stable hash, in the first least
+loaded shard starting from the one its hash points to, which keeps the
+number of observers of the shards within one of each other. When an
+unregistration breaks that balance, an observer of the fullest shard is moved
+to the emptiest one. The move is a handoff: the new shard waits until the old
+one has delivered the updates queued before the move, then carries on.
+
+Compared to the
+:class:`~matils.patterns.executor.ExecutorObservable`, there is no lane to
+schedule per observer and per notification, a notification costs one queue
+put per shard, however a slow observer delays the other observers of its
+shard. With the GIL, dispatch scales with the shards only as far as the
+observers release it, doing I/O or NumPy work for instance, on free-threaded
+builds of Python it scales with the cores.
+"""
+
+import os
+import queue
+import threading
+import time
+import traceback
+
+from matils.patterns.observer import (_BROADCAST, _evaluate, _evaluate_batch,
+                                      _observer_of)
+from matils.patterns.threadsafe import ThreadSafeObservable
+
+
+class ShardedObservable(ThreadSafeObservable):
+    """
+    Observable updating its observers in a fixed set of worker threads.
+
+    Exceptions raised by the observers are not propagated, their formatted
+    tracebacks are kept in :attr:`failures`. Use :meth:`flush` to wait until
+    the queued updates are delivered and :meth:`shutdown` (or the Observable
+    as a context manager) to stop the shards.
+
+    :param shards: number of worker threads, by default the number of CPUs.
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    """
+
+    def __init__(self, shards=None, unique=False):
+        """Initialize the Observers list and start the shards."""
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError('shards must be at least 1')
+        super().__init__(unique)
+        self._members = [dict() for _ in range(shards)]
+        """The observers of each shard, in placement order."""
+        self._placement = dict()
+        """Maps each registered observer to its shard."""
+        self._partitions = dict()
+        """Cache mapping events to their recipients grouped by shard queue."""
+        self._queues = [queue.SimpleQueue() for _ in range(shards)]
+        self._closed = False
+        self.failures = list()
+        """Formatted tracebacks of the exceptions raised by observers."""
+        self._workers = [threading.Thread(target=self._work, args=(tasks,),
+                                          daemon=True,
+                                          name='matils-shard-{}'.format(index))
+                         for index, tasks in enumerate(self._queues)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        """Use the Observable as a context manager that shuts it down."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Shut down the Observable, waiting for the queued updates."""
+        self.shutdown()
+
+    def register(self, observer, event='all', policy=None, where=None):
+        """
+        Register an observer, see :meth:`Observable.register`.
+
+        An observer registered for the first time is placed in a shard.
+        """
+        with self._lock:
+            super().register(observer, event, policy, where)
+            if observer not in self._placement:
+                self._place(observer)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unregister an observer, see :meth:`Observable.unregister`.
+
+        An observer unregistered from its last event leaves its shard, an
+        observer of another shard may be moved to keep them balanced. Updates
+        already queued are still delivered to it.
+        """
+        with self._lock:
+            result = super().unregister(observer, event)
+            if observer in self._placement and \
+                    observer not in self._subscriptions:
+                self._displace(observer)
+            return result
+
+    def reset(self):
+        """Remove all registered observers, emptying the shards."""
+        with self._lock:
+            super().reset()
+            for members in self._members:
+                members.clear()
+            self._placement.clear()
+
+    def shard_of(self, observer):
+        """Return the index of the shard of an observer, None if unknown."""
+        return self._placement.get(observer)
+
+    def notify(self, data, event):
+        """
+        Queue the notification to the shards of the interested observers.
+
+        See :meth:`matils.patterns.observer.Observable.notify`, the updates
+        are delivered later by the shards.
+
+        :raises RuntimeError: if the Observable was shut down.
+        """
+        with self._lock:
+            self._check_open()
+            partition = self._partition(event)
+            if partition:
+                data = _evaluate(data)
+            for tasks, entries in partition:
+                tasks.put((self._deliver, (entries, data, event)))
+
+    def notify_many(self, items):
+        """
+        Queue many ``(data, event)`` items at once.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`, each
+        shard receives one task per event.
+
+        :raises RuntimeError: if the Observable was shut down.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append((data, event))
+            except KeyError:
+                batches[event] = [(data, event)]
+
+        with self._lock:
+            self._check_open()
+            for event, batch in batches.items():
+                partition = self._partition(event)
+                if partition:
+                    batch = _evaluate_batch(batch)
+                for tasks, entries in partition:
+                    tasks.put((self._deliver_batch, (entries, batch)))
+
+    def poll(self):
+        """
+        Queue the delivery of the notifications held back by the policies.
+
+        See :meth:`matils.patterns.observer.Observable.poll`, each policy is
+        polled by the shard of its observer, after the updates already
+        queued.
+
+        :raises RuntimeError: if the Observable was shut down.
+        """
+        with self._lock:
+            self._check_open()
+            shards = dict()
+            for gate in self._gates.values():
+                if gate.policy is not None:
+                    shard = self._placement[_observer_of(gate)]
+                    try:
+                        shards[shard].append(gate)
+                    except KeyError:
+                        shards[shard] = [gate]
+            for shard, gates in shards.items():
+                self._queues[shard].put((self._poll, (gates,)))
+
+    def flush(self, timeout=None):
+        """
+        Wait until the updates queued so far have been delivered.
+
+        Must not be called from inside an update of this Observable.
+
+        :param timeout: maximum seconds to wait, None to wait forever.
+        :return: True if every update was delivered, False on timeout.
+        """
+        markers = list()
+        with self._lock:
+            for tasks in self._queues:
+                marker = threading.Event()
+                tasks.put((marker.set, ()))
+                markers.append(marker)
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        for marker in markers:
+            if timeout is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            if not marker.wait(timeout):
+                return False
+        return True
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting notifications and stop the shards.
+
+        The updates already queued are still delivered.
+
+        :param wait: if True, return only after the shards stopped.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                for tasks in self._queues:
+                    tasks.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _check_open(self):
+        """Raise RuntimeError if the Observable was shut down."""
+        if self._closed:
+            raise RuntimeError('cannot notify after shutdown')
+
+    def _partition(self, event):
+        """Return the recipients of an event by shard, must hold the lock."""
+        key = event if event in self._observers else _BROADCAST
+        partition = self._partitions.get(key)
+        if partition is None:
+            shards = dict()
+            for entry in self._recipients(event):
+                shard = self._placement[_observer_of(entry)]
+                try:
+                    shards[shard].append(entry)
+                except KeyError:
+                    shards[shard] = [entry]
+            partition = self._partitions[key] = tuple(
+                (self._queues[shard], tuple(entries))
+                for shard, entries in shards.items())
+        return partition
+
+    def _place(self, observer):
+        """Put a new observer in the first least loaded shard from its hash."""
+        members = self._members
+        fewest = min(len(shard) for shard in members)
+        start = hash(observer) % len(members)
+        for offset in range(len(members)):
+            shard = (start + offset) % len(members)
+            if len(members[shard]) == fewest:
+                break
+        members[shard][observer] = None
+        self._placement[observer] = shard
+
+    def _displace(self, observer):
+        """Take an observer out of its shard, rebalancing the shards."""
+        shard = self._placement.pop(observer)
+        members = self._members
+        del members[shard][observer]
+        fullest = max(range(len(members)), key=lambda index: len(
+            members[index]))
+        if len(members[fullest]) - len(members[shard]) > 1:
+            self._move(next(reversed(members[fullest])), fullest, shard)
+
+    def _move(self, observer, source, target):
+        """
+        Hand an observer over to another shard.
+
+        The target shard waits for the source one to reach the handoff, so
+        that the updates queued before the move are delivered first. Both
+        tasks are queued under the lock, the handoffs can not wait for each
+        other in a cycle.
+        """
+        handoff = threading.Event()
+        self._queues[source].put((handoff.set, ()))
+        self._queues[target].put((handoff.wait, ()))
+        del self._members[source][observer]
+        self._members[target][observer] = None
+        self._placement[observer] = target
+        self._partitions.clear()
+
+    def _flush_deferral(self, pending):
+        """
+        Queue the coalesced notifications, once to each observer.
+
+        The partitions built while flushing are de-duplicated, they are not
+        kept, and the other threads wait for the flush to notify.
+        """
+        with self._lock:
+            self._partitions.clear()
+            try:
+                super()._flush_deferral(pending)
+            finally:
+                self._partitions.clear()
+
+    def _registry_changed(self, event):
+        """Invalidate the data derived from the registry for the event."""
+        super()._registry_changed(event)
+        if event == 'all':
+            self._partitions.clear()
+        else:
+            self._partitions.pop(event, None)
+
+    def _work(self, tasks):
+        """Run the tasks of a shard until shut down, runs in its thread."""
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            function, args = task
+            function(*args)
+
+    def _poll(self, gates):
+        """Deliver the notifications held back by the policies of a shard."""
+        for gate in gates:
+            try:
+                gate.poll()
+            except Exception:
+                self.failures.append(traceback.format_exc())
+
+    def _deliver(self, entries, data, event):
+        """Update the observers of a shard about a notification."""
+        for observer in entries:
+            try:
+                observer.update(data, event)
+            except Exception:
+                self.failures.append(traceback.format_exc())
+
+    def _deliver_batch(self, entries, batch):
+        """Update the observers of a shard about a batch of an event."""
+        for observer in entries:
+            try:
+                update_batch = getattr(observer, 'update_batch', None)
+                if update_batch is None:
+                    for data, event in batch:
+                        observer.update(data, event)
+                else:
+                    update_batch(batch)
+            except Exception:
+                self.failures.append(traceback.format_exc())
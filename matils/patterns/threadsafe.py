@@ -0,0 +1,213 @@
+"""
+Implementation of the Observer Pattern for concurrent threads.
+
+The :class:`ThreadSafeObservable` works like the
+:class:`~matils.patterns.observer.Observable`, but many threads can notify it
+while others register and unregister observers.
+
+.. code-block:: python
+
+    from matils.patterns.threadsafe import ThreadSafeObservable
+
+    class SensorsReader(ThreadSafeObservable):
+        ...
+
+    sensors_reader = SensorsReader()
+    for sensor in sensors:
+        threading.Thread(target=sensors_reader.read_loop,
+                         args=(sensor,)).start()
+    sensors_reader.register(SensorDataAnalizer(), 'temperature')
+
+Changes to the registry are serialized by a lock, notifications are not: they
+read the immutable tuples of the dispatch table without locking, so producer
+threads do not contend with each other. A notification sees the registry as
+it was either before or after a concurrent change, never in between. The lock
+is only taken by a notification when its dispatch entry has to be rebuilt,
+after the registry changed.
+
+:meth:`~matils.patterns.observer.Observable.deferred` holds back the
+notifications of the thread running the block only, the other threads keep
+notifying the observers right away.
+
+The observers are called in the threads notifying them, concurrently, and
+must be thread safe themselves. So must the policies and filters given to
+:meth:`~matils.patterns.observer.Observable.register`, which keep their state
+and counters without locking.
+"""
+
+import threading
+
+from matils.patterns.observer import (_BROADCAST, Observable, _Deferral,
+                                      _dereference)
+
+
+class ThreadSafeObservable(Observable):
+    """
+    Observable safe to use from many threads at once.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param weak: see :class:`~matils.patterns.observer.Observable`.
+    """
+
+    def __init__(self, unique=False, weak=False):
+        """Initialize the Observers list and the lock of the writers."""
+        # Reentrant, the finalizer callbacks of weak mode may run while the
+        # lock is held by the same thread.
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        """Holds the deferral of each thread running a deferred block."""
+        self._deferring = 0
+        """Number of threads running a deferred block."""
+        self._flushing = 0
+        """Number of threads flushing a deferred block."""
+        super().__init__(unique, weak)
+
+    @property
+    def observers(self):
+        """
+        Snapshot of the registry, mapping each event to its observers.
+
+        Unlike :attr:`Observable.observers`, a new dictionary is built after
+        the registry changes, instead of refreshing the previous one in place,
+        so that a snapshot taken by a thread is not changed by another.
+        """
+        if self._weak or self._observers_view_stale:
+            with self._lock:
+                if self._observers_view_stale and not self._weak:
+                    self._observers_view = dict()
+                return super().observers
+        return self._observers_view
+
+    def register(self, observer, event='all', policy=None, where=None):
+        """
+        Register an observer, see :meth:`Observable.register`.
+
+        Notifications already being delivered by other threads are not
+        affected.
+        """
+        with self._lock:
+            super().register(observer, event, policy, where)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unregister an observer, see :meth:`Observable.unregister`.
+
+        Notifications already being delivered by other threads may still
+        reach the observer once it is unregistered.
+        """
+        with self._lock:
+            return super().unregister(observer, event)
+
+    def reset(self):
+        """Remove all registered observers, see :meth:`Observable.reset`."""
+        with self._lock:
+            super().reset()
+
+    def poll(self):
+        """Deliver the held back notifications, see :meth:`Observable.poll`."""
+        with self._lock:
+            gates = tuple(self._gates.values())
+        for gate in gates:
+            if gate.policy is not None:
+                gate.poll()
+
+    def instrument(self, stats):
+        """Measure the dispatch, see :meth:`Observable.instrument`."""
+        with self._lock:
+            return super().instrument(stats)
+
+    def _current_deferral(self):
+        """Return the deferral of this thread, if any."""
+        return getattr(self._local, 'deferral', None)
+
+    def _start_deferral(self):
+        """
+        Start holding the notifications of this thread back.
+
+        While any thread defers, :meth:`notify` and :meth:`notify_many` are
+        replaced on the instance by ones looking up the deferral of the
+        calling thread, notifying right away without one.
+        """
+        deferral = self._local.deferral = _Deferral()
+        with self._lock:
+            self._deferring += 1
+            if self._deferring == 1:
+                self.notify = self._notify_deferring
+                self.notify_many = self._notify_many_deferring
+        return deferral
+
+    def _stop_deferral(self):
+        """Stop holding the notifications of this thread back."""
+        del self._local.deferral
+        with self._lock:
+            self._deferring -= 1
+            if not self._deferring:
+                del self.notify, self.notify_many
+
+    def _flush_deferral(self, pending):
+        """
+        Notify the coalesced notifications of this thread, once per observer.
+
+        While any thread flushes, :meth:`_recipients` is replaced on the
+        instance by one de-duplicating the observers for the flushing
+        threads only.
+        """
+        local = self._local
+        flushing = getattr(local, 'flushing', False)
+        local.flushing = True
+        with self._lock:
+            self._flushing += 1
+            if self._flushing == 1 and not self._unique:
+                self._recipients = self._recipients_flushing
+        try:
+            self._notify_pending(pending)
+        finally:
+            local.flushing = flushing
+            with self._lock:
+                self._flushing -= 1
+                if not self._flushing and not self._unique:
+                    del self._recipients
+
+    def _recipients_flushing(self, event):
+        """Return the observers of the event, once each in flushing threads."""
+        recipients = type(self)._recipients(self, event)
+        if getattr(self._local, 'flushing', False):
+            return tuple(dict.fromkeys(recipients))
+        return recipients
+
+    def _notify_deferring(self, data, event):
+        """Notify, or hold back if this thread defers."""
+        deferral = getattr(self._local, 'deferral', None)
+        if deferral is None:
+            type(self).notify(self, data, event)
+        else:
+            deferral.notify(data, event)
+
+    def _notify_many_deferring(self, items):
+        """Notify many items, or hold them back if this thread defers."""
+        deferral = getattr(self._local, 'deferral', None)
+        if deferral is None:
+            type(self).notify_many(self, items)
+        else:
+            deferral.notify_many(items)
+
+    def _recipients(self, event):
+        """Return the tuple of observers to be notified, without locking."""
+        table = self._dispatch_table
+        recipients = table.get(event)
+        if recipients is None and event not in self._observers:
+            recipients = table.get(_BROADCAST)
+        if recipients is None:
+            with self._lock:
+                # Another thread may have built it meanwhile...
+                recipients = self._dispatch_table.get(event)
+                if recipients is None:
+                    recipients = self._build_dispatch_entry(event)
+        if self._weak:
+            return tuple(_dereference(recipients))
+        return recipients
+
+    def _forget(self, reference):
+        """Remove the entries of a garbage collected observer."""
+        with self._lock:
+            super()._forget(reference)
@@ -0,0 +1,177 @@
+"""
+Implementation of the Observer Pattern with hierarchical topics.
+
+The :class:`TopicObservable` works like the
+:class:`~matils.patterns.observer.Observable`, but the events are treated as
+dotted topics, like ``sensor.kitchen.temperature``, and observers can register
+to topic patterns using wildcards:
+
+* ``*`` matches exactly one level, ``sensor.*.temperature`` matches the
+  temperature of every sensor.
+* ``#`` matches zero or more levels, ``sensor.#`` matches every topic under
+  ``sensor`` and ``sensor`` itself.
+
+.. code-block:: python
+
+    from matils.patterns.topics import TopicObservable
+
+    class SensorsReader(TopicObservable):
+        def read_sensors_data_loop(self):
+            ...
+            self.notify(temperature_data, 'sensor.kitchen.temperature')
+
+    sensors_reader = SensorsReader()
+    sensors_reader.register(SensorDataAnalizer(), 'sensor.*.temperature')
+
+The patterns are kept in a trie, so resolving the observers of a topic costs
+about its depth, not the number of patterns registered, and the resolution of
+each topic is cached until the patterns matching it change. Observers
+registered to 'all' keep receiving every notification.
+"""
+
+from matils.patterns.observer import Observable, _dereference
+
+
+class _TopicNode:
+    """Node of the trie of topic patterns."""
+
+    __slots__ = ('children', 'star', 'hash', 'pattern')
+
+    def __init__(self):
+        self.children = dict()
+        self.star = None
+        self.hash = None
+        self.pattern = None
+
+
+class TopicObservable(Observable):
+    """
+    Observable matching dotted topics against wildcard patterns.
+
+    Observers registered to an exact topic, to a pattern matching the
+    notified topic and to 'all' are notified, in this order: 'all' first,
+    then the exact topic ones, then each matching pattern in the order the
+    patterns were first registered.
+
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param weak: see :class:`~matils.patterns.observer.Observable`.
+    :param separator: string separating the levels of the topics.
+    :param cache_size: maximum number of topics with a cached resolution.
+    """
+
+    def __init__(self, unique=False, weak=False, separator='.',
+                 cache_size=4096):
+        """Initialize the Observers list and the trie of patterns."""
+        super().__init__(unique, weak)
+        self._separator = separator
+        self._cache_size = cache_size
+        self._trie = _TopicNode()
+        self._patterns = dict()
+        """Maps each pattern in the trie to its registration order."""
+
+    def register(self, observer, event='all', policy=None,
+                 where=None):
+        """
+        Register an observer to a topic or to a topic pattern.
+
+        See :meth:`matils.patterns.observer.Observable.register`.
+        """
+        if event not in self._patterns and self._is_pattern(event):
+            self._insert(event)
+        super().register(observer, event, policy, where)
+
+    def reset(self):
+        """Remove all registered observers and patterns."""
+        self._trie = _TopicNode()
+        self._patterns.clear()
+        super().reset()
+
+    def _is_pattern(self, event):
+        """Tell whether the event is a topic pattern."""
+        if not isinstance(event, str):
+            return False
+        return any(level == '*' or level == '#'
+                   for level in event.split(self._separator))
+
+    def _insert(self, pattern):
+        """Insert a pattern in the trie."""
+        node = self._trie
+        for level in pattern.split(self._separator):
+            if level == '*':
+                if node.star is None:
+                    node.star = _TopicNode()
+                node = node.star
+            elif level == '#':
+                if node.hash is None:
+                    node.hash = _TopicNode()
+                node = node.hash
+            else:
+                child = node.children.get(level)
+                if child is None:
+                    child = node.children[level] = _TopicNode()
+                node = child
+        node.pattern = pattern
+        self._patterns[pattern] = len(self._patterns)
+        self._dispatch_table.clear()
+
+    def _match(self, topic):
+        """Return the patterns matching the topic, in registration order."""
+        if not self._patterns or not isinstance(topic, str):
+            return []
+        matches = dict()
+        _match(self._trie, topic.split(self._separator), 0, matches)
+        return sorted(matches, key=self._patterns.__getitem__)
+
+    def _recipients(self, event):
+        """Return the observers of the topic, resolving the patterns."""
+        if not self._patterns:
+            return super()._recipients(event)
+        # A topic nobody registered to may still match a pattern...
+        recipients = self._dispatch_table.get(event)
+        if recipients is None:
+            recipients = self._build_dispatch_entry(event)
+        if self._weak:
+            return tuple(_dereference(recipients))
+        return recipients
+
+    def _build_dispatch_entry(self, event):
+        """Compute and cache the dispatch table entry of the topic."""
+        patterns = self._match(event)
+        if not patterns:
+            return super()._build_dispatch_entry(event)
+
+        entries = self._entries('all')
+        if event in self._observers and event not in self._patterns:
+            entries.extend(self._entries(event))
+        for pattern in patterns:
+            entries.extend(self._entries(pattern))
+        recipients = self._freeze(entries)
+
+        if len(self._dispatch_table) >= self._cache_size:
+            self._dispatch_table.clear()
+        self._dispatch_table[event] = recipients
+        return recipients
+
+    def _registry_changed(self, event):
+        """Invalidate the data derived from the registry for the event."""
+        if event in self._patterns:
+            # Any cached topic may match the pattern...
+            event = 'all'
+        super()._registry_changed(event)
+
+
+def _match(node, levels, index, matches):
+    """Collect in matches the patterns under node matching levels[index:]."""
+    if index == len(levels):
+        if node.pattern is not None:
+            matches[node.pattern] = None
+    else:
+        child = node.children.get(levels[index])
+        if child is not None:
+            _match(child, levels, index + 1, matches)
+        if node.star is not None:
+            _match(node.star, levels, index + 1, matches)
+    if node.hash is not None:
+        # '#' consumes zero or more of the remaining levels.
+        for end in range(index, len(levels) + 1):
+            _match(node.hash, levels, end, matches)
@@ -0,0 +1,571 @@
+"""
+Publish an Observable to other processes through a Unix domain socket.
+
+A :class:`SocketPublisher` listens on a Unix socket and forwards the
+notifications of an :class:`~matils.patterns.observer.Observable` to the
+processes connected to it. In those processes a :class:`SocketSubscriber` is
+an Observable itself, observers register to it as usual and it subscribes, on
+their behalf, to the events they are interested in.
+
+.. code-block:: python
+
+    # producer process
+    from matils.patterns.transport import SocketPublisher
+
+    sensors_reader = SensorsReader()
+    with SocketPublisher(sensors_reader, '/run/sensors.sock'):
+        sensors_reader.read_sensors_data_loop()
+
+    # consumer process
+    from matils.patterns.transport import SocketSubscriber
+
+    with SocketSubscriber('/run/sensors.sock') as sensors:
+        sensors.register(SensorDataAnalizer(), 'temperature')
+        ...
+
+Messages are framed by a 4 bytes length prefix and serialized by a pluggable
+serializer, any object with ``dumps(obj)`` returning bytes and ``loads(data)``,
+:mod:`pickle` by default. Pickle must only be used between trusted processes,
+anyone able to connect to the socket can run code in the subscribers.
+
+Each notification is serialized once, whatever the number of subscribers, and
+placed in the send buffer of every interested subscriber. A background thread
+writes the buffers to the sockets, joining the frames waiting in a buffer into
+a single write. The buffers are bounded, when a subscriber does not keep up
+its oldest notifications are dropped, and counted, so that it never blocks
+the producer. The confirmations of its requests are never dropped.
+"""
+
+import itertools
+import os
+import pickle
+import selectors
+import socket
+import struct
+import threading
+import traceback
+from collections import deque
+
+from matils.patterns.threadsafe import ThreadSafeObservable
+
+_HEADER = struct.Struct('!I')
+"""Length prefix of the frames."""
+
+
+def _frame(serializer, message):
+    """Serialize a message into a length prefixed frame."""
+    payload = serializer.dumps(message)
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _unframe(buffer):
+    """
+    Split the complete frames at the start of a buffer.
+
+    :return: the list of the frame payloads and the number of bytes used.
+    """
+    payloads = list()
+    start = 0
+    while len(buffer) - start >= _HEADER.size:
+        size, = _HEADER.unpack_from(buffer, start)
+        end = start + _HEADER.size + size
+        if end > len(buffer):
+            break
+        payloads.append(bytes(buffer[start + _HEADER.size:end]))
+        start = end
+    return payloads, start
+
+
+class _Connection:
+    """State of the connection of a subscriber to the publisher."""
+
+    __slots__ = ('socket', 'events', 'frames', 'control', 'size', 'pending',
+                 'dropped', 'incoming', 'writing')
+
+    def __init__(self, socket_):
+        self.socket = socket_
+        self.events = set()
+        self.frames = deque()
+        """Notification frames, the oldest are dropped when full."""
+        self.control = deque()
+        """Confirmation frames, never dropped and written first."""
+        self.size = 0
+        """Bytes in the frames and the pending write."""
+        self.pending = b''
+        """Bytes taken from the frames not written yet."""
+        self.dropped = 0
+        self.incoming = bytearray()
+        self.writing = False
+
+
+class _Fanout:
+    """Observer forwarding the notifications to the interested subscribers."""
+
+    def __init__(self, publisher):
+        self.publisher = publisher
+
+    def update(self, data, event='all'):
+        self.publisher._publish(event, [(data, event)])
+
+    def update_batch(self, items):
+        self.publisher._publish(items[0][1], items)
+
+
+class SocketPublisher:
+    """
+    Forward the notifications of an Observable to a Unix domain socket.
+
+    The publisher registers a single observer to 'all' in the Observable, the
+    notifications of events without subscribers are discarded before being
+    serialized. Notifications given to
+    :meth:`~matils.patterns.observer.Observable.notify_many` are sent as one
+    frame per event.
+
+    :param observable: the Observable to publish.
+    :param path: file system path of the socket, it must not exist.
+    :param serializer: object serializing the messages, with ``dumps`` and
+                       ``loads`` functions.
+    :param max_buffer: bytes buffered per subscriber before its oldest frames
+                       are dropped. A frame bigger than that is still sent.
+    :param max_write: bytes of frames joined in a single write.
+    """
+
+    def __init__(self, observable, path, serializer=pickle,
+                 max_buffer=1 << 20, max_write=1 << 16):
+        """Listen on the socket and start the writer thread."""
+        self.observable = observable
+        self.path = path
+        self._serializer = serializer
+        self._max_buffer = max_buffer
+        self._max_write = max_write
+        self._lock = threading.Condition()
+        self._connections = dict()
+        self._routes = dict()
+        """Cache mapping events to the connections subscribed to them."""
+        self._closed = False
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(path)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._waker.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='SocketPublisher')
+        self._thread.start()
+
+        self._fanout = _Fanout(self)
+        observable.register(self._fanout)
+
+    def __enter__(self):
+        """Use the publisher as a context manager that closes it."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the publisher."""
+        self.close()
+
+    def flush(self, timeout=None):
+        """
+        Wait until the send buffers of every subscriber are empty.
+
+        :param timeout: maximum seconds to wait, None to wait forever.
+        :return: True if every buffer was written, False on timeout.
+        """
+        with self._lock:
+            return self._lock.wait_for(
+                lambda: not any(connection.size for connection
+                                in self._connections.values()), timeout)
+
+    def stats(self):
+        """
+        Return the state of each connected subscriber.
+
+        :return: list of dictionaries with the 'events' subscribed, the bytes
+                 'buffered' and the number of frames 'dropped'.
+        """
+        with self._lock:
+            return [{'events': set(connection.events),
+                     'buffered': connection.size,
+                     'dropped': connection.dropped}
+                    for connection in self._connections.values()]
+
+    def close(self):
+        """Stop publishing, disconnecting every subscriber."""
+        if self._closed:
+            return
+        self._closed = True
+        self.observable.unregister(self._fanout)
+        self._wake()
+        self._thread.join()
+
+    def _publish(self, event, items):
+        """Place a notification in the buffers of its subscribers."""
+        connections = self._routes.get(event)
+        if connections is None:
+            with self._lock:
+                connections = self._routes[event] = tuple(
+                    connection for connection in self._connections.values()
+                    if 'all' in connection.events or event in
+                    connection.events)
+        if connections:
+            frame = _frame(self._serializer, ('notify', items))
+            if self._enqueue(connections, frame):
+                self._wake()
+
+    def _enqueue(self, connections, frame):
+        """
+        Append a frame to the buffers of the connections.
+
+        :return: True if the writer thread must be woken up.
+        """
+        wake = False
+        with self._lock:
+            for connection in connections:
+                frames = connection.frames
+                while frames and \
+                        connection.size + len(frame) > self._max_buffer:
+                    connection.size -= len(frames.popleft())
+                    connection.dropped += 1
+                frames.append(frame)
+                connection.size += len(frame)
+                wake = wake or not connection.writing
+        return wake
+
+    def _confirm(self, connection, request):
+        """Queue the confirmation of a request, ahead of the notifications."""
+        frame = _frame(self._serializer, ('ack', request))
+        with self._lock:
+            connection.control.append(frame)
+            connection.size += len(frame)
+
+    def _wake(self):
+        """Wake the writer thread up."""
+        try:
+            self._waker.send(b'\0')
+        except BlockingIOError:
+            pass  # already plenty of wake ups pending...
+
+    def _run(self):
+        """Main loop of the writer thread."""
+        try:
+            while not self._closed:
+                for key, mask in self._selector.select():
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    elif key.fileobj is self._wakeup:
+                        self._drain_wakeups()
+                    else:
+                        connection = key.data
+                        if mask & selectors.EVENT_READ:
+                            self._read(connection)
+                        if mask & selectors.EVENT_WRITE and \
+                                connection.socket.fileno() != -1:
+                            self._write(connection)
+        finally:
+            for connection in list(self._connections.values()):
+                self._disconnect(connection)
+            self._selector.close()
+            self._listener.close()
+            self._wakeup.close()
+            self._waker.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _accept(self):
+        """Accept the connection of a new subscriber."""
+        try:
+            socket_, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        socket_.setblocking(False)
+        connection = _Connection(socket_)
+        with self._lock:
+            self._connections[socket_] = connection
+        self._selector.register(socket_, selectors.EVENT_READ, connection)
+
+    def _drain_wakeups(self):
+        """Start writing the connections with new frames."""
+        try:
+            while self._wakeup.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self._lock:
+            waiting = [connection for connection in self._connections.values()
+                       if (connection.frames or connection.control) and
+                       not connection.writing]
+        for connection in waiting:
+            self._start_writing(connection)
+
+    def _start_writing(self, connection):
+        """Watch the socket of the connection for writing."""
+        connection.writing = True
+        self._selector.modify(connection.socket,
+                              selectors.EVENT_READ | selectors.EVENT_WRITE,
+                              connection)
+
+    def _read(self, connection):
+        """Read the requests of a subscriber."""
+        try:
+            data = connection.socket.recv(1 << 16)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._disconnect(connection)
+            return
+        connection.incoming += data
+        payloads, used = _unframe(connection.incoming)
+        del connection.incoming[:used]
+        for payload in payloads:
+            try:
+                kind, event, request = self._serializer.loads(payload)
+                if kind not in ('register', 'unregister'):
+                    raise ValueError('unknown request {!r}'.format(kind))
+                hash(event)
+            except Exception:
+                # Only the subscriber sending garbage is cut off.
+                self._disconnect(connection)
+                return
+            with self._lock:
+                if kind == 'register':
+                    connection.events.add(event)
+                else:
+                    connection.events.discard(event)
+                self._routes.clear()
+            self._confirm(connection, request)
+        if connection.control and not connection.writing:
+            self._start_writing(connection)
+
+    def _write(self, connection):
+        """Write the buffered frames of a subscriber, as one write."""
+        with self._lock:
+            if not connection.pending:
+                batch = list()
+                size = 0
+                for frames in (connection.control, connection.frames):
+                    while frames and size < self._max_write:
+                        frame = frames.popleft()
+                        batch.append(frame)
+                        size += len(frame)
+                connection.pending = b''.join(batch)
+        try:
+            sent = connection.socket.send(connection.pending)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._disconnect(connection)
+            return
+        with self._lock:
+            connection.pending = connection.pending[sent:]
+            connection.size -= sent
+            if not connection.pending and not connection.frames and \
+                    not connection.control:
+                connection.writing = False
+                self._selector.modify(connection.socket,
+                                      selectors.EVENT_READ, connection)
+                self._lock.notify_all()
+
+    def _disconnect(self, connection):
+        """Forget a subscriber and close its socket."""
+        with self._lock:
+            if self._connections.pop(connection.socket, None) is None:
+                return
+            self._routes.clear()
+            self._lock.notify_all()
+        self._selector.unregister(connection.socket)
+        connection.socket.close()
+
+
+class _Request:
+    """Request sent by a subscriber, waiting for its confirmation."""
+
+    __slots__ = ('id', 'kind', 'event', 'confirmed')
+
+    def __init__(self, id_, kind, event):
+        self.id = id_
+        self.kind = kind
+        self.event = event
+        self.confirmed = threading.Event()
+
+
+class SocketSubscriber(ThreadSafeObservable):
+    """
+    Observable receiving the notifications of a remote
+    :class:`SocketPublisher`.
+
+    Registering the first observer of an event subscribes to it at the
+    publisher, :meth:`register` returns once the publisher confirmed it, so
+    that every later notification of the event is received. Unregistering the
+    last observer of an event unsubscribes from it. Called from the update of
+    an observer, in the thread receiving the confirmations, :meth:`register`
+    and :meth:`unregister` return without waiting for them.
+
+    The notifications are delivered to the observers by a background thread.
+    Exceptions raised by the observers are not propagated, their formatted
+    tracebacks are kept in :attr:`failures`.
+
+    :param path: file system path of the publisher socket.
+    :param serializer: see :class:`SocketPublisher`, it must match the one of
+                       the publisher.
+    :param timeout: seconds to wait for the publisher to confirm a request.
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    """
+
+    def __init__(self, path, serializer=pickle, timeout=5, unique=False):
+        """Connect to the publisher and start the reader thread."""
+        super().__init__(unique)
+        self._serializer = serializer
+        self._timeout = timeout
+        self._remote = dict()
+        """Maps the events subscribed at the publisher to their request."""
+        self._requests = threading.Lock()
+        self._ids = itertools.count()
+        self._acks = dict()
+        """Maps the ids of the requests not confirmed yet to them."""
+        self.failures = list()
+        """Formatted tracebacks of the exceptions raised by observers."""
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._reader = threading.Thread(target=self._receive, daemon=True,
+                                        name='SocketSubscriber')
+        self._reader.start()
+
+    def __enter__(self):
+        """Use the subscriber as a context manager that closes it."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the subscriber."""
+        self.close()
+
+    def register(self, observer, event='all', policy=None, where=None):
+        """
+        Register an observer, subscribing to the event if needed.
+
+        See :meth:`matils.patterns.observer.Observable.register`.
+
+        :raises ConnectionError: if the publisher did not confirm the
+                                 subscription in time.
+        """
+        with self._requests:
+            super().register(observer, event, policy, where)
+            request = self._remote.get(event)
+            if request is None:
+                request = self._remote[event] = self._request('register',
+                                                              event)
+        self._confirm(request)
+
+    def unregister(self, observer, event="all"):
+        """
+        Unregister an observer, unsubscribing from the events left without
+        observers.
+
+        See :meth:`matils.patterns.observer.Observable.unregister`.
+        """
+        with self._requests:
+            result = super().unregister(observer, event)
+            requests = self._unsubscribe()
+        for request in requests:
+            self._confirm(request)
+        return result
+
+    def reset(self):
+        """Remove all registered observers, unsubscribing from every event."""
+        with self._requests:
+            super().reset()
+            requests = self._unsubscribe()
+        for request in requests:
+            self._confirm(request)
+
+    def close(self):
+        """Disconnect from the publisher."""
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # already disconnected...
+        self._reader.join()
+        self._socket.close()
+
+    def _unsubscribe(self):
+        """
+        Unsubscribe from the events without observers left.
+
+        :return: the requests sent.
+        """
+        requests = list()
+        for event in list(self._remote):
+            if not self._observers.get(event):
+                requests.append(self._request('unregister', event))
+                del self._remote[event]
+        return requests
+
+    def _request(self, kind, event):
+        """Send a request to the publisher, must hold the requests lock."""
+        request = _Request(next(self._ids), kind, event)
+        self._acks[request.id] = request
+        self._socket.sendall(_frame(self._serializer,
+                                    (kind, event, request.id)))
+        return request
+
+    def _confirm(self, request):
+        """
+        Wait for the publisher to confirm a request.
+
+        Returns right away in the reader thread, which receives the
+        confirmations.
+
+        :raises ConnectionError: if the confirmation did not arrive in time.
+        """
+        if threading.current_thread() is self._reader:
+            return
+        if request.confirmed.wait(self._timeout):
+            return
+        self._acks.pop(request.id, None)  # a late confirmation is discarded
+        if request.kind == 'register':
+            with self._requests:
+                if self._remote.get(request.event) is request:
+                    del self._remote[request.event]
+        raise ConnectionError('the publisher did not confirm the {} of '
+                              '{!r}'.format(request.kind, request.event))
+
+    def _receive(self):
+        """Main loop of the reader thread."""
+        incoming = bytearray()
+        while True:
+            try:
+                data = self._socket.recv(1 << 16)
+            except OSError:
+                data = b''
+            if not data:
+                return
+            incoming += data
+            payloads, used = _unframe(incoming)
+            del incoming[:used]
+            for payload in payloads:
+                kind, content = self._serializer.loads(payload)
+                if kind == 'ack':
+                    request = self._acks.pop(content, None)
+                    if request is not None:  # None if it timed out...
+                        request.confirmed.set()
+                else:
+                    self._deliver(content)
+
+    def _deliver(self, items):
+        """Notify the local observers about the received items."""
+        try:
+            if len(items) == 1:
+                data, event = items[0]
+                self.notify(data, event)
+            else:
+                self.notify_many([tuple(item) for item in items])
+        except Exception:
+            self.failures.append(traceback.format_exc())
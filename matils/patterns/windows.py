@@ -0,0 +1,270 @@
+"""
+Implementation of the Observer Pattern for streams of numeric readings.
+
+The :class:`WindowObservable` keeps the readings of each event in a
+preallocated NumPy ring buffer, and its observers receive windows of the most
+recent readings, as NumPy arrays, instead of one reading at a time:
+
+.. code-block:: python
+
+    from matils.patterns.windows import WindowObservable
+
+    class SensorsReader(WindowObservable):
+        ...
+            self.notify({'value': random.uniform(0, 40)}, 'temperature')
+
+    sensors_reader = SensorsReader(field='value')
+    # the mean of the last 60 readings, after each new reading
+    sensors_reader.register(moving_average, 'temperature', window=60,
+                            stride=1)
+    # batches of 100 readings, without overlap
+    sensors_reader.register(SensorDataAnalizer(), 'temperature', window=100)
+
+An observer registered with a ``stride`` smaller than its ``window`` receives
+sliding windows, otherwise tumbling ones, the readings between the windows
+being skipped when the stride is bigger. The first window ends with the
+first reading notified after the registration, or with the ``window``-th
+reading of the event if there are not enough yet, it may hold readings
+notified before the registration.
+
+Only the readings of observed events are kept: the ring of an event is
+allocated when it is first notified with observers, and released once the
+event has no observers left. Notifying an event nobody observes costs no
+more than in an :class:`~matils.patterns.observer.Observable`.
+
+The windows are read-only views of the ring buffer, no reading is copied to
+deliver them, nor to store it beyond the NumPy array assignment. Every
+reading is written twice, in both halves of a buffer of twice the capacity,
+so that the last readings are always contiguous in memory. A view is only
+valid during the update it is given to, the buffer is overwritten by the
+following readings, observers must copy the windows they want to keep.
+
+Requires NumPy.
+"""
+
+from matils.patterns.observer import Observable, _evaluate
+from matils.patterns.policies import Policy
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional
+    numpy = None
+
+
+class _Ring:
+    """Ring buffer of the readings of an event, written twice."""
+
+    __slots__ = ('capacity', 'buffer', 'count')
+
+    def __init__(self, capacity, dtype):
+        self.capacity = capacity
+        self.buffer = numpy.zeros(2 * capacity, dtype)
+        self.count = 0
+        """Number of readings ever appended."""
+
+    def append(self, value):
+        index = self.count % self.capacity
+        self.buffer[index] = self.buffer[index + self.capacity] = value
+        self.count += 1
+
+    def extend(self, values):
+        """Append at most ``capacity`` readings."""
+        capacity, buffer = self.capacity, self.buffer
+        index = self.count % capacity
+        first = min(len(values), capacity - index)
+        buffer[index:index + first] = values[:first]
+        buffer[index + capacity:index + capacity + first] = values[:first]
+        rest = len(values) - first
+        if rest:
+            buffer[:rest] = values[first:]
+            buffer[capacity:capacity + rest] = values[first:]
+        self.count += len(values)
+
+    def window(self, size, end=None):
+        """Return a read-only view of the ``size`` readings before ``end``."""
+        if end is None:
+            end = self.count
+        stop = (end - 1) % self.capacity + self.capacity + 1
+        view = self.buffer[stop - size:stop]
+        view.flags.writeable = False
+        return view
+
+
+class _Advance:
+    """Notification that new readings were appended to a ring."""
+
+    __slots__ = ('ring', 'size')
+
+    def __init__(self, ring, size):
+        self.ring = ring
+        self.size = size
+
+
+class _Windowing(Policy):
+    """Policy turning the readings of a ring into windows."""
+
+    def __init__(self, window, stride):
+        super().__init__()
+        self.window = window
+        self.stride = stride
+        self._due = dict()
+        """Maps events to the count of readings ending their next window."""
+
+    def offer(self, data, event):
+        ring = data.ring
+        due = self._due.get(event)
+        if due is None:
+            due = max(ring.count - data.size + 1, self.window)
+        items = list()
+        while due <= ring.count:
+            items.append((ring.window(self.window, due), event))
+            due += self.stride
+        self._due[event] = due
+        self.delivered += len(items)
+        self.suppressed += data.size - len(items)
+        return items
+
+
+class WindowObservable(Observable):
+    """
+    Observable delivering windows of numeric readings.
+
+    The readings of each observed event are kept in a ring of ``capacity``
+    readings of ``dtype``.
+
+    :param capacity: readings kept per event, the largest possible window.
+    :param dtype: NumPy type of the readings.
+    :param field: key, or attribute, of the notified payloads holding the
+                  reading, None if the payloads are the readings.
+    :param unique: see :class:`~matils.patterns.observer.Observable`.
+    :param weak: see :class:`~matils.patterns.observer.Observable`.
+    """
+
+    def __init__(self, capacity=4096, dtype=float, field=None, unique=False,
+                 weak=False):
+        """Initialize the Observers list and the rings."""
+        if numpy is None:
+            raise ImportError('WindowObservable requires NumPy')
+        super().__init__(unique, weak)
+        self._capacity = capacity
+        self._dtype = dtype
+        self._field = field
+        self._rings = dict()
+
+    def register(self, observer, event='all', window=1, stride=None):
+        """
+        Register an observer to windows of the readings of an event.
+
+        See :meth:`matils.patterns.observer.Observable.register`, the
+        observer is given the windows as ``update(window, event)``.
+
+        :param window: number of readings in each window.
+        :param stride: number of readings between the ends of two windows, by
+                       default the window size.
+        """
+        if not 1 <= window <= self._capacity:
+            raise ValueError('window must be in [1, {}]'.format(
+                self._capacity))
+        if stride is None:
+            stride = window
+        if stride < 1:
+            raise ValueError('stride must be at least 1')
+        super().register(observer, event, policy=_Windowing(window, stride))
+
+    def window(self, event, size):
+        """
+        Return the last readings of an event.
+
+        :return: a read-only view of at most ``size`` readings, empty if the
+                 event has no readings kept, see :class:`WindowObservable`.
+        """
+        ring = self._rings.get(event)
+        if ring is None:
+            return numpy.empty(0, self._dtype)
+        return ring.window(min(size, ring.count, self._capacity))
+
+    def notify(self, data, event):
+        """
+        Store the reading and deliver the windows it completes.
+
+        See :meth:`matils.patterns.observer.Observable.notify`, nothing is
+        stored if the event has no observers. A
+        :class:`~matils.patterns.observer.Lazy` payload is evaluated only
+        then.
+        """
+        recipients = self._recipients(event)
+        if not recipients:
+            return
+        ring = self._ring(event)
+        ring.append(self._reading(data))
+        advance = _Advance(ring, 1)
+        for observer in recipients:
+            observer.update(advance, event)
+
+    def notify_many(self, items):
+        """
+        Store many readings at once and deliver the windows they complete.
+
+        See :meth:`matils.patterns.observer.Observable.notify_many`. The
+        readings of an event are copied into its ring in chunks, as few as
+        the largest window of its observers allows.
+        """
+        batches = dict()
+        for data, event in items:
+            try:
+                batches[event].append(data)
+            except KeyError:
+                batches[event] = [data]
+
+        for event, datas in batches.items():
+            recipients = self._recipients(event)
+            if not recipients:
+                continue
+            ring = self._ring(event)
+            readings = numpy.fromiter(
+                (self._reading(data) for data in datas), self._dtype,
+                len(datas))
+            # Every window ending in a chunk must still be in the ring.
+            span = max((self._window_of(observer) for observer in recipients),
+                       default=1)
+            chunk = self._capacity - span + 1
+            for start in range(0, len(readings), chunk):
+                values = readings[start:start + chunk]
+                ring.extend(values)
+                advance = _Advance(ring, len(values))
+                for observer in recipients:
+                    observer.update(advance, event)
+
+    def _ring(self, event):
+        """Return the ring of an event, created if needed."""
+        ring = self._rings.get(event)
+        if ring is None:
+            ring = self._rings[event] = _Ring(self._capacity, self._dtype)
+        return ring
+
+    def _registry_changed(self, event):
+        """Invalidate the dispatch table, releasing the unobserved rings."""
+        super()._registry_changed(event)
+        if self._observers['all']:
+            return
+        events = self._rings if event == 'all' else (event,)
+        for event in [event for event in events
+                      if event in self._rings and
+                      not self._observers.get(event)]:
+            del self._rings[event]
+
+    def _reading(self, data):
+        """Extract the reading from a payload."""
+        data = _evaluate(data)
+        if self._field is None:
+            return data
+        try:
+            return data[self._field]
+        except (KeyError, IndexError, TypeError):
+            return getattr(data, self._field)
+
+    def _window_of(self, entry):
+        """Return the window size of a dispatch entry."""
+        while not hasattr(entry, 'policy'):
+            entry = entry.target  # measured by a probe...
+        return entry.policy.window
@@ -13,5 +13,6 @@ setup(
                  Library',
     url='https://github.com/mathiasbrito/matils',
     test_suit='tests',
+    python_requires='>=3.8',
     packages=find_packages()
 )
@@ -0,0 +1,60 @@
+"""Helpers shared by the tests of :mod:`matils.patterns`."""
+
+import threading
+from matils.patterns.observer import Observer
+
+
+class Clock:
+    """A clock only moving when told to."""
+
+    def __init__(self):
+        """Start at time zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+class RecorderObserver(Observer):
+    """An observer keeping the notifications it receives."""
+
+    def __init__(self):
+        """Initialize the list of received notifications."""
+        self.received = list()
+
+    def update(self, data, event='all'):
+        """Record the notification."""
+        self.received.append((data, event))
+
+    def events(self):
+        """Return the events received."""
+        return [event for _, event in self.received]
+
+
+class GatedRecorder(RecorderObserver):
+    """Observer keeping the notifications it receives, from any thread."""
+
+    def __init__(self, gate=None):
+        """Initialize the received list, updates wait for the gate if any."""
+        super().__init__()
+        self.gate = gate
+        self.started = threading.Event()
+        self.threads = set()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def update(self, data, event='all'):
+        """Record the notification, its thread and the concurrent updates."""
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self.lock:
+            self.running -= 1
+        self.threads.add(threading.current_thread())
+        self.received.append((data, event))
+        return data
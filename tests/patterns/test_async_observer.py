@@ -0,0 +1,174 @@
+"""Tests for :mod:`async_observer` module's code."""
+
+import asyncio
+from unittest import TestCase
+from matils.patterns.async_observer import AsyncObservable, AsyncObserver
+from matils.patterns.observer import Observer
+from matils.patterns.policies import Debounce
+from tests.patterns.helpers import Clock
+
+
+class GatheringObserver(AsyncObserver):
+    """Async observer that waits for its peers before finishing the update."""
+
+    def __init__(self, state, peers):
+        """Keep the shared state and the number of peers to wait for."""
+        self.state = state
+        self.peers = peers
+        self.received = list()
+
+    async def update(self, data, event='all'):
+        """Wait until every peer is running, then record the notification."""
+        self.state['running'] += 1
+        self.state['max_running'] = max(self.state['max_running'],
+                                        self.state['running'])
+        if self.state['max_running'] >= self.peers:
+            self.state['all_running'].set()
+        await asyncio.wait_for(self.state['all_running'].wait(), 1)
+        self.state['running'] -= 1
+        self.received.append((data, event))
+
+
+class SleepingObserver(AsyncObserver):
+    """Async observer that sleeps longer than any sensible timeout."""
+
+    async def update(self, data, event='all'):
+        """Sleep for a long time."""
+        await asyncio.sleep(60)
+
+
+class SyncRecorder(Observer):
+    """Synchronous observer keeping the notifications it receives."""
+
+    def __init__(self):
+        """Initialize the list of received notifications."""
+        self.received = list()
+
+    def update(self, data, event='all'):
+        """Record the notification."""
+        self.received.append((data, event))
+
+
+def new_state():
+    """Return the state shared by a group of GatheringObserver."""
+    return {'running': 0, 'max_running': 0, 'all_running': asyncio.Event()}
+
+
+class TestAsyncObservable(TestCase):
+    """Test cases for the class AsyncObservable from :mod:`async_observer`."""
+
+    def test_notify_concurrently(self):
+        """
+        Test :meth:`AsyncObservable.notify`.
+
+        It is expected from :meth:`AsyncObservable.notify`:
+            * To run the updates of all the interested observers at the same
+              time, including synchronous observers.
+        """
+        async def scenario():
+            state = new_state()
+            observable = AsyncObservable()
+            observers = [GatheringObserver(state, 3) for _ in range(3)]
+            sync_observer = SyncRecorder()
+            for observer in observers:
+                observable.register(observer, 'event')
+            observable.register(sync_observer)
+
+            await observable.notify(1, 'event')
+            await observable.notify(2, 'unknown')
+            return state, observers, sync_observer
+
+        state, observers, sync_observer = asyncio.run(scenario())
+        self.assertEqual(state['max_running'], 3)
+        for observer in observers:
+            self.assertEqual(observer.received, [(1, 'event')])
+        self.assertEqual(sync_observer.received, [(1, 'event'),
+                                                  (2, 'unknown')])
+
+    def test_notify_concurrency_limit(self):
+        """
+        Test :meth:`AsyncObservable.notify` with a concurrency limit.
+
+        It is expected from :meth:`AsyncObservable.notify`:
+            * To never run more updates at the same time than the limit.
+        """
+        async def scenario():
+            state = new_state()
+            state['all_running'].set()
+            observable = AsyncObservable(concurrency=2)
+            for _ in range(5):
+                observable.register(GatheringObserver(state, 5))
+            await observable.notify(1, 'event')
+            return state
+
+        self.assertEqual(asyncio.run(scenario())['max_running'], 2)
+
+    def test_notify_timeout(self):
+        """
+        Test :meth:`AsyncObservable.notify` with a timeout.
+
+        It is expected from :meth:`AsyncObservable.notify`:
+            * To cancel the updates taking longer than the timeout and raise
+              :class:`asyncio.TimeoutError`.
+            * To deliver the notification to the other observers anyway.
+        """
+        async def scenario():
+            observable = AsyncObservable(timeout=0.01)
+            recorder = SyncRecorder()
+            observable.register(SleepingObserver())
+            observable.register(recorder)
+            with self.assertRaises(asyncio.TimeoutError):
+                await observable.notify(1, 'event')
+            return recorder
+
+        self.assertEqual(asyncio.run(scenario()).received, [(1, 'event')])
+
+    def test_notify_many(self):
+        """
+        Test :meth:`AsyncObservable.notify_many`.
+
+        It is expected from :meth:`AsyncObservable.notify_many`:
+            * To deliver the items of each event in order, to async and
+              synchronous observers.
+        """
+        async def scenario():
+            state = new_state()
+            state['all_running'].set()
+            observable = AsyncObservable()
+            async_observer = GatheringObserver(state, 1)
+            sync_observer = SyncRecorder()
+            observable.register(async_observer, 'event')
+            observable.register(sync_observer, 'event')
+            await observable.notify_many([(1, 'event'), (2, 'other'),
+                                          (3, 'event')])
+            return async_observer, sync_observer
+
+        async_observer, sync_observer = asyncio.run(scenario())
+        self.assertEqual(async_observer.received, [(1, 'event'),
+                                                   (3, 'event')])
+        self.assertEqual(sync_observer.received, [(1, 'event'),
+                                                  (3, 'event')])
+
+    def test_poll(self):
+        """
+        Test :meth:`AsyncObservable.poll`.
+
+        It is expected from :meth:`AsyncObservable.poll`:
+            * To await the delivery of the notifications held back by the
+              registration policies, to async observers.
+        """
+        async def scenario():
+            state, clock = new_state(), Clock()
+            state['all_running'].set()
+            observable = AsyncObservable()
+            observer = GatheringObserver(state, 1)
+            observable.register(observer, 'event', policy=Debounce(1, clock))
+            await observable.notify(1, 'event')
+            await observable.notify(2, 'event')
+            await observable.poll()
+            self.assertEqual(observer.received, [])
+            clock.now = 1
+            await observable.poll()
+            return observer
+
+        self.assertEqual(asyncio.run(scenario()).received, [(2, 'event')])
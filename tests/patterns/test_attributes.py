@@ -0,0 +1,110 @@
+"""Tests for :mod:`attributes` module's code."""
+
+from unittest import TestCase
+from matils.patterns.attributes import ObservableAttribute, tolerance
+from matils.patterns.observer import Observable
+from tests.patterns.helpers import RecorderObserver
+
+
+class CountingEqual:
+    """Comparator counting its calls."""
+
+    def __init__(self):
+        """Start counting."""
+        self.calls = 0
+
+    def __call__(self, old, new):
+        """Compare with ==."""
+        self.calls += 1
+        return old == new
+
+
+class Thermostat(Observable):
+    """An Observable with observable attributes."""
+
+    temperature = ObservableAttribute(equal=tolerance(abs_tol=0.1))
+    mode = ObservableAttribute(default='off', equal=CountingEqual())
+    target = ObservableAttribute(default=20, event='settings')
+    setpoint = ObservableAttribute(default=None, equal=tolerance(abs_tol=0.1))
+
+
+class TestObservableAttribute(TestCase):
+    """Test cases for the class ObservableAttribute from :mod:`attributes`."""
+
+    def test_notify_changes(self):
+        """
+        Test the assignment of an :class:`ObservableAttribute`.
+
+        It is expected from :class:`ObservableAttribute`:
+            * To notify the new value, with the attribute name as event, only
+              when the comparator tells it changed.
+            * To always notify the first value of an attribute without
+              default.
+            * To notify the given event instead, if any.
+        """
+        thermostat, recorder = Thermostat(), RecorderObserver()
+        thermostat.register(recorder)
+        with self.assertRaises(AttributeError):
+            thermostat.temperature
+        thermostat.temperature = 21.5
+        thermostat.temperature = 21.55
+        thermostat.temperature = 22.0
+        thermostat.mode = 'off'
+        thermostat.mode = 'heat'
+        thermostat.target = 22
+        self.assertEqual(thermostat.temperature, 22.0)
+        self.assertEqual(recorder.received, [(21.5, 'temperature'),
+                                             (22.0, 'temperature'),
+                                             ('heat', 'mode'),
+                                             (22, 'settings')])
+
+        del thermostat.mode
+        self.assertEqual(thermostat.mode, 'off')
+        self.assertIsInstance(Thermostat.mode, ObservableAttribute)
+
+    def test_without_listeners(self):
+        """
+        Test the assignment of an :class:`ObservableAttribute` unobserved.
+
+        It is expected from :class:`ObservableAttribute`:
+            * To only store the value, without comparing it.
+            * To compare with the stored value once observed.
+        """
+        thermostat, recorder = Thermostat(), RecorderObserver()
+        thermostat.register(recorder, 'temperature')
+        equal = Thermostat.mode.equal
+        equal.calls = 0
+        thermostat.mode = 'heat'
+        thermostat.mode = 'cool'
+        self.assertEqual(equal.calls, 0)
+        self.assertEqual(thermostat.mode, 'cool')
+
+        thermostat.register(recorder, 'mode')
+        thermostat.mode = 'cool'
+        thermostat.mode = 'heat'
+        self.assertEqual(equal.calls, 2)
+        self.assertEqual(recorder.received, [('heat', 'mode')])
+
+    def test_compare_with_notified(self):
+        """
+        Test the comparison of an :class:`ObservableAttribute`.
+
+        It is expected from :class:`ObservableAttribute`:
+            * To compare the new values with the last notified one, not with
+              the last assigned one.
+            * To compare a default that is not a number with ``==``.
+        """
+        thermostat, recorder = Thermostat(), RecorderObserver()
+        thermostat.register(recorder)
+        thermostat.temperature = 20.0
+        values = [20.0 + 0.04 * step for step in range(1, 5)]
+        for value in values:
+            thermostat.temperature = value
+        self.assertEqual(thermostat.temperature, values[-1])
+        self.assertEqual(recorder.received, [(20.0, 'temperature'),
+                                             (values[2], 'temperature')])
+
+        thermostat.setpoint = 21.0
+        thermostat.setpoint = None
+        self.assertEqual(recorder.received[2:], [(21.0, 'setpoint'),
+                                                 (None, 'setpoint')])
@@ -0,0 +1,211 @@
+"""Tests for :mod:`bus` module's code."""
+
+import gc
+from unittest import TestCase
+from matils.patterns.bus import BusObservable, EventBus
+from tests.patterns.helpers import RecorderObserver
+
+
+class SourceRecorder(RecorderObserver):
+    """An observer keeping the notifications it receives, and their source."""
+
+    def __init__(self, bus):
+        """Initialize the list of received notifications."""
+        super().__init__()
+        self.bus = bus
+
+    def update(self, data, event='all'):
+        """Record the notification and its source."""
+        self.received.append((self.bus.source, data, event))
+
+
+sensors_bus = EventBus()
+
+
+class Sensor(BusObservable):
+    """A source without registry nor instance dictionary."""
+
+    __slots__ = ('name',)
+    bus = sensors_bus
+
+    def __init__(self, name):
+        """Keep the name of the sensor."""
+        self.name = name
+
+
+class TestEventBus(TestCase):
+    """Test cases for the class EventBus from :mod:`bus`."""
+
+    def tearDown(self):
+        """Remove the subscriptions to the shared bus."""
+        sensors_bus.reset()
+
+    def test_routing(self):
+        """
+        Test :meth:`EventBus.publish`.
+
+        It is expected from :meth:`EventBus.publish`:
+            * To deliver the event of a source to the observers of that event
+              or of every event, of that source or of every source.
+            * To tell the observers the source being delivered.
+            * To share the routes of the sources without subscriptions.
+        """
+        kitchen, garage, attic = Sensor('kitchen'), Sensor('garage'), \
+            Sensor('attic')
+        self.assertFalse(hasattr(kitchen, '__dict__'))
+        everything, temperatures, kitchen_all, kitchen_temperature = [
+            SourceRecorder(sensors_bus) for _ in range(4)]
+        sensors_bus.register(everything)
+        sensors_bus.subscribe(temperatures, 'temperature')
+        kitchen.register(kitchen_all)
+        sensors_bus.subscribe(kitchen_temperature, 'temperature', kitchen)
+
+        kitchen.notify(21, 'temperature')
+        kitchen.notify_many([(60, 'humidity')])
+        garage.notify(15, 'temperature')
+        attic.notify(30, 'humidity')
+        sensors_bus.notify(0, 'humidity')
+
+        self.assertEqual(everything.received, [
+            (kitchen, 21, 'temperature'), (kitchen, 60, 'humidity'),
+            (garage, 15, 'temperature'), (attic, 30, 'humidity'),
+            (None, 0, 'humidity')])
+        self.assertEqual(temperatures.received, [
+            (kitchen, 21, 'temperature'), (garage, 15, 'temperature')])
+        self.assertEqual(kitchen_all.received, [
+            (kitchen, 21, 'temperature'), (kitchen, 60, 'humidity')])
+        self.assertEqual(kitchen_temperature.received, [
+            (kitchen, 21, 'temperature')])
+        self.assertIsNone(sensors_bus.source)
+        self.assertEqual(len([route for route in sensors_bus._dispatch_table
+                              if isinstance(route, tuple) and
+                              route[0] in (garage, attic)]), 0)
+        self.assertTrue(garage.has_listeners('humidity'))
+
+    def test_routes_without_observers_of_their_own(self):
+        """
+        Test the routes of :class:`EventBus` without a subscription key.
+
+        It is expected from :meth:`EventBus.publish`:
+            * To deliver an event of a source with subscriptions of its own
+              to the observers of that event from every source, even once
+              the wildcard route is cached.
+        """
+        kitchen = Sensor('kitchen')
+        temperatures, kitchen_humidity = [SourceRecorder(sensors_bus)
+                                          for _ in range(2)]
+        sensors_bus.subscribe(temperatures, 'temperature')
+        kitchen.register(kitchen_humidity, 'humidity')
+
+        sensors_bus.notify(0, 'pressure')
+        kitchen.notify(21, 'temperature')
+        self.assertEqual(temperatures.received,
+                         [(kitchen, 21, 'temperature')])
+
+    def test_route_invalidation(self):
+        """
+        Test the invalidation of the routes of :class:`EventBus`.
+
+        It is expected from :class:`EventBus`:
+            * To keep the routes of the other sources cached when the
+              subscriptions of a source change.
+            * To drop the routes of a source left without subscriptions.
+            * To route the publications to the current observers.
+        """
+        kitchen, garage = Sensor('kitchen'), Sensor('garage')
+        temperatures, recorder = [SourceRecorder(sensors_bus)
+                                  for _ in range(2)]
+        sensors_bus.subscribe(temperatures, 'temperature')
+        garage.register(recorder, 'humidity')
+        sensors_bus.notify(0, 'temperature')
+        garage.notify(1, 'temperature')
+        table = sensors_bus._dispatch_table
+        self.assertIn((None, 'temperature'), table)
+        self.assertIn((garage, 'temperature'), table)
+
+        kitchen.register(recorder, 'humidity')
+        kitchen.register(recorder)
+        self.assertIn((None, 'temperature'), table)
+        self.assertIn((garage, 'temperature'), table)
+        kitchen.notify(2, 'temperature')
+        garage.register(recorder, 'temperature')
+        self.assertNotIn((garage, 'temperature'), table)
+        self.assertIn((kitchen, 'temperature'), table)
+        garage.notify(3, 'temperature')
+        kitchen.unregister(recorder)
+        self.assertNotIn((kitchen, 'temperature'), table)
+        kitchen.notify(4, 'temperature')
+
+        self.assertEqual([data for _, data, _ in temperatures.received],
+                         [0, 1, 2, 3, 4])
+        self.assertEqual(recorder.received, [(kitchen, 2, 'temperature'),
+                                             (garage, 3, 'temperature')])
+
+    def test_deferred(self):
+        """
+        Test :meth:`EventBus.deferred`.
+
+        It is expected from :meth:`EventBus.deferred`:
+            * To hold back the publications of the sources and the
+              notifications without source.
+            * To deliver them on exit coalesced per source and event, with
+              their source, once to each observer.
+        """
+        kitchen, garage = Sensor('kitchen'), Sensor('garage')
+        recorder = SourceRecorder(sensors_bus)
+        sensors_bus.register(recorder)
+        kitchen.register(recorder, 'temperature')
+
+        with sensors_bus.deferred():
+            kitchen.notify(20, 'temperature')
+            garage.notify(10, 'temperature')
+            kitchen.notify_many([(21, 'temperature'), (50, 'humidity')])
+            sensors_bus.notify(0, 'temperature')
+            self.assertEqual(recorder.received, [])
+        self.assertEqual(recorder.received, [
+            (kitchen, 21, 'temperature'), (garage, 10, 'temperature'),
+            (kitchen, 50, 'humidity'), (None, 0, 'temperature')])
+        self.assertNotIn('publish', sensors_bus.__dict__)
+
+    def test_unsubscribe(self):
+        """
+        Test :meth:`EventBus.unsubscribe`.
+
+        It is expected from :meth:`EventBus.unsubscribe`:
+            * To remove the subscriptions matching the event and the source.
+            * To remove, from :meth:`EventBus.unregister` with an event, only
+              the subscription to the event of every source.
+            * To drop the index keys left without observers.
+            * To remove the subscriptions of collected observers in weak
+              mode.
+        """
+        kitchen, garage = Sensor('kitchen'), Sensor('garage')
+        recorder = SourceRecorder(sensors_bus)
+        kitchen.register(recorder, 'temperature')
+        kitchen.register(recorder, 'humidity')
+        garage.register(recorder, 'temperature')
+        sensors_bus.register(recorder, 'temperature')
+
+        self.assertTrue(sensors_bus.unsubscribe(recorder, 'temperature',
+                                                kitchen))
+        kitchen.notify(1, 'humidity')
+        kitchen.notify(2, 'temperature')
+        self.assertEqual([data for _, data, _ in recorder.received], [1, 2])
+        self.assertTrue(kitchen.unregister(recorder))
+        self.assertNotIn(kitchen, sensors_bus._sources)
+        self.assertFalse(kitchen.unregister(recorder))
+        self.assertTrue(sensors_bus.unregister(recorder, 'temperature'))
+        garage.notify(3, 'temperature')
+        self.assertEqual(recorder.received[-1], (garage, 3, 'temperature'))
+        self.assertFalse(sensors_bus.unregister(recorder, 'temperature'))
+        self.assertTrue(garage.unregister(recorder, 'temperature'))
+        self.assertEqual(sensors_bus._sources, {})
+        self.assertEqual(sensors_bus.observers, {'all': []})
+
+        bus = EventBus(weak=True)
+        recorder = SourceRecorder(bus)
+        bus.subscribe(recorder, 'temperature', kitchen)
+        del recorder
+        gc.collect()
+        self.assertFalse(bus.has_listeners('temperature', kitchen))
+        self.assertEqual(bus._sources, {})
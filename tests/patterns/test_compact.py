@@ -0,0 +1,85 @@
+"""Tests for :mod:`compact` module's code."""
+
+from unittest import TestCase
+from matils.patterns.compact import CompactObservable
+from matils.patterns.policies import Sample
+from tests.patterns.helpers import RecorderObserver
+
+
+class Sensor(CompactObservable):
+    """A domain object without instance dictionary."""
+
+    __slots__ = ('name',)
+    unique = True
+
+    def __init__(self, name):
+        """Keep the name of the sensor."""
+        super().__init__()
+        self.name = name
+
+
+class TestCompactObservable(TestCase):
+    """Test cases for the class CompactObservable from :mod:`compact`."""
+
+    def test_lazy_registry(self):
+        """
+        Test the registry of :class:`CompactObservable`.
+
+        It is expected from :class:`CompactObservable`:
+            * To have no instance dictionary in slotted subclasses.
+            * To share a read-only empty observers mapping while unobserved.
+            * To allocate the registry on the first registration and to
+              release it with the last observer.
+        """
+        first, second = Sensor('kitchen'), Sensor('garage')
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertIs(first.observers, second.observers)
+        self.assertEqual(first.observers['all'], ())
+        with self.assertRaises(TypeError):
+            first.observers['all'] = []
+        first.notify(1, 'temperature')
+        self.assertFalse(first.unregister(RecorderObserver()))
+
+        recorder = RecorderObserver()
+        first.register(recorder)
+        first.register(recorder, 'temperature', policy=Sample(2))
+        self.assertIsNone(second._registry)
+        for value in range(3):
+            first.notify(value, 'temperature')
+        first.notify_many([(3, 'humidity')])
+        self.assertEqual(recorder.received, [(0, 'temperature'),
+                                             (1, 'temperature'),
+                                             (2, 'temperature'),
+                                             (3, 'humidity')])
+        self.assertEqual(first.observers['temperature'], [recorder])
+
+        self.assertTrue(first.unregister(recorder, 'temperature'))
+        self.assertIsNotNone(first._registry)
+        self.assertTrue(first.unregister(recorder))
+        self.assertIsNone(first._registry)
+        self.assertIs(first.observers, second.observers)
+
+    def test_deferred(self):
+        """
+        Test :meth:`CompactObservable.deferred`.
+
+        It is expected from :meth:`CompactObservable.deferred`:
+            * To deliver the notifications of the block coalesced on exit.
+            * To keep the registry while deferring, even without observers,
+              and to release it afterwards.
+        """
+        sensor, recorder = Sensor('kitchen'), RecorderObserver()
+        with sensor.deferred(lambda previous, data: previous + data):
+            sensor.notify(1, 'temperature')
+            sensor.register(recorder)
+            sensor.notify(2, 'temperature')
+            self.assertTrue(sensor.unregister(recorder))
+            self.assertIsNotNone(sensor._registry)
+            sensor.register(recorder)
+            self.assertEqual(recorder.received, [])
+        self.assertEqual(recorder.received, [(3, 'temperature')])
+
+        sensor.unregister(recorder)
+        with sensor.deferred():
+            sensor.notify(1, 'temperature')
+        self.assertIsNone(sensor._registry)
@@ -0,0 +1,260 @@
+"""Tests for :mod:`executor` module's code."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from matils.patterns.executor import ExecutorObservable, QueuedObservable
+from matils.patterns.observer import Observer
+from matils.patterns.policies import Debounce
+from tests.patterns.helpers import GatedRecorder
+
+
+class FailingObserver(Observer):
+    """Observer whose update always fails."""
+
+    def update(self, data, event='all'):
+        """Raise ValueError."""
+        raise ValueError(data)
+
+
+class TestExecutorObservable(TestCase):
+    """Test cases for the class ExecutorObservable from :mod:`executor`."""
+
+    def test_notify_keeps_order_per_observer(self):
+        """
+        Test :meth:`ExecutorObservable.notify`.
+
+        It is expected from :meth:`ExecutorObservable.notify`:
+            * To return without waiting for the updates.
+            * To deliver the notifications to each observer one at a time and
+              in the order they were made, even with a small quota.
+        """
+        gate = threading.Event()
+        slow, fast = GatedRecorder(gate), GatedRecorder()
+        with ExecutorObservable(max_workers=4, quota=2) as observable:
+            observable.register(slow)
+            observable.register(fast, 'event')
+            for value in range(20):
+                observable.notify(value, 'event')
+            self.assertTrue(observable.pending > 0)
+            self.assertLess(len(slow.received), 20)
+            gate.set()
+            self.assertTrue(observable.flush(5))
+            self.assertEqual(observable.pending, 0)
+
+        expected = [(value, 'event') for value in range(20)]
+        self.assertEqual(slow.received, expected)
+        self.assertEqual(fast.received, expected)
+        self.assertEqual(slow.max_running, 1)
+
+    def test_notify_futures(self):
+        """
+        Test the futures returned by :meth:`ExecutorObservable.notify`.
+
+        It is expected from :meth:`ExecutorObservable.notify`:
+            * To return one future per update with its result or exception.
+        """
+        with ExecutorObservable() as observable:
+            observable.register(GatedRecorder())
+            observable.register(FailingObserver(), 'event')
+            futures = observable.notify(42, 'event')
+
+            self.assertEqual(len(futures), 2)
+            results = list()
+            for future in futures:
+                if future.exception(5) is None:
+                    results.append(future.result())
+                else:
+                    self.assertIsInstance(future.exception(), ValueError)
+            self.assertEqual(results, [42])
+
+    def test_notify_many(self):
+        """
+        Test :meth:`ExecutorObservable.notify_many`.
+
+        It is expected from :meth:`ExecutorObservable.notify_many`:
+            * To deliver the items of each event in order.
+        """
+        recorder = GatedRecorder()
+        with ExecutorObservable() as observable:
+            observable.register(recorder, 'event')
+            futures = observable.notify_many([(1, 'event'), (2, 'other'),
+                                              (3, 'event')])
+            self.assertEqual(len(futures), 1)
+        self.assertEqual(recorder.received, [(1, 'event'), (3, 'event')])
+
+    def test_shutdown(self):
+        """
+        Test :meth:`ExecutorObservable.shutdown`.
+
+        It is expected from :meth:`ExecutorObservable.shutdown`:
+            * To refuse notifications afterwards with RuntimeError.
+            * To leave alone an executor given to the Observable.
+        """
+        executor = ThreadPoolExecutor(1)
+        observable = ExecutorObservable(executor=executor)
+        observable.register(GatedRecorder())
+        observable.shutdown()
+        with self.assertRaises(RuntimeError):
+            observable.notify(1, 'event')
+        self.assertEqual(executor.submit(sum, [1, 2]).result(5), 3)
+        executor.shutdown()
+
+    def test_poll(self):
+        """
+        Test :meth:`ExecutorObservable.poll`.
+
+        It is expected from :meth:`ExecutorObservable.poll`:
+            * To deliver the notifications held back by the policies in the
+              lane of their observer, after the updates already queued.
+        """
+        gate = threading.Event()
+        recorder = GatedRecorder(gate)
+        with ExecutorObservable() as observable:
+            observable.register(recorder, 'reading')
+            observable.register(recorder, 'alarm', policy=Debounce(0))
+            observable.notify(1, 'reading')
+            observable.notify(2, 'alarm')
+            self.assertTrue(recorder.started.wait(5))
+            futures = observable.poll()
+            observable.notify(3, 'reading')
+            self.assertEqual(len(futures), 1)
+            gate.set()
+            self.assertTrue(observable.flush(5))
+
+        self.assertEqual(recorder.received, [(1, 'reading'), (2, 'alarm'),
+                                             (3, 'reading')])
+        self.assertEqual(recorder.max_running, 1)
+        self.assertNotIn(threading.main_thread(), recorder.threads)
+
+
+class TestQueuedObservable(TestCase):
+    """Test cases for the class QueuedObservable from :mod:`executor`."""
+
+    def overflow(self, policy, notifications):
+        """
+        Notify a blocked observer and return it with its statistics.
+
+        The observer blocks in the first notification, an 'event' 0, while the
+        others are notified, then it is released.
+        """
+        gate = threading.Event()
+        slow = GatedRecorder(gate)
+        with QueuedObservable(maxsize=2, overflow=policy) as observable:
+            observable.register(slow)
+            observable.notify(0, 'event')
+            self.assertTrue(slow.started.wait(5))
+            futures = [observable.notify(data, event).pop()
+                       for data, event in notifications]
+            stats = observable.stats()[slow]
+            self.assertEqual(stats['depth'], observable.depth(slow))
+            self.assertEqual(stats['dropped'], observable.dropped(slow))
+            gate.set()
+        return slow, stats, futures
+
+    def test_drop_oldest(self):
+        """
+        Test :class:`QueuedObservable` with the drop oldest policy.
+
+        It is expected from :class:`QueuedObservable`:
+            * To drop the oldest pending updates, cancelling their futures.
+        """
+        slow, stats, futures = self.overflow(
+            QueuedObservable.DROP_OLDEST, [(1, 'event'), (2, 'event'),
+                                           (3, 'event'), (4, 'event')])
+        self.assertEqual(stats, {'depth': 2, 'dropped': 2})
+        self.assertEqual(slow.received, [(0, 'event'), (3, 'event'),
+                                         (4, 'event')])
+        self.assertEqual([future.cancelled() for future in futures],
+                         [True, True, False, False])
+
+    def test_drop_newest(self):
+        """
+        Test :class:`QueuedObservable` with the drop newest policy.
+
+        It is expected from :class:`QueuedObservable`:
+            * To drop the new notifications while the buffer is full.
+        """
+        slow, stats, futures = self.overflow(
+            QueuedObservable.DROP_NEWEST, [(1, 'event'), (2, 'event'),
+                                           (3, 'event'), (4, 'event')])
+        self.assertEqual(stats, {'depth': 2, 'dropped': 2})
+        self.assertEqual(slow.received, [(0, 'event'), (1, 'event'),
+                                         (2, 'event')])
+
+    def test_conflate(self):
+        """
+        Test :class:`QueuedObservable` with the conflate policy.
+
+        It is expected from :class:`QueuedObservable`:
+            * To keep only the latest pending data of each event, in the
+              position of the first one.
+            * To drop the oldest pending update when full of other events.
+        """
+        slow, stats, futures = self.overflow(
+            QueuedObservable.CONFLATE, [(1, 'temperature'), (2, 'humidity'),
+                                        (3, 'temperature'), (4, 'humidity')])
+        self.assertEqual(stats, {'depth': 2, 'dropped': 2})
+        self.assertEqual(slow.received, [(0, 'event'), (3, 'temperature'),
+                                         (4, 'humidity')])
+
+        slow, stats, futures = self.overflow(
+            QueuedObservable.CONFLATE, [(1, 'temperature'), (2, 'humidity'),
+                                        (3, 'pressure')])
+        self.assertEqual(slow.received, [(0, 'event'), (2, 'humidity'),
+                                         (3, 'pressure')])
+
+    def test_block(self):
+        """
+        Test :class:`QueuedObservable` with the block policy.
+
+        It is expected from :class:`QueuedObservable`:
+            * To make the producer wait while the buffer is full, delivering
+              every notification.
+        """
+        gate = threading.Event()
+        slow = GatedRecorder(gate)
+        with QueuedObservable(maxsize=1) as observable:
+            observable.register(slow)
+            observable.notify(0, 'event')
+            self.assertTrue(slow.started.wait(5))
+            observable.notify(1, 'event')
+
+            producer = threading.Thread(target=observable.notify,
+                                        args=(2, 'event'))
+            producer.start()
+            producer.join(0.05)
+            self.assertTrue(producer.is_alive())
+            gate.set()
+            producer.join(5)
+            self.assertFalse(producer.is_alive())
+
+        self.assertEqual(slow.received, [(0, 'event'), (1, 'event'),
+                                         (2, 'event')])
+        self.assertEqual(observable.dropped(slow), 0)
+
+    def test_poll(self):
+        """
+        Test :meth:`QueuedObservable.poll` with the conflate policy.
+
+        It is expected from :meth:`QueuedObservable.poll`:
+            * To queue the polls in the lane, without conflating them with
+              the notifications.
+        """
+        gate = threading.Event()
+        recorder = GatedRecorder(gate)
+        with QueuedObservable(overflow=QueuedObservable.CONFLATE) as \
+                observable:
+            observable.register(recorder, 'reading')
+            observable.register(recorder, 'alarm', policy=Debounce(0))
+            observable.notify(1, 'reading')
+            self.assertTrue(recorder.started.wait(5))
+            observable.notify(2, 'alarm')
+            observable.notify(3, 'reading')
+            observable.poll()
+            gate.set()
+            self.assertTrue(observable.flush(5))
+
+        self.assertEqual(recorder.received, [(1, 'reading'), (3, 'reading'),
+                                             (2, 'alarm')])
+        self.assertEqual(observable.dropped(recorder), 0)
@@ -0,0 +1,123 @@
+"""Tests for :mod:`filters` module's code."""
+
+from unittest import mock
+from unittest import TestCase, skipIf
+from matils.patterns import filters
+from matils.patterns.filters import Field
+from matils.patterns.observer import Observable
+from tests.patterns.helpers import RecorderObserver
+
+
+class BatchRecorder(RecorderObserver):
+    """An observer keeping the notifications it receives, and its batches."""
+
+    def __init__(self):
+        """Initialize the list of received notifications."""
+        super().__init__()
+        self.batches = 0
+
+    def update_batch(self, items):
+        """Record the notifications of the batch."""
+        self.batches += 1
+        self.received.extend(items)
+
+
+class Reading:
+    """Payload exposing its fields as attributes."""
+
+    def __init__(self, value):
+        """Keep the value."""
+        self.value = value
+
+
+READINGS = [{'value': 10}, {'value': 36.5}, {'value': 20}, {'other': 50},
+            {'value': 'hot'}, {'value': 40, 'error': True}, {'value': -1}]
+
+
+class TestFilters(TestCase):
+    """Test cases for the filters from :mod:`filters`."""
+
+    def check_filters(self):
+        """Check the filters over READINGS, one by one and in batches."""
+        cases = [
+            (Field('value') > 35, [1, 5]),
+            (Field('value').between(10, 20), [0, 2]),
+            (~(Field('value') >= 0), [3, 4, 6]),
+            ((Field('value') < 0) | Field('error'), [5, 6]),
+            (Field('error') & (Field('value') == 40), [5]),
+            (Field('value').isin(['hot', 10]), [0, 4]),
+            (Field('value') != 10, [1, 2, 4, 5, 6]),
+        ]
+        for where, expected in cases:
+            for batched in (False, True):
+                rejected = where.rejected
+                observable, recorder = Observable(), BatchRecorder()
+                observable.register(recorder, 'reading', where=where)
+                if batched:
+                    observable.notify_many([(reading, 'reading')
+                                            for reading in READINGS])
+                    self.assertEqual(recorder.batches, 1)
+                else:
+                    for reading in READINGS:
+                        observable.notify(reading, 'reading')
+                self.assertEqual(
+                    [READINGS.index(data) for data, _ in recorder.received],
+                    expected)
+                self.assertEqual(where.rejected - rejected,
+                                 len(READINGS) - len(expected))
+
+    def test_filters(self):
+        """
+        Test filters given to :meth:`Observable.register`.
+
+        It is expected from the filters:
+            * To deliver only the matching payloads, one by one or in batch.
+            * To never match payloads missing the field or with values not
+              comparable to the filter.
+            * To count the payloads rejected.
+        """
+        self.check_filters()
+
+    def test_filters_without_numpy(self):
+        """
+        Test filters given to :meth:`Observable.register` without NumPy.
+
+        It is expected from the filters:
+            * To give the same results evaluating the batches row by row.
+        """
+        with mock.patch.object(filters, 'numpy', None):
+            self.check_filters()
+
+    def test_attributes_and_payload(self):
+        """
+        Test filters on attributes and on the payload itself.
+
+        It is expected from the filters:
+            * To read fields from the payload attributes.
+            * To compare the whole payload with an unnamed Field.
+        """
+        observable, recorder = Observable(), BatchRecorder()
+        observable.register(recorder, 'object', where=Field('value') > 1)
+        observable.register(recorder, 'scalar', where=Field() < 0)
+        observable.notify(Reading(0), 'object')
+        observable.notify(Reading(2), 'object')
+        observable.notify_many([(-1, 'scalar'), (1, 'scalar'), (-2, 'scalar')])
+        self.assertEqual([data if isinstance(data, int) else data.value
+                          for data, _ in recorder.received], [2, -1, -2])
+
+    @skipIf(filters.numpy is None, 'NumPy is not installed')
+    def test_vectorized_mask(self):
+        """
+        Test :meth:`Filter.mask` over numeric fields.
+
+        It is expected from :meth:`Filter.mask`:
+            * To gather numeric fields in a NumPy array, once per field.
+        """
+        datas = [{'value': value} for value in range(10)]
+        where = Field('value').between(3, 5) | (Field('value') > 8)
+        columns = dict()
+        mask = where.mask(datas, columns)
+        self.assertIsInstance(mask, filters.numpy.ndarray)
+        self.assertEqual(list(columns), ['value'])
+        self.assertEqual([index for index, match in enumerate(mask) if match],
+                         [3, 4, 5, 9])
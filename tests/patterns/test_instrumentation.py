@@ -0,0 +1,138 @@
+"""Tests for :mod:`instrumentation` module's code."""
+
+import asyncio
+import time
+from unittest import TestCase
+from matils.patterns.async_observer import AsyncObservable, AsyncObserver
+from matils.patterns.instrumentation import DispatchStats
+from matils.patterns.observer import Observable, Observer
+from tests.patterns.helpers import RecorderObserver
+
+
+class SlowRecorder(RecorderObserver):
+    """An observer keeping the notifications it receives, after a delay."""
+
+    def __init__(self, delay=0):
+        """Initialize the list of received notifications."""
+        super().__init__()
+        self.delay = delay
+
+    def update(self, data, event='all'):
+        """Record the notification, after sleeping for the delay."""
+        if self.delay:
+            time.sleep(self.delay)
+        super().update(data, event)
+
+
+class FailingObserver(Observer):
+    """Observer whose update always fails."""
+
+    def update(self, data, event='all'):
+        """Raise ValueError."""
+        raise ValueError(data)
+
+
+class SleepyObserver(AsyncObserver):
+    """Asynchronous observer taking some time to update."""
+
+    async def update(self, data, event='all'):
+        """Sleep for a while."""
+        await asyncio.sleep(0.01)
+
+
+class TestDispatchStats(TestCase):
+    """Test cases for the class DispatchStats from :mod:`instrumentation`."""
+
+    def test_counts(self):
+        """
+        Test the counts of :class:`DispatchStats`.
+
+        It is expected from :class:`DispatchStats`:
+            * To count the calls, items and failures of each observer and
+              event, with their latencies.
+            * To stop counting once the Observable is no longer instrumented.
+        """
+        observable = Observable()
+        recorder, failing = SlowRecorder(), FailingObserver()
+        observable.register(recorder)
+        observable.register(failing, 'humidity')
+        stats = DispatchStats(label=lambda observer: type(observer).__name__)
+        self.assertIsNone(observable.instrument(stats))
+
+        observable.notify(1, 'temperature')
+        observable.notify(2, 'temperature')
+        with self.assertRaises(ValueError):
+            observable.notify(3, 'humidity')
+        observable.notify_many([(4, 'temperature'), (5, 'temperature')])
+
+        snapshot = stats.snapshot()
+        recorded = snapshot['observers']['SlowRecorder']
+        self.assertEqual(recorded['calls'], 4)
+        self.assertEqual(recorded['items'], 5)
+        self.assertEqual(recorded['failures'], 0)
+        self.assertEqual(sum(recorded['histogram'].values()), 4)
+        self.assertGreaterEqual(recorded['total_ns'], recorded['max_ns'])
+        self.assertEqual(snapshot['observers']['FailingObserver']['failures'],
+                         1)
+        self.assertEqual(snapshot['events']['temperature']['calls'], 3)
+        self.assertEqual(snapshot['events']['humidity']['calls'], 2)
+        self.assertEqual(len(recorder.received), 5)
+
+        self.assertIs(observable.instrument(None), stats)
+        observable.notify(6, 'temperature')
+        self.assertEqual(stats.snapshot(), snapshot)
+        stats.reset()
+        self.assertEqual(stats.snapshot(), {'observers': {}, 'events': {}})
+
+    def test_slow_observer(self):
+        """
+        Test the slow observer detection of :class:`DispatchStats`.
+
+        It is expected from :class:`DispatchStats`:
+            * To call on_slow with the observer, the event and the duration of
+              the updates slower than the threshold, and only of them.
+        """
+        slow_calls = list()
+        stats = DispatchStats(slow_threshold=0.01, on_slow=lambda *args:
+                              slow_calls.append(args))
+        observable = Observable(unique=True)
+        slow, fast = SlowRecorder(0.02), SlowRecorder()
+        observable.register(slow)
+        observable.register(slow, 'temperature')
+        observable.register(fast, 'temperature')
+        observable.instrument(stats)
+        observable.notify(1, 'temperature')
+
+        self.assertEqual(len(slow_calls), 1)
+        observer, event, seconds = slow_calls[0]
+        self.assertIs(observer, slow)
+        self.assertEqual(event, 'temperature')
+        self.assertGreaterEqual(seconds, 0.02)
+        self.assertEqual(stats.snapshot()['events']['temperature']['slow'], 1)
+
+    def test_async_and_weak(self):
+        """
+        Test :class:`DispatchStats` with asynchronous and weak Observables.
+
+        It is expected from :class:`DispatchStats`:
+            * To measure asynchronous updates until they complete.
+            * To label bound methods and not keep weak observers alive.
+        """
+        stats = DispatchStats()
+        observable = AsyncObservable()
+        observable.register(SleepyObserver())
+        observable.instrument(stats)
+        asyncio.run(observable.notify(1, 'event'))
+        self.assertGreaterEqual(
+            stats.snapshot()['events']['event']['total_ns'], 10 ** 7)
+
+        stats = DispatchStats()
+        observable = Observable(weak=True)
+        recorder = SlowRecorder()
+        observable.register(recorder.update, 'event')
+        observable.instrument(stats)
+        observable.notify(1, 'event')
+        label, = stats.snapshot()['observers']
+        self.assertIn('SlowRecorder.update', label)
+        del recorder
+        self.assertEqual(observable.observers['event'], [])
@@ -0,0 +1,114 @@
+"""Tests for :mod:`journal` module's code."""
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from matils.patterns.filters import Field
+from matils.patterns.journal import Journal, JournaledObservable
+from tests.patterns.helpers import Clock, RecorderObserver
+
+
+class TestJournal(TestCase):
+    """Test cases for the class Journal from :mod:`journal`."""
+
+    def setUp(self):
+        """Create a directory for the journal."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the directory of the journal."""
+        shutil.rmtree(self.directory)
+
+    def test_rotation_and_recovery(self):
+        """
+        Test the segments of :class:`Journal`.
+
+        It is expected from :class:`Journal`:
+            * To rotate the segments once full, giving big records a segment
+              of their own.
+            * To read the records across segments, from any offset.
+            * To recover its records and offsets when opened again.
+            * To discard whole segments only.
+        """
+        with Journal(self.directory, segment_size=256) as journal:
+            for value in range(20):
+                self.assertEqual(journal.append('event', value), value)
+            journal.append('big', bytes(1000))
+            journal.append('event', 20)
+
+        segments = sorted(os.listdir(self.directory))
+        self.assertGreater(len(segments), 3)
+        with Journal(self.directory, segment_size=256) as journal:
+            self.assertEqual(journal.next_offset, 22)
+            self.assertEqual(journal.append('event', 21), 22)
+            records = list(journal.records(5))
+            self.assertEqual([record.offset for record in records],
+                             list(range(5, 23)))
+            self.assertEqual(records[15].data, bytes(1000))
+            self.assertEqual([record.data for record in
+                              journal.records(event='event')],
+                             list(range(22)))
+
+            first = journal.discard(10)
+            self.assertLessEqual(first, 10)
+            self.assertEqual(journal.first_offset, first)
+            self.assertEqual(next(journal.records()).offset, first)
+            self.assertEqual(len(os.listdir(self.directory)),
+                             len(segments) - len(
+                                 [name for name in segments
+                                  if int(name[:-4]) < first]))
+
+    def test_records_since_time(self):
+        """
+        Test :meth:`Journal.records` from a point in time.
+
+        It is expected from :meth:`Journal.records`:
+            * To skip the records older than the given time.
+        """
+        clock = Clock()
+        with Journal(self.directory, segment_size=128, clock=clock) as journal:
+            for value in range(30):
+                clock.now = value
+                journal.append('event', value)
+            self.assertEqual([record.data for record in
+                              journal.records(since_time=25.0)],
+                             [25, 26, 27, 28, 29])
+
+
+class TestJournaledObservable(TestCase):
+    """Test cases for the class JournaledObservable from :mod:`journal`."""
+
+    def setUp(self):
+        """Create a directory for the journal."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the directory of the journal."""
+        shutil.rmtree(self.directory)
+
+    def test_register_since(self):
+        """
+        Test :meth:`JournaledObservable.register` with a replay.
+
+        It is expected from :meth:`JournaledObservable.register`:
+            * To replay the notifications of the event from the offset,
+              filtered, then to deliver the live ones.
+            * To replay nothing without since or since_time.
+        """
+        with Journal(self.directory) as journal:
+            observable = JournaledObservable(journal)
+            for value in range(5):
+                observable.notify({'value': value}, 'temperature')
+                observable.notify({'value': value}, 'humidity')
+
+            late, live = RecorderObserver(), RecorderObserver()
+            observable.register(late, 'temperature', since=4,
+                                where=Field('value') != 3)
+            observable.register(live, 'temperature')
+            observable.notify_many([({'value': 5}, 'temperature')])
+
+        self.assertEqual(late.received, [({'value': 2}, 'temperature'),
+                                         ({'value': 4}, 'temperature'),
+                                         ({'value': 5}, 'temperature')])
+        self.assertEqual(live.received, [({'value': 5}, 'temperature')])
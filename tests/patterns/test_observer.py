@@ -1,8 +1,11 @@
 """Tests for :mod:`observer` module's code."""
 
+import gc
+import weakref
 from unittest import mock
 from unittest import TestCase
-from matils.patterns.observer import Observable, Observer
+from matils.patterns.observer import Lazy, Observable, Observer
+from tests.patterns.helpers import RecorderObserver
 
 
 class DummyObserver(Observer):
@@ -172,3 +175,337 @@ class TestObservable(TestCase):
         self.assertTrue('all' in observable.observers.keys())
         # reference to the original dict must be preserved
         self.assertIs(observable.observers, observers_dict_original_ref)
+
+    def test_register_twice(self):
+        """
+        Test :meth:`Observable.register` with an already registered observer.
+
+        It is expected from :meth:`Observable.register`:
+            * To ignore a second registration to the same event, keeping the
+              original position of the observer in the notification order.
+        """
+        observable = Observable()
+        dummy1, dummy2 = DummyObserver(), DummyObserver()
+
+        observable.register(dummy1, 'event')
+        observable.register(dummy2, 'event')
+        observable.register(dummy1, 'event')
+        self.assertEqual(observable.observers['event'], [dummy1, dummy2])
+
+    def test_unregister_keeps_other_subscriptions(self):
+        """
+        Test :meth:`Observable.unregister` does not touch other observers.
+
+        It is expected from :meth:`Observable.unregister`:
+            * To remove only the given observer, keeping the order of the
+              remaining ones, and the events it was registered to.
+            * To forget the observer completely after removing it from its
+              last event.
+        """
+        observable = Observable()
+        dummies = [DummyObserver() for _ in range(4)]
+        for dummy in dummies:
+            observable.register(dummy)
+            observable.register(dummy, 'event')
+
+        self.assertTrue(observable.unregister(dummies[1]))
+        self.assertEqual(observable.observers['all'],
+                         [dummies[0], dummies[2], dummies[3]])
+        self.assertEqual(observable.observers['event'],
+                         [dummies[0], dummies[2], dummies[3]])
+
+        self.assertTrue(observable.unregister(dummies[2], 'event'))
+        self.assertTrue(observable.unregister(dummies[2], 'all'))
+        self.assertFalse(observable.unregister(dummies[2]))
+        self.assertEqual(observable.observers['event'],
+                         [dummies[0], dummies[3]])
+
+    def test_notify_unique(self):
+        """
+        Test :meth:`Observable.notify` on an Observable created as unique.
+
+        It is expected from :meth:`Observable.notify`:
+            * To notify only once an observer registered to 'all' and to the
+              notified event, when the Observable was created as unique.
+            * To notify it twice otherwise.
+        """
+        recorder = RecorderObserver()
+        observable = Observable(unique=True)
+        observable.register(recorder)
+        observable.register(recorder, 'event')
+        observable.notify(1, 'event')
+        self.assertEqual(recorder.received, [(1, 'event')])
+
+        recorder = RecorderObserver()
+        observable = Observable()
+        observable.register(recorder)
+        observable.register(recorder, 'event')
+        observable.notify(1, 'event')
+        self.assertEqual(recorder.received, [(1, 'event'), (1, 'event')])
+
+    def test_notify_after_registry_changes(self):
+        """
+        Test :meth:`Observable.notify` follows changes in the registry.
+
+        It is expected from :meth:`Observable.notify`:
+            * To notify observers registered after previous notifications of
+              the same event, and to stop notifying unregistered ones.
+        """
+        observable = Observable()
+        first, second = RecorderObserver(), RecorderObserver()
+
+        observable.register(first, 'event')
+        observable.notify(1, 'event')
+        observable.notify(1, 'other')
+        observable.register(second)
+        observable.notify(2, 'event')
+        observable.notify(2, 'other')
+        observable.unregister(first, 'event')
+        observable.notify(3, 'event')
+        observable.reset()
+        observable.notify(4, 'event')
+
+        self.assertEqual(first.received, [(1, 'event'), (2, 'event')])
+        self.assertEqual(second.received,
+                         [(2, 'event'), (2, 'other'), (3, 'event')])
+
+    def test_notify_unobserved_events(self):
+        """
+        Test :meth:`Observable.notify` about events nobody registered to.
+
+        It is expected from :meth:`Observable.notify`:
+            * To notify the 'all' observers only.
+            * To build the shared dispatch entry of such events once, until
+              the registry changes.
+        """
+        observable, recorder = Observable(), RecorderObserver()
+        observable.register(RecorderObserver(), 'event')
+        observable.register(recorder)
+        build_entry = observable._build_dispatch_entry
+        with mock.patch.object(observable, '_build_dispatch_entry',
+                               wraps=build_entry) as build:
+            for value in range(3):
+                observable.notify(value, 'cold{}'.format(value))
+            self.assertEqual(build.call_count, 1)
+            observable.register(RecorderObserver())
+            observable.notify(3, 'cold1')
+            self.assertEqual(build.call_count, 2)
+
+        self.assertEqual(recorder.received, [(0, 'cold0'), (1, 'cold1'),
+                                             (2, 'cold2'), (3, 'cold1')])
+
+    def test_notify_registry_changes_during_dispatch(self):
+        """
+        Test :meth:`Observable.notify` when observers change the registry.
+
+        It is expected from :meth:`Observable.notify`:
+            * To deliver the current notification to every observer registered
+              when it started, even if one of them unregisters the others.
+            * To apply the changes to the following notifications.
+        """
+        observable = Observable()
+        recorders = [RecorderObserver() for _ in range(3)]
+
+        class Unsubscriber(Observer):
+            def update(self, data, event='all'):
+                for recorder in recorders:
+                    observable.unregister(recorder)
+                observable.register(RecorderObserver(), event)
+
+        observable.register(Unsubscriber(), 'event')
+        for recorder in recorders:
+            observable.register(recorder, 'event')
+
+        observable.notify(1, 'event')
+        observable.notify(2, 'event')
+        for recorder in recorders:
+            self.assertEqual(recorder.received, [(1, 'event')])
+
+    def test_notify_many(self):
+        """
+        Test :meth:`Observable.notify_many`.
+
+        It is expected from :meth:`Observable.notify_many`:
+            * To deliver, through :meth:`Observer.update_batch`, one batch per
+              event, keeping the order of the items of each event.
+            * To fall back to :meth:`Observer.update` per item for observers
+              without :meth:`Observer.update_batch`.
+        """
+        class BatchRecorder(RecorderObserver):
+            def update_batch(self, items):
+                self.received.append(items)
+
+        class PlainRecorder:
+            def __init__(self):
+                self.received = list()
+
+            def update(self, data, event='all'):
+                self.received.append((data, event))
+
+        observable = Observable()
+        batch, default, plain = (BatchRecorder(), RecorderObserver(),
+                                 PlainRecorder())
+        observable.register(batch)
+        observable.register(default, 'humidity')
+        observable.register(plain, 'humidity')
+
+        observable.notify_many([(1, 'temperature'), (2, 'humidity'),
+                                (3, 'temperature'), (4, 'humidity')])
+
+        self.assertEqual(batch.received,
+                         [[(1, 'temperature'), (3, 'temperature')],
+                          [(2, 'humidity'), (4, 'humidity')]])
+        self.assertEqual(default.received, [(2, 'humidity'), (4, 'humidity')])
+        self.assertEqual(plain.received, [(2, 'humidity'), (4, 'humidity')])
+
+    def test_weak(self):
+        """
+        Test an Observable created as weak.
+
+        It is expected from an Observable created with ``weak=True``:
+            * To notify its observers while they are alive.
+            * To forget, in every event, the observers garbage collected.
+            * To unregister observers as usual.
+            * To not be kept alive by its observers.
+        """
+        observable = Observable(weak=True)
+        alive, dying = RecorderObserver(), RecorderObserver()
+        for observer in (alive, dying):
+            observable.register(observer)
+            observable.register(observer, 'event')
+        observable.notify(1, 'event')
+        self.assertEqual(dying.received, [(1, 'event'), (1, 'event')])
+
+        del dying, observer
+        gc.collect()
+        self.assertEqual(observable.observers,
+                         {'all': [alive], 'event': [alive]})
+        self.assertEqual(len(observable._subscriptions), 1)
+        observable.notify(2, 'event')
+        self.assertEqual(len(alive.received), 4)
+
+        self.assertFalse(observable.unregister(alive, 'unknown'))
+        self.assertTrue(observable.unregister(alive, 'event'))
+        self.assertTrue(observable.unregister(alive))
+        self.assertFalse(observable.unregister(alive))
+        self.assertEqual(observable._references, dict())
+
+        reference = weakref.ref(observable)
+        observable.register(alive)
+        del observable
+        gc.collect()
+        self.assertIsNone(reference())
+
+    def test_weak_bound_methods(self):
+        """
+        Test bound methods registered in an Observable created as weak.
+
+        It is expected from an Observable created with ``weak=True``:
+            * To call bound methods registered as observers.
+            * To forget them when the object they are bound to is collected.
+        """
+        class Owner:
+            def __init__(self):
+                self.received = list()
+
+            def on_event(self, data, event):
+                self.received.append((data, event))
+
+        observable = Observable(weak=True)
+        owner = Owner()
+        observable.register(owner.on_event, 'event')
+        observable.register(owner.on_event, 'event')
+        observable.notify(1, 'event')
+        self.assertEqual(owner.received, [(1, 'event')])
+        self.assertEqual(observable.observers['event'], [owner.on_event])
+
+        del owner
+        gc.collect()
+        self.assertEqual(observable.observers['event'], [])
+        self.assertEqual(observable._recipients('event'), ())
+
+    def test_has_listeners(self):
+        """
+        Test :meth:`Observable.has_listeners`.
+
+        It is expected from :meth:`Observable.has_listeners`:
+            * To tell whether an event has observers, counting 'all' ones.
+            * To follow the changes of the registry.
+        """
+        observable, recorder = Observable(), RecorderObserver()
+        self.assertFalse(observable.has_listeners('temperature'))
+        observable.register(recorder, 'temperature')
+        self.assertTrue(observable.has_listeners('temperature'))
+        self.assertFalse(observable.has_listeners('humidity'))
+        observable.register(recorder)
+        self.assertTrue(observable.has_listeners('humidity'))
+        observable.unregister(recorder)
+        self.assertFalse(observable.has_listeners('temperature'))
+
+    def test_notify_lazy(self):
+        """
+        Test :meth:`Observable.notify` with Lazy payloads.
+
+        It is expected from :meth:`Observable.notify`:
+            * To not compute the payload of an event without observers.
+            * To compute it once for every observer of the event, also in
+              batches.
+        """
+        calls = list()
+
+        def reading():
+            calls.append(None)
+            return len(calls)
+
+        observable = Observable()
+        first, second = RecorderObserver(), RecorderObserver()
+        observable.register(first, 'temperature')
+        observable.register(second, 'temperature')
+        observable.notify(Lazy(reading), 'humidity')
+        self.assertEqual(calls, [])
+
+        observable.notify(Lazy(reading), 'temperature')
+        observable.notify_many([(Lazy(reading), 'humidity'),
+                                (Lazy(reading), 'temperature')])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(first.received, [(1, 'temperature'),
+                                          (2, 'temperature')])
+        self.assertEqual(second.received, first.received)
+
+    def test_deferred(self):
+        """
+        Test :meth:`Observable.deferred`.
+
+        It is expected from :meth:`Observable.deferred`:
+            * To hold the notifications back until the outermost block exits.
+            * To deliver one notification per event, in the order the events
+              were first notified, merged by the reducer of the block.
+            * To deliver the notifications even if the block raised.
+            * To deliver them once to an observer registered both to 'all'
+              and to the event.
+        """
+        observable, recorder = Observable(), RecorderObserver()
+        observable.register(recorder)
+        observable.register(recorder, 'temperature')
+        with observable.deferred():
+            observable.notify(1, 'temperature')
+            observable.notify(50, 'humidity')
+            with observable.deferred(reducer=max):
+                observable.notify(3, 'temperature')
+                observable.notify_many([(2, 'temperature'),
+                                        (40, 'humidity')])
+            observable.notify(60, 'humidity')
+            self.assertEqual(recorder.received, [])
+        self.assertEqual(recorder.received, [(3, 'temperature'),
+                                             (60, 'humidity')])
+
+        observable.notify(4, 'temperature')
+        self.assertEqual(recorder.received[-2:], [(4, 'temperature')] * 2)
+        with self.assertRaises(ValueError):
+            with observable.deferred():
+                observable.notify(5, 'temperature')
+                raise ValueError()
+        self.assertEqual(recorder.received[-2:], [(4, 'temperature'),
+                                                  (5, 'temperature')])
+        self.assertNotIn('notify', observable.__dict__)
+        self.assertNotIn('_recipients', observable.__dict__)
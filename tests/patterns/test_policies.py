@@ -0,0 +1,122 @@
+"""Tests for :mod:`policies` module's code."""
+
+from unittest import TestCase
+from matils.patterns.observer import Observable
+from matils.patterns.policies import Debounce, Sample, Throttle
+from tests.patterns.helpers import Clock, RecorderObserver
+
+
+class TestPolicies(TestCase):
+    """Test cases for the policies from :mod:`policies`."""
+
+    def test_throttle(self):
+        """
+        Test :class:`Throttle`.
+
+        It is expected from :class:`Throttle`:
+            * To deliver at most one notification per interval and event.
+        """
+        clock = Clock()
+        observable, recorder = Observable(), RecorderObserver()
+        throttle = Throttle(2, clock=clock)
+        observable.register(recorder, policy=throttle)
+
+        for now in (0, 0.1, 0.4, 0.5, 0.9, 1.2):
+            clock.now = now
+            observable.notify(now, 'temperature')
+            observable.notify(now, 'humidity')
+
+        self.assertEqual([data for data, event in recorder.received
+                          if event == 'temperature'], [0, 0.5, 1.2])
+        self.assertEqual(throttle.delivered, 6)
+        self.assertEqual(throttle.suppressed, 6)
+
+    def test_debounce(self):
+        """
+        Test :class:`Debounce`.
+
+        It is expected from :class:`Debounce`:
+            * To deliver the last notification of a burst once the event is
+              quiet for the window, on the next notification or poll.
+        """
+        clock = Clock()
+        observable, recorder = Observable(), RecorderObserver()
+        debounce = Debounce(1, clock=clock)
+        observable.register(recorder, 'event', policy=debounce)
+
+        for now in (0, 0.5, 0.9):
+            clock.now = now
+            observable.notify(now, 'event')
+        observable.poll()
+        self.assertEqual(recorder.received, [])
+
+        clock.now = 2
+        observable.notify(2, 'event')
+        self.assertEqual(recorder.received, [(0.9, 'event')])
+        clock.now = 3.5
+        observable.poll()
+        self.assertEqual(recorder.received, [(0.9, 'event'), (2, 'event')])
+        self.assertEqual((debounce.delivered, debounce.suppressed), (2, 2))
+
+    def test_sample(self):
+        """
+        Test :class:`Sample`.
+
+        It is expected from :class:`Sample`:
+            * To deliver the first and then one in every N notifications.
+            * To sample the batches of :meth:`Observable.notify_many`.
+        """
+        observable, recorder = Observable(), RecorderObserver()
+        sample = Sample(3)
+        observable.register(recorder, 'event', policy=sample)
+        for value in range(7):
+            observable.notify(value, 'event')
+        observable.notify_many([(value, 'event') for value in range(7, 10)])
+
+        self.assertEqual([data for data, _ in recorder.received], [0, 3, 6, 9])
+        self.assertEqual(sample.suppressed, 6)
+
+    def test_register_policies(self):
+        """
+        Test :meth:`Observable.register` with policies.
+
+        It is expected from :meth:`Observable.register`:
+            * To apply a policy only to its registration.
+            * To replace the policy when registering again, or remove it
+              when registering again without one.
+            * To forget the policy when unregistering.
+        """
+        observable, recorder = Observable(), RecorderObserver()
+        observable.register(recorder, 'sampled', policy=Sample(2))
+        observable.register(recorder, 'event')
+        for value in range(4):
+            observable.notify(value, 'sampled')
+            observable.notify(value, 'event')
+        self.assertEqual(len(recorder.received), 6)
+
+        observable.register(recorder, 'sampled')
+        observable.notify(4, 'sampled')
+        self.assertEqual(recorder.received[-1], (4, 'sampled'))
+        observable.register(recorder, 'sampled', policy=Sample(10))
+        observable.notify(5, 'sampled')
+        observable.notify(6, 'sampled')
+        self.assertEqual(recorder.received[-1], (5, 'sampled'))
+
+        observable.unregister(recorder)
+        self.assertEqual(observable._gates, dict())
+        self.assertEqual(observable.observers['sampled'], [])
+
+    def test_unique_with_policies(self):
+        """
+        Test policies in an Observable created as unique.
+
+        It is expected from :meth:`Observable.notify`:
+            * To use only the first registration, in notification order, of
+              an observer registered to 'all' and to the event.
+        """
+        observable, recorder = Observable(unique=True), RecorderObserver()
+        observable.register(recorder, policy=Sample(2))
+        observable.register(recorder, 'event')
+        for value in range(4):
+            observable.notify(value, 'event')
+        self.assertEqual(recorder.received, [(0, 'event'), (2, 'event')])
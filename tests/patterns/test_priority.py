@@ -0,0 +1,164 @@
+"""Tests for :mod:`priority` module's code."""
+
+from unittest import TestCase
+from matils.patterns.observer import Observer
+from matils.patterns.priority import PriorityObservable
+from tests.patterns.helpers import Clock
+
+
+class LoggingObserver(Observer):
+    """An observer keeping the notifications it receives, in a shared log."""
+
+    def __init__(self, log, clock=None, duration=0.0, fail=False):
+        """Initialize the observer, advancing the clock on each update."""
+        self.log = log
+        self.clock = clock
+        self.duration = duration
+        self.fail = fail
+
+    def update(self, data, event='all'):
+        """Record the notification, then fail if told to."""
+        self.log.append((self, data))
+        if self.clock is not None:
+            self.clock.now += self.duration
+        if self.fail:
+            raise ValueError(data)
+
+
+class TestPriorityObservable(TestCase):
+    """Test cases for the class PriorityObservable from :mod:`priority`."""
+
+    def test_priority_and_budget(self):
+        """
+        Test :meth:`PriorityObservable.notify` ordering and budget.
+
+        It is expected from :meth:`PriorityObservable.notify`:
+            * To update the observers by decreasing priority, in registration
+              order for equal priorities, 'all' ones included.
+            * To skip the observers left once the budget is spent, reporting
+              them.
+        """
+        clock, log, reports = Clock(), list(), list()
+        observable = PriorityObservable(
+            budget=1.0, clock=clock,
+            on_failure=lambda *report: reports.append(report))
+        low, slow, critical, other = [
+            LoggingObserver(log, clock, duration) for duration in
+            (0.0, 2.0, 0.0, 0.0)]
+        observable.register(low)
+        observable.register(slow, 'event', priority=1)
+        observable.register(critical, 'event', priority=5)
+        observable.register(other, 'event', priority=1)
+
+        observable.notify(1, 'event')
+        self.assertEqual(log, [(critical, 1), (slow, 1)])
+        self.assertEqual(reports, [(other, 'event', 'budget', None),
+                                   (low, 'event', 'budget', None)])
+
+        del log[:]
+        observable.register(slow, 'event')
+        observable.notify(2, 'event')
+        self.assertEqual(log, [(critical, 2), (other, 2), (low, 2),
+                               (slow, 2)])
+        self.assertEqual(observable.counts['budget'], 2)
+
+    def test_circuit_breaker(self):
+        """
+        Test the circuit breakers of :class:`PriorityObservable`.
+
+        It is expected from :class:`PriorityObservable`:
+            * To report exceptions and timeouts instead of raising them.
+            * To skip an observer after repeated failures, and to try it again
+              after a backoff doubling on each failed try.
+            * To close the breaker after a successful try.
+        """
+        clock, log = Clock(), list()
+        observable = PriorityObservable(timeout=0.5, threshold=2, backoff=10,
+                                        clock=clock)
+        failing = LoggingObserver(log, fail=True)
+        healthy = LoggingObserver(log)
+        observable.register(failing)
+        observable.register(healthy)
+
+        observable.notify(1, 'event')
+        observable.notify_many([(2, 'event')])
+        self.assertEqual(observable.state(failing), 'open')
+        observable.notify(3, 'event')
+        self.assertEqual(observable.counts, {'error': 2, 'timeout': 0,
+                                             'open': 1, 'budget': 0})
+        self.assertEqual([data for observer, data in log
+                          if observer is healthy], [1, 2, 3])
+
+        clock.now = 10
+        self.assertEqual(observable.state(failing), 'half-open')
+        observable.notify(4, 'event')
+        clock.now = 29
+        self.assertEqual(observable.state(failing), 'open')
+        clock.now = 30
+        failing.fail, failing.clock, failing.duration = False, clock, 1.0
+        observable.notify(5, 'event')
+        self.assertEqual(observable.counts['timeout'], 1)
+        self.assertEqual(observable.state(failing), 'open')
+
+        clock.now = 80
+        failing.duration = 0.0
+        observable.notify(6, 'event')
+        self.assertEqual(observable.state(failing), 'closed')
+        self.assertEqual([data for observer, data in log
+                          if observer is failing], [1, 2, 4, 5, 6])
+
+    def test_failure_callback_time(self):
+        """
+        Test the timing of :class:`PriorityObservable` updates.
+
+        It is expected from :class:`PriorityObservable`:
+            * To not count the time of on_failure in the update of the next
+              observer.
+            * To count it in the budget of the notification.
+        """
+        clock, log, reports = Clock(), list(), list()
+
+        def report(observer, event, reason, exception):
+            reports.append((observer, reason))
+            clock.now += 1.0
+
+        observable = PriorityObservable(budget=1.2, timeout=0.5,
+                                        clock=clock, on_failure=report)
+        failing = LoggingObserver(log, fail=True)
+        healthy = LoggingObserver(log, clock, 0.4)
+        late = LoggingObserver(log)
+        observable.register(failing, priority=2)
+        observable.register(healthy, priority=1)
+        observable.register(late)
+
+        observable.notify(1, 'event')
+        self.assertEqual(log, [(failing, 1), (healthy, 1)])
+        self.assertEqual(reports, [(failing, 'error'), (late, 'budget')])
+        self.assertEqual(observable.counts['timeout'], 0)
+
+    def test_unregister_after_failure(self):
+        """
+        Test an observer unregistering itself in :class:`PriorityObservable`.
+
+        It is expected from :class:`PriorityObservable`:
+            * To not raise when an observer that failed before succeeds and
+              unregisters itself, or resets the observable, in its update.
+        """
+        log = list()
+        observable = PriorityObservable()
+
+        class Quitter(LoggingObserver):
+            def update(self, data, event='all'):
+                super().update(data, event)
+                if data == 2:
+                    observable.unregister(self)
+                    observable.reset()
+
+        quitter = Quitter(log, fail=True)
+        observable.register(quitter)
+        observable.notify(1, 'event')
+        quitter.fail = False
+        observable.notify(2, 'event')
+        observable.notify(3, 'event')
+        self.assertEqual(log, [(quitter, 1), (quitter, 2)])
+        self.assertEqual(observable.state(quitter), 'closed')
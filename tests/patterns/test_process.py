@@ -0,0 +1,205 @@
+"""Tests for :mod:`process` module's code."""
+
+import os
+import tempfile
+from unittest import TestCase, skipIf
+from matils.patterns.filters import Field
+from matils.patterns.observer import Observer
+from matils.patterns.policies import Debounce, Sample
+from matils.patterns.process import ProcessObservable
+from tests.patterns.helpers import Clock
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class FileRecorder(Observer):
+    """Observer appending a description of each notification to a file."""
+
+    def __init__(self, path):
+        """Keep the path of the file to write."""
+        self.path = path
+        self.count = 0
+
+    def update(self, data, event='all'):
+        """Append the process id, a counter and the data to the file."""
+        self.count += 1
+        if isinstance(data, memoryview):
+            data = 'memoryview:{}:{}'.format(data.nbytes, bytes(data[:3]))
+        elif numpy is not None and isinstance(data, numpy.ndarray):
+            data = 'ndarray:{}:{}'.format(data.shape, data.sum())
+        with open(self.path, 'a') as output:
+            output.write('{} {} {} {}\n'.format(os.getpid(), self.count,
+                                                event, data))
+
+    def lines(self):
+        """Return the lines written so far, split in their fields."""
+        with open(self.path) as output:
+            return [line.split(' ', 3) for line in output.read().splitlines()]
+
+
+class FailingObserver(Observer):
+    """Observer whose update always fails."""
+
+    def update(self, data, event='all'):
+        """Raise ValueError."""
+        raise ValueError(data)
+
+
+class TestProcessObservable(TestCase):
+    """Test cases for the class ProcessObservable from :mod:`process`."""
+
+    def setUp(self):
+        """Create a temporary directory for the observers output."""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def recorder(self, name):
+        """Return a FileRecorder writing to the temporary directory."""
+        return FileRecorder(os.path.join(self.directory.name, name))
+
+    def test_notify_routes_to_fixed_workers(self):
+        """
+        Test :meth:`ProcessObservable.notify`.
+
+        It is expected from :meth:`ProcessObservable.notify`:
+            * To run each observer in its worker, keeping its state there.
+            * To route observers to the worker given at registration.
+        """
+        first, second = self.recorder('first'), self.recorder('second')
+        with ProcessObservable(workers=2) as observable:
+            observable.register(first, 'event', worker=1)
+            observable.register(second, worker=1)
+            for value in range(3):
+                observable.notify(value, 'event')
+            observable.notify('x', 'other')
+            self.assertTrue(observable.flush(10))
+
+        lines = first.lines()
+        self.assertEqual([line[1:] for line in lines],
+                         [['1', 'event', '0'],
+                          ['2', 'event', '1'], ['3', 'event', '2']])
+        self.assertEqual(len(second.lines()), 4)
+        # both in the same worker process, not in this one...
+        self.assertEqual(lines[0][0], second.lines()[0][0])
+        self.assertNotEqual(lines[0][0], str(os.getpid()))
+
+    def test_notify_shared_memory(self):
+        """
+        Test :meth:`ProcessObservable.notify` with large payloads.
+
+        It is expected from :meth:`ProcessObservable.notify`:
+            * To deliver bytes above the threshold as a memoryview.
+            * To release the shared memory segments once delivered.
+        """
+        recorder = self.recorder('shared')
+        with ProcessObservable(workers=2, threshold=1024) as observable:
+            observable.register(recorder, 'event')
+            observable.register(self.recorder('other'), 'event')
+            observable.notify(b'abc' * 1000, 'event')
+            observable.notify(b'small', 'event')
+            self.assertTrue(observable.flush(10))
+            self.assertEqual(observable._segments, dict())
+
+        self.assertEqual([line[3] for line in recorder.lines()],
+                         ["memoryview:3000:b'abc'", "b'small'"])
+
+    @skipIf(numpy is None, 'NumPy is not installed')
+    def test_notify_shared_memory_ndarray(self):
+        """
+        Test :meth:`ProcessObservable.notify_many` with NumPy arrays.
+
+        It is expected from :meth:`ProcessObservable.notify_many`:
+            * To deliver arrays above the threshold through shared memory.
+        """
+        recorder = self.recorder('arrays')
+        with ProcessObservable(workers=1, threshold=1024) as observable:
+            observable.register(recorder)
+            observable.notify_many([(numpy.ones((32, 32)), 'event'),
+                                    (numpy.arange(4), 'event')])
+            self.assertTrue(observable.flush(10))
+            self.assertEqual(observable._segments, dict())
+
+        self.assertEqual([line[3] for line in recorder.lines()],
+                         ['ndarray:(32, 32):1024.0', 'ndarray:(4,):6'])
+
+    def test_unregister_and_failures(self):
+        """
+        Test :meth:`ProcessObservable.unregister` and failed updates.
+
+        It is expected from :class:`ProcessObservable`:
+            * To stop delivering to unregistered observers.
+            * To keep the tracebacks of the failed updates.
+        """
+        recorder = self.recorder('unregister')
+        with ProcessObservable(workers=1) as observable:
+            observable.register(recorder)
+            observable.register(FailingObserver(), 'event')
+            observable.notify(1, 'event')
+            observable.unregister(recorder)
+            observable.notify(2, 'event')
+            self.assertTrue(observable.flush(10))
+
+        self.assertEqual(len(recorder.lines()), 1)
+        self.assertEqual(len(observable.failures), 2)
+        self.assertIn('ValueError', observable.failures[0])
+
+    def test_register_policy(self):
+        """
+        Test :meth:`ProcessObservable.register` with a policy.
+
+        It is expected from :meth:`ProcessObservable.register`:
+            * To apply the policy in the producer, sending only the admitted
+              notifications, also those released by :meth:`poll`.
+            * To accept the worker as keyword argument only.
+        """
+        clock = Clock()
+        sampled, debounced = self.recorder('sampled'), \
+            self.recorder('debounced')
+        sample, debounce = Sample(3), Debounce(1.0, clock=clock)
+        with ProcessObservable(workers=1) as observable:
+            with self.assertRaises(TypeError):
+                observable.register(sampled, 'event', None, None, 0)
+            with self.assertRaises(TypeError):
+                observable.register(sampled, 'event', 0)
+            observable.register(sampled, 'event', policy=sample, worker=0)
+            observable.register(debounced, 'event', policy=debounce)
+            for value in range(6):
+                observable.notify(value, 'event')
+            observable.notify_many([(6, 'event'), (7, 'event')])
+            clock.now = 2.0
+            observable.poll()
+            self.assertTrue(observable.flush(10))
+
+        self.assertEqual([line[3] for line in sampled.lines()],
+                         ['0', '3', '6'])
+        self.assertEqual([line[3] for line in debounced.lines()], ['7'])
+        self.assertEqual(sample.suppressed, 5)
+
+    def test_register_filter(self):
+        """
+        Test :meth:`ProcessObservable.register` with a filter.
+
+        It is expected from :meth:`ProcessObservable.register`:
+            * To evaluate the filter in the producer, for single
+              notifications and batches, counting the rejected payloads.
+            * To send only the matching payloads to the worker.
+        """
+        recorder = self.recorder('filtered')
+        where = Field('v') > 5
+        with ProcessObservable(workers=1) as observable:
+            observable.register(recorder, 'event', where=where)
+            for value in range(0, 8, 2):
+                observable.notify({'v': value}, 'event')
+            observable.notify_many([({'v': value}, 'event')
+                                    for value in range(8, 2, -1)])
+            self.assertTrue(observable.flush(10))
+
+        self.assertEqual([line[3] for line in recorder.lines()],
+                         ["{'v': 6}", "{'v': 8}", "{'v': 7}", "{'v': 6}"])
+        self.assertEqual(where.rejected, 6)
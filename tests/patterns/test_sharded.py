@@ -0,0 +1,166 @@
+"""Tests for :mod:`sharded` module's code."""
+
+import threading
+import time
+from unittest import TestCase
+from matils.patterns.observer import Observer
+from matils.patterns.policies import Debounce
+from matils.patterns.sharded import ShardedObservable
+from tests.patterns.helpers import GatedRecorder
+
+
+class SleepingObserver(Observer):
+    """Observer taking its time to update."""
+
+    def __init__(self):
+        """Initialize the duration of the updates."""
+        self.delay = 0.0
+
+    def update(self, data, event='all'):
+        """Sleep for the delay."""
+        time.sleep(self.delay)
+
+
+class FailingObserver(Observer):
+    """Observer whose update always fails."""
+
+    def update(self, data, event='all'):
+        """Raise ValueError."""
+        raise ValueError(data)
+
+
+class TestShardedObservable(TestCase):
+    """Test cases for the class ShardedObservable from :mod:`sharded`."""
+
+    def test_notify_across_shards(self):
+        """
+        Test :meth:`ShardedObservable.notify`.
+
+        It is expected from :meth:`ShardedObservable.notify`:
+            * To spread the observers evenly over the shards.
+            * To deliver to each observer, in order, from a single thread.
+            * To keep the failures of the observers instead of raising them.
+        """
+        with ShardedObservable(shards=3) as observable:
+            recorders = [GatedRecorder() for _ in range(7)]
+            for recorder in recorders:
+                observable.register(recorder, 'temperature')
+            observable.register(FailingObserver())
+            loads = [0, 0, 0]
+            for recorder in recorders:
+                loads[observable.shard_of(recorder)] += 1
+            self.assertLessEqual(max(loads) - min(loads), 1)
+
+            for value in range(50):
+                observable.notify(value, 'temperature')
+            observable.notify_many([(50, 'temperature'), (51, 'humidity')])
+            self.assertTrue(observable.flush(5))
+
+        expected = [(value, 'temperature') for value in range(51)]
+        for recorder in recorders:
+            self.assertEqual(recorder.received, expected)
+            self.assertEqual(len(recorder.threads), 1)
+        self.assertEqual(len(observable.failures), 52)
+        with self.assertRaises(RuntimeError):
+            observable.notify(0, 'temperature')
+
+    def test_rebalance_handoff(self):
+        """
+        Test the rebalancing of :class:`ShardedObservable`.
+
+        It is expected from :class:`ShardedObservable`:
+            * To move an observer to the emptiest shard when unregistering
+              unbalances them.
+            * To deliver the updates queued before the move first.
+        """
+        gate = threading.Event()
+        with ShardedObservable(shards=2) as observable:
+            recorders = [GatedRecorder(gate) for _ in range(4)]
+            for recorder in recorders:
+                observable.register(recorder)
+            for value in range(5):
+                observable.notify(value, 'event')
+
+            shard = observable.shard_of(recorders[0])
+            leaving = [recorder for recorder in recorders
+                       if observable.shard_of(recorder) != shard]
+            for recorder in leaving:
+                observable.unregister(recorder)
+            moved = [recorder for recorder in recorders
+                     if observable.shard_of(recorder) not in (shard, None)]
+            self.assertEqual(len(moved), 1)
+
+            for value in range(5, 10):
+                observable.notify(value, 'event')
+            gate.set()
+            self.assertTrue(observable.flush(5))
+
+        self.assertEqual(moved[0].received,
+                         [(value, 'event') for value in range(10)])
+        self.assertEqual(len(moved[0].threads), 2)
+
+    def test_poll(self):
+        """
+        Test :meth:`ShardedObservable.poll`.
+
+        It is expected from :meth:`ShardedObservable.poll`:
+            * To deliver the notifications held back by the policies in the
+              shard of their observer, after the updates already queued.
+        """
+        gate = threading.Event()
+        recorder = GatedRecorder(gate)
+        with ShardedObservable(shards=2) as observable:
+            observable.register(recorder, 'reading')
+            observable.register(recorder, 'alarm', policy=Debounce(0))
+            observable.notify(1, 'reading')
+            observable.notify(2, 'alarm')
+            observable.poll()
+            observable.notify(3, 'reading')
+            gate.set()
+            self.assertTrue(observable.flush(5))
+
+        self.assertEqual(recorder.received, [(1, 'reading'), (2, 'alarm'),
+                                             (3, 'reading')])
+        self.assertEqual(len(recorder.threads), 1)
+        self.assertNotIn(threading.main_thread(), recorder.threads)
+        with self.assertRaises(RuntimeError):
+            observable.poll()
+
+    def test_deferred(self):
+        """
+        Test :meth:`ShardedObservable.deferred`.
+
+        It is expected from :meth:`ShardedObservable.deferred`:
+            * To queue the coalesced notifications once to each observer,
+              without changing the delivery of the following ones.
+        """
+        recorder = GatedRecorder()
+        with ShardedObservable(shards=2) as observable:
+            observable.register(recorder)
+            observable.register(recorder, 'event')
+            with observable.deferred():
+                observable.notify(1, 'event')
+                observable.notify(2, 'event')
+            observable.notify(3, 'event')
+            self.assertTrue(observable.flush(5))
+
+        self.assertEqual(recorder.received, [(2, 'event'), (3, 'event'),
+                                             (3, 'event')])
+
+    def test_flush_timeout(self):
+        """
+        Test :meth:`ShardedObservable.flush` with a timeout.
+
+        It is expected from :meth:`ShardedObservable.flush`:
+            * To wait at most the timeout, whatever the number of shards.
+        """
+        with ShardedObservable(shards=4) as observable:
+            for _ in range(4):
+                observable.register(SleepingObserver())
+            for observer in observable.observers['all']:
+                # each shard done shortly before the previous wait times out
+                observer.delay = 0.15 * (observable.shard_of(observer) + 1)
+            observable.notify(1, 'event')
+            start = time.monotonic()
+            self.assertFalse(observable.flush(0.2))
+            self.assertLess(time.monotonic() - start, 0.4)
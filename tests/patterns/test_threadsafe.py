@@ -0,0 +1,138 @@
+"""Tests for :mod:`threadsafe` module's code."""
+
+import threading
+from unittest import TestCase
+from matils.patterns.observer import Observer
+from matils.patterns.threadsafe import ThreadSafeObservable
+
+
+class CounterObserver(Observer):
+    """Observer counting the notifications it receives, from any thread."""
+
+    def __init__(self):
+        """Initialize the counter."""
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def update(self, data, event='all'):
+        """Count the notification."""
+        with self.lock:
+            self.count += 1
+
+
+class ThreadRecorder(Observer):
+    """Observer keeping the notifications and the thread delivering them."""
+
+    def __init__(self):
+        """Initialize the list of received notifications."""
+        self.received = list()
+
+    def update(self, data, event='all'):
+        """Record the notification and the name of the current thread."""
+        self.received.append((data, threading.current_thread().name))
+
+
+class TestThreadSafeObservable(TestCase):
+    """Test cases for the class ThreadSafeObservable from :mod:`threadsafe`."""
+
+    def test_concurrent_notify_and_register(self):
+        """
+        Test :class:`ThreadSafeObservable` under concurrent use.
+
+        It is expected from :class:`ThreadSafeObservable`:
+            * To deliver every notification to the observers registered for
+              the whole run, while other threads register and unregister.
+            * To raise no error in any thread.
+        """
+        observable = ThreadSafeObservable()
+        steady = CounterObserver()
+        observable.register(steady, 'event0')
+        errors = list()
+        producers, notifications = 4, 2000
+
+        def produce():
+            try:
+                for index in range(notifications):
+                    observable.notify(index, 'event{}'.format(index % 4))
+            except Exception as error:
+                errors.append(error)
+
+        def churn():
+            try:
+                for index in range(notifications):
+                    observer = CounterObserver()
+                    event = 'event{}'.format(index % 8)
+                    observable.register(observer, event)
+                    observable.observers
+                    observable.unregister(observer)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=produce) for _ in range(producers)]
+        threads.append(threading.Thread(target=churn))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(steady.count, producers * notifications // 4)
+        observers = dict(observable.observers)
+        self.assertEqual(observers.pop('event0'), [steady])
+        self.assertFalse(any(observers.values()))
+
+    def test_observers_snapshot(self):
+        """
+        Test :attr:`ThreadSafeObservable.observers`.
+
+        It is expected from :attr:`ThreadSafeObservable.observers`:
+            * To return the same snapshot while the registry is unchanged.
+            * To leave a previous snapshot untouched after changes.
+        """
+        observable = ThreadSafeObservable()
+        first, second = CounterObserver(), CounterObserver()
+        observable.register(first, 'event')
+        snapshot = observable.observers
+        self.assertIs(observable.observers, snapshot)
+
+        observable.register(second, 'event')
+        self.assertEqual(snapshot, {'all': [], 'event': [first]})
+        self.assertEqual(observable.observers['event'], [first, second])
+
+    def test_deferred_per_thread(self):
+        """
+        Test :meth:`ThreadSafeObservable.deferred`.
+
+        It is expected from :meth:`ThreadSafeObservable.deferred`:
+            * To hold back the notifications of the deferring thread only,
+              delivering them from that thread.
+            * To keep the batches of threads deferring at once apart.
+            * To deliver them once to each observer.
+        """
+        observable, recorder = ThreadSafeObservable(), ThreadRecorder()
+        observable.register(recorder)
+        observable.register(recorder, 'bulk1')
+        entered, release = threading.Barrier(3), threading.Event()
+
+        def bulk(value):
+            with observable.deferred():
+                observable.notify(value, threading.current_thread().name)
+                entered.wait(5)
+                release.wait(5)
+
+        threads = [threading.Thread(target=bulk, args=(value,),
+                                    name='bulk{}'.format(value))
+                   for value in (1, 2)]
+        for thread in threads:
+            thread.start()
+        entered.wait(5)
+        observable.notify(0, 'main')
+        self.assertEqual(recorder.received, [(0, 'MainThread')])
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(recorder.received[1:]),
+                         [(1, 'bulk1'), (2, 'bulk2')])
+        self.assertNotIn('notify', observable.__dict__)
+        self.assertNotIn('_recipients', observable.__dict__)
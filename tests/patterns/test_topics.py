@@ -0,0 +1,102 @@
+"""Tests for :mod:`topics` module's code."""
+
+from unittest import TestCase
+from matils.patterns.observer import Observer
+from matils.patterns.topics import TopicObservable
+from tests.patterns.helpers import RecorderObserver
+
+
+class TestTopicObservable(TestCase):
+    """Test cases for the class TopicObservable from :mod:`topics`."""
+
+    def test_wildcards(self):
+        """
+        Test :meth:`TopicObservable.notify` with wildcard patterns.
+
+        It is expected from :meth:`TopicObservable.notify`:
+            * To notify observers of patterns where '*' matches one level.
+            * To notify observers of patterns where '#' matches zero or more
+              levels.
+            * To keep notifying observers of exact topics and 'all'.
+        """
+        observable = TopicObservable()
+        star, hash_, middle, exact, everything = (RecorderObserver()
+                                                  for _ in range(5))
+        observable.register(star, 'sensor.*.temperature')
+        observable.register(hash_, 'sensor.#')
+        observable.register(middle, 'sensor.#.temperature')
+        observable.register(exact, 'sensor.kitchen.humidity')
+        observable.register(everything)
+
+        topics = ['sensor.kitchen.temperature', 'sensor.kitchen.humidity',
+                  'sensor', 'sensor.a.b.temperature', 'sensor.temperature',
+                  'other.kitchen.temperature', 'sensor.kitchen']
+        for topic in topics:
+            observable.notify(None, topic)
+
+        self.assertEqual(star.events(), ['sensor.kitchen.temperature'])
+        self.assertEqual(hash_.events(), [topic for topic in topics
+                                          if topic.startswith('sensor')])
+        self.assertEqual(middle.events(), ['sensor.kitchen.temperature',
+                                           'sensor.a.b.temperature',
+                                           'sensor.temperature'])
+        self.assertEqual(exact.events(), ['sensor.kitchen.humidity'])
+        self.assertEqual(everything.events(), topics)
+
+    def test_order_and_unique(self):
+        """
+        Test the notification order of :class:`TopicObservable`.
+
+        It is expected from :meth:`TopicObservable.notify`:
+            * To notify 'all', then exact topic, then patterns observers in
+              their registration order.
+            * To notify an observer only once if created as unique.
+        """
+        calls = list()
+
+        class Named(Observer):
+            def __init__(self, name):
+                self.name = name
+
+            def update(self, data, event='all'):
+                calls.append(self.name)
+
+        observable = TopicObservable(unique=True)
+        shared = Named('shared')
+        observable.register(Named('hash'), 'a.#')
+        observable.register(Named('star'), 'a.*')
+        observable.register(Named('exact'), 'a.b')
+        observable.register(Named('all'))
+        observable.register(shared, 'a.*')
+        observable.register(shared, 'a.#')
+
+        observable.notify(None, 'a.b')
+        self.assertEqual(calls, ['all', 'exact', 'hash', 'shared', 'star'])
+
+    def test_registry_changes(self):
+        """
+        Test :class:`TopicObservable` follows changes in the registry.
+
+        It is expected from :meth:`TopicObservable.notify`:
+            * To take into account patterns registered and observers
+              unregistered after a topic was already resolved.
+            * To forget patterns on reset.
+        """
+        observable = TopicObservable(cache_size=2)
+        first, second = RecorderObserver(), RecorderObserver()
+        observable.register(first, 'a.*')
+        observable.notify(1, 'a.b')
+        observable.register(second, 'a.b')
+        observable.register(second, '#')
+        observable.notify(2, 'a.b')
+        observable.notify(3, 'c')
+        observable.unregister(first, 'a.*')
+        observable.notify(4, 'a.b')
+        observable.notify(5, 'x.y')
+        observable.reset()
+        observable.notify(6, 'a.b')
+
+        self.assertEqual(first.received, [(1, 'a.b'), (2, 'a.b')])
+        self.assertEqual(second.received, [(2, 'a.b'), (2, 'a.b'), (3, 'c'),
+                                           (4, 'a.b'), (4, 'a.b'),
+                                           (5, 'x.y')])
@@ -0,0 +1,314 @@
+"""Tests for :mod:`transport` module's code."""
+
+import json
+import os
+import pickle
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from matils.patterns.observer import Observable, Observer
+from matils.patterns.transport import (SocketPublisher, SocketSubscriber,
+                                       _frame, _unframe)
+from tests.patterns.helpers import RecorderObserver
+
+
+class WaitingRecorder(RecorderObserver):
+    """Observer keeping the notifications it receives, from any thread."""
+
+    def __init__(self, expected=1):
+        """Initialize the received list, done once expected arrived."""
+        super().__init__()
+        self.expected = expected
+        self.done = threading.Event()
+
+    def update(self, data, event='all'):
+        """Record the notification."""
+        super().update(data, event)
+        if len(self.received) >= self.expected:
+            self.done.set()
+
+
+class RegisteringObserver(Observer):
+    """Observer registering another observer when first updated."""
+
+    def __init__(self, subscriber, observer, event):
+        """Keep the registration to make."""
+        self.subscriber = subscriber
+        self.observer = observer
+        self.event = event
+
+    def update(self, data, event='all'):
+        """Register the other observer, once."""
+        if self.observer is not None:
+            self.subscriber.register(self.observer, self.event)
+            self.observer = None
+
+
+class JSONSerializer:
+    """Serializer of the messages as JSON."""
+
+    @staticmethod
+    def dumps(message):
+        """Return the JSON encoding of the message."""
+        return json.dumps(message).encode()
+
+    @staticmethod
+    def loads(data):
+        """Decode a JSON message."""
+        return json.loads(data.decode())
+
+
+class TestSocketTransport(TestCase):
+    """Test cases for the publisher and subscriber from :mod:`transport`."""
+
+    def setUp(self):
+        """Create a directory for the socket."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'observable.sock')
+
+    def tearDown(self):
+        """Remove the directory of the socket."""
+        shutil.rmtree(self.directory)
+
+    def test_publish(self):
+        """
+        Test the delivery of notifications to subscribers.
+
+        It is expected from :class:`SocketPublisher`:
+            * To deliver to each subscriber the events it subscribed to, once
+              even if subscribed to 'all' and to the event.
+            * To send batches of notifications.
+            * To remove the socket once closed.
+        """
+        observable = Observable()
+        with SocketPublisher(observable, self.path) as publisher, \
+                SocketSubscriber(self.path) as subscriber:
+            everything = WaitingRecorder(4)
+            temperature = WaitingRecorder(3)
+            subscriber.register(everything)
+            subscriber.register(temperature, 'temperature')
+
+            observable.notify({'value': 21.5}, 'temperature')
+            observable.notify({'value': 60}, 'humidity')
+            observable.notify_many([(22, 'temperature'), (23, 'temperature')])
+            self.assertTrue(publisher.flush(5))
+            self.assertTrue(everything.done.wait(5))
+            self.assertTrue(temperature.done.wait(5))
+
+            self.assertEqual(everything.received, [
+                ({'value': 21.5}, 'temperature'), ({'value': 60}, 'humidity'),
+                (22, 'temperature'), (23, 'temperature')])
+            self.assertEqual(temperature.received, [
+                ({'value': 21.5}, 'temperature'), (22, 'temperature'),
+                (23, 'temperature')])
+            stats, = publisher.stats()
+            self.assertEqual(stats['events'], {'all', 'temperature'})
+
+            subscriber.unregister(everything)
+            self.assertEqual(publisher.stats()[0]['events'], {'temperature'})
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(observable.observers['all'], [])
+
+    def test_serializer(self):
+        """
+        Test a pluggable serializer.
+
+        It is expected from :class:`SocketPublisher`:
+            * To use the given serializer on both sides.
+        """
+        observable = Observable()
+        with SocketPublisher(observable, self.path,
+                             serializer=JSONSerializer) as publisher, \
+                SocketSubscriber(self.path,
+                                 serializer=JSONSerializer) as subscriber:
+            recorder = WaitingRecorder()
+            subscriber.register(recorder, 'temperature')
+            observable.notify([1, 2], 'temperature')
+            self.assertTrue(publisher.flush(5))
+            self.assertTrue(recorder.done.wait(5))
+        self.assertEqual(recorder.received, [([1, 2], 'temperature')])
+
+    def test_slow_subscriber(self):
+        """
+        Test a subscriber that does not read its socket.
+
+        It is expected from :class:`SocketPublisher`:
+            * To keep delivering to the other subscribers, without blocking
+              the producer, dropping the oldest frames of the slow subscriber
+              beyond its buffer.
+        """
+        observable = Observable()
+        payload = bytes(64 * 1024)
+        with SocketPublisher(observable, self.path,
+                             max_buffer=256 * 1024) as publisher, \
+                SocketSubscriber(self.path) as subscriber:
+            slow = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            slow.connect(self.path)
+            slow.sendall(_frame(pickle, ('register', 'all', 0)))
+            recorder = WaitingRecorder()
+            subscriber.register(recorder, 'blob')
+            deadline = time.monotonic() + 5
+            while len(publisher.stats()) < 2 or not all(
+                    stats['events'] for stats in publisher.stats()):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+
+            for count in range(1, 101):
+                observable.notify(payload, 'blob')
+                while len(recorder.received) < count:
+                    self.assertLess(time.monotonic(), deadline + 10)
+                    time.sleep(0.001)
+
+            slow_stats = max(publisher.stats(),
+                             key=lambda stats: stats['dropped'])
+            self.assertGreater(slow_stats['dropped'], 0)
+            self.assertLessEqual(slow_stats['buffered'], 256 * 1024 + 65600)
+            slow.close()
+
+    def test_register_from_update(self):
+        """
+        Test :meth:`SocketSubscriber.register` from an observer update.
+
+        It is expected from :meth:`SocketSubscriber.register`:
+            * To subscribe without waiting in the thread receiving the
+              confirmations.
+        """
+        observable = Observable()
+        with SocketPublisher(observable, self.path) as publisher, \
+                SocketSubscriber(self.path, timeout=1) as subscriber:
+            recorder = WaitingRecorder()
+            subscriber.register(RegisteringObserver(subscriber, recorder,
+                                                    'other'), 'temperature')
+            observable.notify(1, 'temperature')
+            deadline = time.monotonic() + 5
+            while 'other' not in publisher.stats()[0]['events']:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            observable.notify(2, 'other')
+            self.assertTrue(recorder.done.wait(5))
+        self.assertEqual(subscriber.failures, [])
+        self.assertEqual(recorder.received, [(2, 'other')])
+
+    def test_late_confirmation(self):
+        """
+        Test :meth:`SocketSubscriber.register` with a late publisher.
+
+        It is expected from :meth:`SocketSubscriber.register`:
+            * To raise ConnectionError when not confirmed in time.
+            * To not take the late confirmation for the one of a later
+              request.
+        """
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen()
+        confirmed = list()
+
+        def publish():
+            connection, _ = listener.accept()
+            incoming = bytearray()
+            for _ in range(2):
+                while True:
+                    payloads, used = _unframe(incoming)
+                    if payloads:
+                        break
+                    incoming += connection.recv(4096)
+                del incoming[:used]
+                _, _, request = pickle.loads(payloads[0])
+                time.sleep(0.3)
+                confirmed.append(time.monotonic())
+                connection.sendall(_frame(pickle, ('ack', request)))
+            connection.recv(1)
+            connection.close()
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        try:
+            with SocketSubscriber(self.path, timeout=0.1) as subscriber:
+                with self.assertRaises(ConnectionError):
+                    subscriber.register(WaitingRecorder(), 'late')
+                subscriber._timeout = 5
+                subscriber.register(WaitingRecorder(), 'next')
+                self.assertEqual(len(confirmed), 2)
+        finally:
+            thread.join()
+            listener.close()
+
+    def test_bad_request(self):
+        """
+        Test a subscriber sending a request that can not be decoded.
+
+        It is expected from :class:`SocketPublisher`:
+            * To disconnect that subscriber only, and keep publishing to the
+              others.
+        """
+        observable = Observable()
+        with SocketPublisher(observable, self.path) as publisher, \
+                SocketSubscriber(self.path) as subscriber:
+            recorder = WaitingRecorder(2)
+            subscriber.register(recorder, 'temperature')
+            for request in (b'garbage', ('register',), ('erase', 'all', 0)):
+                rogue = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                rogue.settimeout(5)
+                rogue.connect(self.path)
+                if isinstance(request, bytes):
+                    rogue.sendall(struct.pack('!I', len(request)) + request)
+                else:
+                    rogue.sendall(_frame(pickle, request))
+                self.assertEqual(rogue.recv(1), b'')
+                rogue.close()
+
+            observable.notify(1, 'temperature')
+            observable.notify(2, 'temperature')
+            self.assertTrue(recorder.done.wait(5))
+            self.assertEqual(len(publisher.stats()), 1)
+        self.assertEqual(recorder.received, [(1, 'temperature'),
+                                             (2, 'temperature')])
+
+    def test_confirmation_when_behind(self):
+        """
+        Test the confirmations of a subscriber that does not keep up.
+
+        It is expected from :class:`SocketPublisher`:
+            * To never drop the confirmation of a request, even when dropping
+              the notifications of the subscriber.
+        """
+        observable = Observable()
+        payload = bytes(64 * 1024)
+        with SocketPublisher(observable, self.path,
+                             max_buffer=256 * 1024) as publisher:
+            slow = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            slow.connect(self.path)
+            slow.sendall(_frame(pickle, ('register', 'all', 0)))
+            deadline = time.monotonic() + 5
+            while not publisher.stats() or \
+                    not publisher.stats()[0]['events']:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            for _ in range(50):
+                observable.notify(payload, 'blob')
+            slow.sendall(_frame(pickle, ('register', 'other', 7)))
+            while 'other' not in publisher.stats()[0]['events']:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            for _ in range(50):
+                observable.notify(payload, 'blob')
+            self.assertGreater(publisher.stats()[0]['dropped'], 0)
+
+            acks = list()
+            incoming = bytearray()
+            slow.settimeout(1)
+            try:
+                while 7 not in acks:
+                    incoming += slow.recv(1 << 16)
+                    payloads, used = _unframe(incoming)
+                    del incoming[:used]
+                    acks.extend(message[1] for message in map(
+                        pickle.loads, payloads) if message[0] == 'ack')
+            except socket.timeout:
+                pass
+            slow.close()
+        self.assertEqual(acks, [0, 7])
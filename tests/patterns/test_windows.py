@@ -0,0 +1,108 @@
+"""Tests for :mod:`windows` module's code."""
+
+from unittest import TestCase, skipIf
+from matils.patterns.observer import Observer
+from matils.patterns.windows import WindowObservable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class WindowRecorder(Observer):
+    """An observer keeping copies of the windows it receives."""
+
+    def __init__(self):
+        """Initialize the list of received windows."""
+        self.received = list()
+        self.bases = list()
+
+    def update(self, data, event='all'):
+        """Record a copy of the window, and the array it is a view of."""
+        self.received.append((data.tolist(), event))
+        self.bases.append(data.base)
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class TestWindowObservable(TestCase):
+    """Test cases for the class WindowObservable from :mod:`windows`."""
+
+    def test_sliding_and_tumbling(self):
+        """
+        Test :meth:`WindowObservable.notify`.
+
+        It is expected from :meth:`WindowObservable.notify`:
+            * To deliver sliding windows when the stride is smaller than the
+              window and tumbling windows otherwise.
+            * To deliver read-only views of the same buffer, across the wrap
+              around of the ring.
+        """
+        observable = WindowObservable(capacity=4, field='value')
+        sliding, tumbling = WindowRecorder(), WindowRecorder()
+        observable.register(sliding, 'temperature', window=3, stride=1)
+        observable.register(tumbling, window=2)
+        for value in range(7):
+            observable.notify({'value': value}, 'temperature')
+
+        self.assertEqual([window for window, _ in sliding.received],
+                         [[0, 1, 2], [1, 2, 3], [2, 3, 4], [3, 4, 5],
+                          [4, 5, 6]])
+        self.assertEqual(tumbling.received, [([0, 1], 'temperature'),
+                                             ([2, 3], 'temperature'),
+                                             ([4, 5], 'temperature')])
+        self.assertTrue(all(base is sliding.bases[0]
+                            for base in sliding.bases))
+        window = observable.window('temperature', 10)
+        self.assertEqual(window.tolist(), [3, 4, 5, 6])
+        self.assertFalse(window.flags.writeable)
+        self.assertEqual(observable.window('humidity', 10).tolist(), [])
+
+    def test_notify_many(self):
+        """
+        Test :meth:`WindowObservable.notify_many`.
+
+        It is expected from :meth:`WindowObservable.notify_many`:
+            * To deliver the same windows as notifying one reading at a time,
+              even for batches bigger than the ring.
+            * To start the windows of a late registration after it.
+        """
+        values = list(range(25))
+        expected = WindowObservable(capacity=8)
+        batched = WindowObservable(capacity=8)
+        one, many = WindowRecorder(), WindowRecorder()
+        expected.register(one, 'event', window=5, stride=3)
+        batched.register(many, 'event', window=5, stride=3)
+        for value in values:
+            expected.notify(value, 'event')
+        batched.notify_many([(value, 'event') for value in values])
+        self.assertEqual(many.received, one.received)
+
+        late = WindowRecorder()
+        batched.register(late, 'event', window=2)
+        batched.notify_many([(25, 'event'), (26, 'event'), (27, 'event')])
+        self.assertEqual(late.received, [([24, 25], 'event'),
+                                         ([26, 27], 'event')])
+
+    def test_unobserved_events(self):
+        """
+        Test the rings of :class:`WindowObservable`.
+
+        It is expected from :class:`WindowObservable`:
+            * To keep no readings of the events without observers.
+            * To release the ring of an event with its last observer.
+        """
+        observable, recorder = WindowObservable(capacity=4), WindowRecorder()
+        observable.notify(1, 'humidity')
+        observable.notify_many([(2, 'humidity')])
+        self.assertEqual(observable._rings, {})
+
+        observable.register(recorder, 'temperature', window=2)
+        observable.notify_many([(3, 'temperature'), (4, 'humidity'),
+                                (5, 'temperature')])
+        self.assertEqual(list(observable._rings), ['temperature'])
+        self.assertEqual(recorder.received, [([3, 5], 'temperature')])
+
+        observable.unregister(recorder)
+        self.assertEqual(observable._rings, {})
+        self.assertEqual(observable.window('temperature', 2).tolist(), [])